@@ -0,0 +1,243 @@
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+# Uruchamiane z katalogu _dev_tools -> dodajemy katalog projektu do ścieżki
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.planner import date_format
+from core.plan_rows import build_plan_rows
+
+# Liczba tematów w mierzonych planach (egzaminy: 1 na ~50 tematów)
+SIZES = [1000, 10000, 100000]
+# Wzorzec jest kwadratowy - mierzymy go tylko do tego rozmiaru
+REFERENCE_LIMIT = 10000
+
+
+# --- WZORZEC: budowanie wierszy z PlanWindow sprzed wydzielenia (zagnieżdżone przeszukiwania) ---
+def reference_rows(exams, topics, blocked_dates, txt, today):
+    rows = []
+    theme_tags = {}
+
+    # 1. ZALEGŁE
+    rows.append((None, ("", "", ""), ()))
+    active_exams_ids = {e["id"] for e in exams if date_format(e["date"]) >= today}
+    overdue_topics = [
+        t for t in topics
+        if t.get("scheduled_date") and date_format(t["scheduled_date"]) < today
+           and t["status"] == "todo" and t["exam_id"] in active_exams_ids
+    ]
+
+    if overdue_topics:
+        rows.append((None, ("", txt["tag_overdue"], ""), ("overdue",)))
+        for topic in overdue_topics:
+            subj_name = txt["val_other"]
+            for exam in exams:
+                if exam["id"] == topic["exam_id"]:
+                    subj_name = exam["subject"]
+                    break
+            has_note = topic.get("note", "").strip()
+            is_locked = topic.get("locked", False)
+            marks = ""
+            if has_note: marks += " ✎"
+            if is_locked: marks += " ☒"
+            rows.append((topic["id"], (marks, f"{topic['scheduled_date']}\t{subj_name}", topic["name"]),
+                         ("overdue",)))
+        rows.append((None, ("", "", ""), ()))
+
+    # 2. DATY (Główna pętla)
+    all_dates = set()
+    for exam in exams:
+        if date_format(exam["date"]) >= today:
+            all_dates.add(str(exam["date"]))
+    for topic in topics:
+        if topic.get("scheduled_date") and date_format(topic["scheduled_date"]) >= today:
+            all_dates.add(str(topic["scheduled_date"]))
+
+    if all_dates:
+        for bd in blocked_dates:
+            if bd >= str(today) and bd <= max(all_dates):
+                all_dates.add(bd)
+
+    sorted_dates = sorted(list(all_dates))
+
+    # Budowanie wierszy...
+    for day_str in sorted_dates:
+        todays_exams = [e for e in exams if e["date"] == day_str]
+        todays_topics = [t for t in topics if str(t.get("scheduled_date")) == day_str]
+        is_blocked = day_str in blocked_dates
+        has_exams = len(todays_exams) > 0
+
+        days_left = (date_format(day_str) - today).days
+        display_text = ""
+        tag = "normal"
+        icon = "●"
+
+        if is_blocked and not has_exams:
+            display_text = txt.get("tag_day_off", "(Day Off)")
+            tag = "blocked"
+            icon = "○"
+        else:
+            if days_left == 0:
+                display_text = txt["tag_today"]
+                tag = "today"
+            elif days_left == 1:
+                display_text = txt["tag_1_day"]
+                tag = "red"
+            else:
+                display_text = txt["tag_x_days"].format(days=days_left)
+                if days_left <= 3:
+                    tag = "orange"
+                elif days_left <= 6:
+                    tag = "yellow"
+            if is_blocked:
+                display_text += f" {txt.get('tag_day_off', '(Day Off)')}"
+                icon = "○"
+
+        weekday_idx = date_format(day_str).weekday()
+        day_name = txt["days_short"][weekday_idx]
+
+        rows.append((f"date_{day_str}", (icon, f"{display_text} ({day_name}, {day_str})", ""), (tag,)))
+
+        if not is_blocked or has_exams:
+            rows.append((None, ("│", "", ""), ("todo",)))
+            for exam in todays_exams:
+                marks = ""
+                if exam.get("note", "").strip(): marks += " ✎"
+                if exam.get("ignore_barrier", False): marks += " ø"
+                rows.append((exam["id"], (f"{marks} │", exam["subject"], exam["title"]), ("exam",)))
+
+            if not is_blocked:
+                if todays_exams and todays_topics: rows.append((None, ("│", "", ""), ("todo",)))
+
+                for topic in todays_topics:
+                    subj_name = txt["val_other"]
+                    parent_exam = None
+                    for exam in exams:
+                        if exam["id"] == topic["exam_id"]:
+                            subj_name = exam["subject"]
+                            parent_exam = exam
+                            break
+
+                    has_note = topic.get("note", "").strip()
+                    marks = " ✎" if has_note else ""
+                    if topic.get("locked", False): marks += " ☒"
+
+                    final_tags = []
+                    if topic["status"] == "done":
+                        final_tags.append("done")
+                    else:
+                        if parent_exam and parent_exam.get("color"):
+                            tag_col_name = f"theme_{parent_exam['id']}"
+                            theme_tags[tag_col_name] = parent_exam["color"]
+                            final_tags.append(tag_col_name)
+                        else:
+                            final_tags.append("todo")
+
+                    rows.append((topic["id"], (f"{marks} │", subj_name, topic["name"]), tuple(final_tags)))
+            rows.append((None, ("│", "", ""), ("todo",)))
+        rows.append((None, ("", "", ""), ()))
+
+    has_items = len(sorted_dates) > 0 or len(overdue_topics) > 0
+    return rows, theme_tags, has_items
+
+
+# --- GENERATOR DANYCH (słowniki jak z get_exams / get_topics, bez bazy) ---
+def build_data(topic_count, seed, horizon=150):
+    rng = random.Random(seed)
+    today = date.today()
+    exam_count = max(1, topic_count // 50)
+    colors = [None, "#3498db", "#e74c3c", "#2ecc71"]
+
+    exams = []
+    for i in range(exam_count):
+        kind = rng.random()
+        if kind < 0.03:
+            exam_date = "bad-date"  # uszkodzona data (fallback na dziś)
+        elif kind < 0.15:
+            exam_date = str(today - timedelta(days=rng.randint(1, 20)))
+        else:
+            exam_date = str(today + timedelta(days=rng.randint(0, horizon)))
+        exams.append({"id": f"exam_{i}", "subject": f"Subject {i % 40}", "title": f"Exam {i}", "date": exam_date,
+                      "note": "note" if rng.random() < 0.1 else "", "ignore_barrier": rng.random() < 0.2,
+                      "color": rng.choice(colors)})
+
+    topics = []
+    for i in range(topic_count):
+        scheduled = None
+        if rng.random() < 0.9:
+            scheduled = str(today + timedelta(days=rng.randint(-15, horizon)))
+        exam_id = f"exam_{rng.randrange(exam_count)}" if rng.random() < 0.98 else "exam_missing"
+        topics.append({"id": f"topic_{i}", "exam_id": exam_id, "name": f"Topic {i}",
+                       "status": "done" if rng.random() < 0.2 else "todo", "scheduled_date": scheduled,
+                       "locked": rng.random() < 0.05, "note": " " if rng.random() < 0.05 else ""})
+
+    blocked = sorted({str(today + timedelta(days=rng.randint(-30, horizon + 30))) for _ in range(horizon // 3)})
+    return exams, topics, blocked
+
+
+def load_txt():
+    with open(PROJECT_ROOT / "languages" / "lang_en.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_check(cases, seed, txt):
+    today = date.today()
+    failures = 0
+    for case in range(seed, seed + cases):
+        rng = random.Random(case)
+        exams, topics, blocked = build_data(rng.choice([0, 5, 50, 300]), case, rng.choice([3, 20, 90]))
+        expected = reference_rows(exams, topics, blocked, txt, today)
+        model = build_plan_rows(exams, topics, blocked, txt, today)
+        if (model.rows, model.theme_tags, model.has_items) != expected:
+            failures += 1
+            print(f"[FAIL] seed={case}")
+    print(f"{cases - failures}/{cases} scenariuszy zgodnych ze wzorcem.")
+    return failures
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark i test zgodności modelu wierszy tabeli planu")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="liczby tematów oddzielone przecinkami")
+    parser.add_argument("--repeat", type=int, default=3, help="liczba powtórzeń pomiaru czasu (liczy się najlepszy)")
+    parser.add_argument("--cases", type=int, default=200, help="liczba losowych scenariuszy zgodności")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno generatora danych")
+    args = parser.parse_args()
+
+    txt = load_txt()
+    today = date.today()
+    failures = run_check(args.cases, args.seed, txt)
+
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        exams, topics, blocked = build_data(size, args.seed)
+        seconds, peak = timed(lambda: build_plan_rows(exams, topics, blocked, txt, today), args.repeat)
+        rows = len(build_plan_rows(exams, topics, blocked, txt, today).rows)
+        line = f"[{size} tematów, {len(exams)} egzaminów] {rows} wierszy: {seconds * 1000:.1f} ms, {peak:.0f} KiB"
+        if size <= REFERENCE_LIMIT:
+            ref_seconds, _ = timed(lambda: reference_rows(exams, topics, blocked, txt, today), 1)
+            line += f" | wzorzec: {ref_seconds * 1000:.1f} ms"
+        print(line)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+# Uruchamiane z katalogu _dev_tools -> dodajemy katalog projektu do ścieżki
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.storage import SQLiteProvider
+from core.planner import plan, compute_plan, callendar_create, topics_list_create
+
+# Rozmiary syntetycznych baz: egzaminy, tematy, lata dni wolnych, udział egzaminów z ignore_barrier
+SIZES = {
+    "tiny": {"exams": 10, "topics": 100, "blocked_years": 0.5, "ignore_barrier": 0.0},
+    "small": {"exams": 50, "topics": 2000, "blocked_years": 1, "ignore_barrier": 0.2},
+    "medium": {"exams": 200, "topics": 10000, "blocked_years": 2, "ignore_barrier": 0.5},
+    "large": {"exams": 800, "topics": 60000, "blocked_years": 3, "ignore_barrier": 0.8},
+    "xl": {"exams": 2000, "topics": 200000, "blocked_years": 4, "ignore_barrier": 0.95},
+}
+
+SEMESTER_DAYS = 150
+TOPICS_LIST_SAMPLE = 50
+
+
+# --- GENERATOR SEMESTRU ---
+def build_database(path, size, seed):
+    cfg = SIZES[size]
+    rng = random.Random(seed)
+    today = date.today()
+
+    provider = SQLiteProvider(path)
+    conn = provider._get_conn()
+
+    semesters = [("sem_1", "Semester", str(today - timedelta(days=30)), str(today + timedelta(days=SEMESTER_DAYS)), 1)]
+    subject_count = max(1, cfg["exams"] // 4)
+    subjects = [(f"sub_{i}", "sem_1", f"Subject {i}", f"S{i}", "#3498db", 1.0, None, None)
+                for i in range(subject_count)]
+
+    # Egzaminy w całym semestrze: nakładające się okna, kilka egzaminów tego samego dnia
+    exams = []
+    for i in range(cfg["exams"]):
+        sub = subjects[i % subject_count]
+        exam_date = today + timedelta(days=rng.randint(1, SEMESTER_DAYS))
+        ignore = 1 if rng.random() < cfg["ignore_barrier"] else 0
+        exams.append((f"exam_{i}", sub[0], sub[2], f"Exam {i}", str(exam_date), ignore))
+
+    # Tematy rozdzielone nierówno między egzaminy (część już zrobiona / zablokowana / zaplanowana)
+    weights = [rng.random() + 0.1 for _ in exams]
+    total_weight = sum(weights)
+    topics = []
+    n = 0
+    for exam, weight in zip(exams, weights):
+        count = max(1, round(cfg["topics"] * weight / total_weight))
+        for j in range(count):
+            status = "done" if rng.random() < 0.15 else "todo"
+            locked = 1 if rng.random() < 0.05 else 0
+            scheduled = str(today + timedelta(days=rng.randint(-10, SEMESTER_DAYS))) if rng.random() < 0.5 else None
+            topics.append((f"topic_{n}", exam[0], f"Topic {j}", status, scheduled, locked))
+            n += 1
+
+    # Dni wolne: "lata" historii i przyszłości (weekendy + losowe dni)
+    blocked = set()
+    span = int(cfg["blocked_years"] * 365)
+    first_day = today - timedelta(days=span // 2)
+    for d in range(span):
+        day = first_day + timedelta(days=d)
+        if day.weekday() == 6 or rng.random() < 0.05:
+            blocked.add(str(day))
+
+    conn.executemany("INSERT INTO semesters (id, name, start_date, end_date, is_current) VALUES (?, ?, ?, ?, ?)",
+                     semesters)
+    conn.executemany("""INSERT INTO subjects (id, semester_id, name, short_name, color, weight, start_datetime,
+                        end_datetime) VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", subjects)
+    conn.executemany("INSERT INTO exams (id, subject_id, subject, title, date, ignore_barrier) VALUES (?, ?, ?, ?, ?, ?)",
+                     exams)
+    conn.executemany("INSERT INTO topics (id, exam_id, name, status, scheduled_date, locked) VALUES (?, ?, ?, ?, ?, ?)",
+                     topics)
+    conn.executemany("INSERT INTO blocked_dates (date) VALUES (?)", [(d,) for d in sorted(blocked)])
+    conn.commit()
+    provider.close()
+    return {"exams": len(exams), "topics": len(topics), "blocked_dates": len(blocked)}
+
+
+# --- POMIARY ---
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, statement):
+        self.count += 1
+
+
+def measure(prepare, repeat):
+    # prepare() -> (provider, func, cleanup). Czas: najlepszy z `repeat` przebiegów;
+    # zapytania: liczone w pierwszym przebiegu; pamięć szczytowa: osobny przebieg pod tracemalloc
+    counter = QueryCounter()
+    times = []
+    for i in range(repeat + 1):
+        provider, func, cleanup = prepare()
+        conn = provider._get_conn()
+        conn.set_trace_callback(counter if i == 0 else None)
+        try:
+            if i < repeat:
+                start = time.perf_counter()
+                func()
+                times.append(time.perf_counter() - start)
+            else:
+                tracemalloc.start()
+                func()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+        finally:
+            conn.set_trace_callback(None)
+            cleanup()
+
+    return {
+        "seconds": round(min(times), 6),
+        "queries": counter.count,
+        "peak_kib": round(peak / 1024, 1)
+    }
+
+
+def bench_size(size, seed, repeat, tmp_dir):
+    path = os.path.join(tmp_dir, f"bench_{size}.db")
+    counts = build_database(path, size, seed)
+    today = date.today()
+
+    provider = SQLiteProvider(path)
+    exam_ids = [e["id"] for e in provider.get_exams()][:TOPICS_LIST_SAMPLE]
+
+    def shared(func):
+        # Operacje tylko do odczytu: wspólna baza dla wszystkich przebiegów
+        return lambda: (provider, func, lambda: None)
+
+    results = {"data": counts}
+    results["callendar_create"] = measure(shared(lambda: callendar_create(provider, today)), repeat)
+    results["topics_list_create"] = measure(
+        shared(lambda: [topics_list_create(provider, e_id) for e_id in exam_ids]), repeat)
+    results["topics_list_create"]["calls"] = len(exam_ids)
+    results["compute_plan"] = measure(shared(lambda: compute_plan(provider)), repeat)
+    provider.close()
+
+    # plan() z zapisem: każdy przebieg na świeżej kopii bazy (pierwsze "Generuj plan" zmienia najwięcej dat)
+    copies = iter(range(repeat + 1))
+
+    def fresh_copy():
+        copy_path = os.path.join(tmp_dir, f"bench_{size}_plan_{next(copies)}.db")
+        shutil.copyfile(path, copy_path)
+        copy = SQLiteProvider(copy_path)
+        return copy, lambda: plan(copy), copy.close
+
+    results["plan"] = measure(fresh_copy, repeat)
+    return results
+
+
+# --- PORÓWNANIE Z WYNIKAMI BAZOWYMI ---
+def check_baseline(results, baseline, tolerance):
+    regressions = []
+    for size, ops in results["sizes"].items():
+        base_ops = baseline.get("sizes", {}).get(size)
+        if not base_ops:
+            continue
+        for op, metrics in ops.items():
+            base = base_ops.get(op)
+            if op == "data" or not base:
+                continue
+            # Czas i pamięć z tolerancją (szum pomiaru), liczba zapytań musi się zgadzać co do sztuki
+            if metrics["seconds"] > base["seconds"] * tolerance and metrics["seconds"] - base["seconds"] > 0.02:
+                regressions.append(f"{size}/{op}: czas {metrics['seconds']:.4f}s > {base['seconds']:.4f}s x {tolerance}")
+            if metrics["peak_kib"] > base["peak_kib"] * tolerance and metrics["peak_kib"] - base["peak_kib"] > 64:
+                regressions.append(f"{size}/{op}: pamięć {metrics['peak_kib']} KiB > {base['peak_kib']} KiB x {tolerance}")
+            if metrics["queries"] > base["queries"]:
+                regressions.append(f"{size}/{op}: zapytania {metrics['queries']} > {base['queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark planera na syntetycznych bazach semestru")
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"rozmiary oddzielone przecinkami ({', '.join(SIZES)})")
+    parser.add_argument("--repeat", type=int, default=3, help="liczba powtórzeń pomiaru czasu (liczy się najlepszy)")
+    parser.add_argument("--seed", type=int, default=0, help="ziarno generatora danych")
+    parser.add_argument("--output", help="plik wynikowy JSON (bez tej opcji wyniki nie są zapisywane)")
+    parser.add_argument("--baseline", help="plik JSON z poprzedniego uruchomienia do porównania")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="dopuszczalny mnożnik czasu / pamięci")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"nieznane rozmiary: {', '.join(unknown)}")
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "sizes": {}
+    }
+    with tempfile.TemporaryDirectory(prefix="splanner_bench_") as tmp_dir:
+        for size in sizes:
+            res = bench_size(size, args.seed, args.repeat, tmp_dir)
+            results["sizes"][size] = res
+            data = res["data"]
+            print(f"[{size}] {data['exams']} egzaminów, {data['topics']} tematów, {data['blocked_dates']} dni wolnych")
+            for op in ("plan", "compute_plan", "callendar_create", "topics_list_create"):
+                m = res[op]
+                print(f"    {op:<20} {m['seconds'] * 1000:>10.1f} ms {m['queries']:>8} zapytań {m['peak_kib']:>10.1f} KiB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Zapisano wyniki: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = check_baseline(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"[REGRESJA] {line}")
+        if regressions:
+            return 1
+        print("Brak regresji względem wyników bazowych.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+# Uruchamiane z katalogu _dev_tools -> dodajemy katalog projektu do ścieżki
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.storage import SQLiteProvider
+from core.capacity import compute_free_minutes, merge_intervals
+from core.planner import plan
+
+
+# --- SCENARIUSZ PLANU ZAJĘĆ: dwa tygodnie od poniedziałku 2030-01-07, okno nauki 08:00-20:00 (720 min) ---
+FIRST = date(2030, 1, 7)
+LAST = date(2030, 1, 21)
+
+# Wolne minuty policzone ręcznie dla każdego dnia [FIRST, LAST]
+EXPECTED = {
+    "2030-01-07": 540,  # pn: zajęcia 09:00-11:00 i 10:30-12:00 scalone (180), wydarzenie 10:00-11:00 w środku
+    "2030-01-08": 540,  # wt: zajęcia 12:00-14:00 + wydarzenie 13:00-15:00 -> 12:00-15:00 (180)
+    "2030-01-09": 720,  # śr: zajęcia dopiero od period_start 2030-01-14
+    "2030-01-10": 600,  # czw: wydarzenie cykliczne 18:00-23:00 przycięte do 18:00-20:00 (120)
+    "2030-01-11": 660,  # pt: zajęcia 19:00-21:30 przycięte do 19:00-20:00 (60), ostatni dzień period_end
+    "2030-01-12": 720,  # sb
+    "2030-01-13": 720,  # nd: wydarzenie 05:00-07:00 poza oknem nauki
+    "2030-01-14": 540,  # pn: jak 2030-01-07 (bez wydarzenia wielodniowego)
+    "2030-01-15": 720,  # wt: zajęcia odwołane
+    "2030-01-16": 660,  # śr: zajęcia 07:00-09:00 przycięte do 08:00-09:00 (60)
+    "2030-01-17": 600,  # czw: ostatni dzień wydarzenia cyklicznego
+    "2030-01-18": 0,    # pt: wydarzenie wielodniowe na cały dzień (zajęcia piątkowe już po period_end)
+    "2030-01-19": 0,    # sb: drugi dzień wydarzenia wielodniowego
+    "2030-01-20": 720,  # nd: ostatni dzień przedmiotu
+    "2030-01-21": 720,  # pn: po end_datetime przedmiotu - zajęcia już nie obowiązują
+}
+
+
+def build_timetable(provider):
+    conn = provider._get_conn()
+    provider.update_setting("study_day_start", "08:00")
+    provider.update_setting("study_day_end", "20:00")
+    conn.executemany("INSERT INTO subjects (id, name, start_datetime, end_datetime) VALUES (?, ?, ?, ?)", [
+        ("sub_dated", "Dated", "2030-01-07 00:00", "2030-01-20 23:59"),
+        ("sub_open", "Open", None, None),
+    ])
+    # (id, przedmiot, dzień tygodnia, start, koniec, period_start, period_end)
+    conn.executemany("INSERT INTO schedule_entries (id, subject_id, day_of_week, start_time, end_time, period_start, "
+                     "period_end) VALUES (?, ?, ?, ?, ?, ?, ?)", [
+        ("mon_a", "sub_dated", 0, "09:00", "11:00", None, None),
+        ("mon_b", "sub_dated", 0, "10:30", "12:00", None, None),
+        ("wed", "sub_dated", 2, "07:00", "09:00", "2030-01-14", None),
+        ("fri", "sub_dated", 4, "19:00", "21:30", None, "2030-01-11"),
+        ("tue", "sub_open", 1, "12:00", "14:00", None, None),
+    ])
+    conn.execute("INSERT INTO schedule_cancellations (id, entry_id, date) VALUES (?, ?, ?)",
+                 ("cancel_tue", "tue", "2030-01-15"))
+    # (id, cykliczne, data, dzień tygodnia, start, koniec, start_date, end_date)
+    conn.executemany("INSERT INTO custom_events (id, title, is_recurring, date, day_of_week, start_time, end_time, "
+                     "start_date, end_date) VALUES (?, 'Event', ?, ?, ?, ?, ?, ?, ?)", [
+        ("one_off", 0, "2030-01-08", None, "13:00", "15:00", None, None),
+        ("early", 0, "2030-01-13", None, "05:00", "07:00", None, None),
+        ("before_range", 0, None, None, "10:00", "11:00", "2030-01-05", "2030-01-07"),
+        ("trip", 0, None, None, "08:00", "20:00", "2030-01-18", "2030-01-19"),
+        ("weekly", 1, None, 3, "18:00", "23:00", "2030-01-10", "2030-01-17"),
+    ])
+    conn.commit()
+
+
+def check_free_minutes(tmp_dir):
+    provider = SQLiteProvider(os.path.join(tmp_dir, "capacity.db"))
+    build_timetable(provider)
+    free = compute_free_minutes(provider, FIRST.toordinal(), LAST.toordinal())
+    provider.close()
+
+    actual = {str(date.fromordinal(d)): m for d, m in free.items()}
+    diffs = [(day, EXPECTED[day], actual.get(day)) for day in EXPECTED if actual.get(day) != EXPECTED[day]]
+    if len(actual) != len(EXPECTED):
+        diffs.append(("dni", len(EXPECTED), len(actual)))
+    print(f"[{'OK' if not diffs else 'FAIL'}] wolne minuty: {len(EXPECTED) - len(diffs)}/{len(EXPECTED)} dni"
+          + (f", np. {diffs[:3]}" if diffs else ""))
+    return not diffs
+
+
+def check_merge_intervals():
+    cases = [
+        ([], []),
+        ([(5, 10)], [[5, 10]]),
+        ([(10, 20), (0, 5)], [[0, 5], [10, 20]]),
+        ([(0, 10), (10, 20)], [[0, 20]]),            # stykające się
+        ([(0, 30), (5, 10), (20, 40)], [[0, 40]]),   # zawarte i nakładające się
+    ]
+    bad = [(given, expected, merge_intervals(given)) for given, expected in cases
+           if merge_intervals(given) != expected]
+    print(f"[{'OK' if not bad else 'FAIL'}] scalanie przedziałów" + (f": {bad}" if bad else ""))
+    return not bad
+
+
+# --- PLANER: dni zajęte przez plan zajęć dostają mniej tematów ---
+def build_plan_case(provider, mode, limits):
+    today = date.today()
+    conn = provider._get_conn()
+    provider.update_setting("study_day_start", "08:00")
+    provider.update_setting("study_day_end", "20:00")
+    provider.update_setting("planner_mode", mode)
+    if not limits:
+        provider.update_setting("max_per_day", 0)
+        provider.update_setting("max_same_subject_per_day", 0)
+    conn.execute("INSERT INTO exams (id, subject, title, date, ignore_barrier) VALUES ('exam', 'Subj', 'Exam', ?, 0)",
+                 (str(today + timedelta(days=15)),))
+    conn.executemany("INSERT INTO topics (id, exam_id, name, status, scheduled_date, locked) "
+                     "VALUES (?, 'exam', ?, 'todo', NULL, 0)", [(f"t{i:02d}", f"Topic {i}") for i in range(40)])
+    full_day, busy_day = today + timedelta(days=5), today + timedelta(days=9)
+    conn.executemany("INSERT INTO custom_events (id, title, is_recurring, date, start_time, end_time) "
+                     "VALUES (?, 'Event', 0, ?, ?, ?)", [
+        ("full", str(full_day), "08:00", "20:00"),
+        ("half", str(busy_day), "08:00", "19:00"),
+    ])
+    conn.commit()
+    return str(full_day), str(busy_day)
+
+
+def check_busy_days(tmp_dir, mode, limits=False):
+    # limits=True: domyślne limity tematów na dzień - w trybie "capacity" większość tematów to nadmiar
+    name = f"{mode}{' z limitami' if limits else ''}"
+    provider = SQLiteProvider(os.path.join(tmp_dir, f"busy_{mode}_{int(limits)}.db"))
+    full_day, busy_day = build_plan_case(provider, mode, limits)
+    plan(provider)
+    counts = {}
+    for topic in provider.get_topics():
+        if topic["scheduled_date"]:
+            counts[topic["scheduled_date"]] = counts.get(topic["scheduled_date"], 0) + 1
+    provider.close()
+
+    free_days = [n for day, n in counts.items() if day not in (full_day, busy_day)]
+    problems = []
+    if sum(counts.values()) != 40:
+        problems.append(f"zaplanowano {sum(counts.values())}/40 tematów")
+    if counts.get(full_day, 0):
+        problems.append(f"dzień bez wolnego czasu ma {counts[full_day]} tematów")
+    if not free_days or counts.get(busy_day, 0) >= sum(free_days) / len(free_days):
+        problems.append(f"dzień prawie zajęty ma {counts.get(busy_day, 0)} tematów, "
+                        f"wolne dni średnio {sum(free_days) / max(len(free_days), 1):.1f}")
+    # Tryb "capacity" bez nadmiaru: tematy dnia (30 min) mieszczą się w jego wolnym czasie (60 min)
+    if mode == "capacity" and not limits and counts.get(busy_day, 0) * 30 > 60:
+        problems.append(f"dzień prawie zajęty ma {counts[busy_day]} tematów po 30 min")
+    print(f"[{'OK' if not problems else 'FAIL'}] tryb {name}: zajęte dni dostają mniej tematów"
+          + (f" ({'; '.join(problems)})" if problems else ""))
+    return not problems
+
+
+def main():
+    with tempfile.TemporaryDirectory(prefix="splanner_capacity_") as tmp_dir:
+        results = [check_merge_intervals(), check_free_minutes(tmp_dir)]
+        results += [check_busy_days(tmp_dir, mode) for mode in ("default", "capacity", "effort")]
+        results.append(check_busy_days(tmp_dir, "capacity", limits=True))
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Uruchamiane z katalogu _dev_tools -> dodajemy katalog projektu do ścieżki
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.storage import SQLiteProvider, LOCAL_INDEXES
+
+# Gorące zapytania aplikacji -> indeksy, z których SQLite może skorzystać
+# (przy zapytaniach z OR / ORDER BY planer sam wybiera jeden z dwóch indeksów daily_tasks)
+HOT_QUERIES = [
+    ("get_topics(exam_id)",
+     "SELECT * FROM topics WHERE exam_id=?", ("exam_1",),
+     ("idx_topics_exam",)),
+    ("plan: topics by date",
+     "SELECT * FROM topics WHERE scheduled_date=? AND status='todo'", ("2026-01-01",),
+     ("idx_topics_scheduled_status",)),
+    ("get_grades(subject_id)",
+     "SELECT * FROM grades WHERE subject_id=?", ("sub_1",),
+     ("idx_grades_subject_module",)),
+    ("get_grade_modules(subject_id)",
+     "SELECT * FROM grade_modules WHERE subject_id=?", ("sub_1",),
+     ("idx_grade_modules_subject",)),
+    ("get_schedule_entries_by_subject",
+     "SELECT * FROM schedule_entries WHERE subject_id=?", ("sub_1",),
+     ("idx_schedule_entries_subject",)),
+    ("get_task_history",
+     "SELECT * FROM daily_tasks WHERE status = 'done' OR (date < ? AND status = 'todo') ORDER BY date DESC",
+     ("2026-01-01",),
+     ("idx_daily_tasks_status_date", "idx_daily_tasks_date_status")),
+    ("clear_task_history",
+     "DELETE FROM daily_tasks WHERE status = 'done' OR date < ?", ("2026-01-01",),
+     ("idx_daily_tasks_date_status", "idx_daily_tasks_status_date")),
+    ("restore_overdue_tasks",
+     "UPDATE daily_tasks SET date = ? WHERE date < ? AND status = 'todo'", ("2026-01-01", "2026-01-01"),
+     ("idx_daily_tasks_date_status", "idx_daily_tasks_status_date")),
+]
+
+
+def fill_sample_data(conn, rows=2000):
+    # Trochę danych + ANALYZE, żeby planer SQLite miał statystyki jak w prawdziwej bazie
+    conn.executemany("INSERT INTO topics (id, exam_id, name, status, scheduled_date, locked) VALUES (?, ?, ?, ?, ?, 0)",
+                     [(f"topic_{i}", f"exam_{i % 50}", f"T{i}", "done" if i % 3 == 0 else "todo",
+                       f"2026-01-{i % 28 + 1:02d}") for i in range(rows)])
+    conn.executemany("INSERT INTO daily_tasks (id, content, status, date) VALUES (?, ?, ?, ?)",
+                     [(f"task_{i}", f"Task {i}", "done" if i % 4 == 0 else "todo",
+                       f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}") for i in range(rows)])
+    conn.executemany("INSERT INTO grades (id, subject_id, module_id, value, weight) VALUES (?, ?, ?, ?, 1.0)",
+                     [(f"grade_{i}", f"sub_{i % 40}", None, 4.0) for i in range(rows)])
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def check(tmp_dir):
+    provider = SQLiteProvider(os.path.join(tmp_dir, "check.db"))
+    conn = provider._get_conn()
+    conn.execute("PRAGMA foreign_keys = OFF;")
+    fill_sample_data(conn)
+
+    missing = [name for name in LOCAL_INDEXES
+               if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name=?", (name,)).fetchone()]
+    failures = 0
+    if missing:
+        print(f"[FAIL] Migracja nie utworzyła indeksów: {', '.join(missing)}")
+        failures += 1
+
+    for label, sql, params, index_names in HOT_QUERIES:
+        plan_rows = [r[3] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        detail = " | ".join(plan_rows)
+        # Pełny skan tabeli (bez indeksu) albo sortowanie w pamięci = błąd
+        ok = any(name in detail for name in index_names) and "TEMP B-TREE" not in detail and not any(
+            d.startswith("SCAN ") and "USING" not in d for d in plan_rows)
+        failures += 0 if ok else 1
+        print(f"[{'OK' if ok else 'FAIL'}] {label}: {detail}")
+
+    provider.close()
+    print("Wszystkie zapytania korzystają z indeksów." if not failures else f"Błędy: {failures}")
+    return 1 if failures else 0
+
+
+def main():
+    with tempfile.TemporaryDirectory(prefix="splanner_qp_") as tmp_dir:
+        return check(tmp_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,496 @@
+import argparse
+import copy
+import datetime
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Uruchamiane z katalogu _dev_tools -> dodajemy katalog projektu do ścieżki
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core import sync_fetch
+from core.migration import DataMigrator
+from core.memory_provider import COLUMNS, DEFAULTS, FOREIGN_KEYS
+from core.storage import StorageManager, SupabaseProvider, SYNC_TABLES, SYNC_TOMBSTONES, SYNC_BOOL_COLUMNS
+
+# Klucze tabel spoza SYNC_TABLES
+EXTRA_KEYS = {SYNC_TOMBSTONES: ("table_name", "row_key")}
+
+# Schemat chmury (SQL_SCHEMA): kolumny jak lokalnie, poza grades.desc_text; BOOLEAN zamiast 0/1
+CLOUD_COLUMNS = {t: tuple("desc_text" if (t, c) == ("grades", "desc") else c for c in cols)
+                 for t, cols in COLUMNS.items()}
+CLOUD_DEFAULTS = {(t, c): bool(v) if c in SYNC_BOOL_COLUMNS.get(t, ()) else v for (t, c), v in DEFAULTS.items()}
+# W chmurze daily_tasks.list_id ma klucz obcy (lokalnie nie)
+CLOUD_FOREIGN_KEYS = FOREIGN_KEYS + (("daily_tasks", "list_id", "task_lists", "set_null"),)
+
+# Operatory filtrów postgrest (eq, lt, ... oraz składnia or_("a.eq.1,and(b.lt.2,c.eq.3)"))
+OPERATORS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+}
+
+
+def _compare(column, op, value):
+    return lambda row: row.get(column) is not None and OPERATORS[op](str(row[column]), str(value))
+
+
+def _split_top_level(text):
+    parts, depth, current = [], 0, ""
+    for ch in text:
+        depth += (ch == "(") - (ch == ")")
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    return parts + [current.strip()] if current.strip() else parts
+
+
+def _logic_filter(expr, combine=any):
+    conditions = []
+    for part in _split_top_level(expr):
+        nested = re.fullmatch(r"(and|or)\((.*)\)", part)
+        if nested:
+            conditions.append(_logic_filter(nested.group(2), all if nested.group(1) == "and" else any))
+        else:
+            column, op, value = part.split(".", 2)
+            conditions.append(_compare(column, op, value))
+    return lambda row: combine(c(row) for c in conditions)
+
+
+#   BŁĄD POSTGREST (jak postgrest.APIError: kod SQLSTATE w .code)
+class FakeAPIError(Exception):
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+# --- ZAPYTANIE (podzbiór API postgrest używany przez SupabaseProvider) ---
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.action = "select"
+        self.columns = None
+        self.embedded = {}
+        self.payload = None
+        self.count = None
+        self.filters = []
+        self.orders = []
+        self.start = 0
+        self.stop = None
+
+    def select(self, columns="*", count=None):
+        # Kolumny oraz osadzone tabele powiązane kluczem obcym, np. "*, subjects(name, color)"
+        plain = []
+        for part in _split_top_level(columns):
+            nested = re.fullmatch(r"(\w+)\((.*)\)", part)
+            if nested:
+                self.embedded[nested.group(1)] = [c.strip() for c in nested.group(2).split(",")]
+            else:
+                plain.append(part)
+        self.columns = None if plain == ["*"] else plain
+        self.count = count
+        return self
+
+    def insert(self, payload):
+        self.action, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, **kwargs):
+        self.action, self.payload = "upsert", payload
+        return self
+
+    def update(self, payload):
+        self.action, self.payload = "update", payload
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(_compare(column, "gte", value))
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(_compare(column, "gt", value))
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(_compare(column, "lt", value))
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def or_(self, filters):
+        self.filters.append(_logic_filter(filters))
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self.start, self.stop = start, end + 1
+        return self
+
+    def limit(self, n):
+        self.stop = self.start + n
+        return self
+
+    def execute(self):
+        return self.client._execute(self)
+
+
+# --- WYWOŁANIE FUNKCJI (client.rpc) - funkcje z SQL_SCHEMA ---
+class FakeRpc:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        if self.name != "update_topic_dates":
+            raise RuntimeError(f"function {self.name} does not exist")
+        client = self.client
+        if client.latency:
+            time.sleep(client.latency)
+        with client.lock:
+            client.requests += 1
+            client.writes += 1
+            rows = client.tables.setdefault("topics", {})
+            updated = 0
+            for change in self.params["changes"]:
+                # UPDATE ... FROM: tylko istniejące tematy
+                row = rows.get((change["id"],))
+                if row:
+                    client._write("topics", {**row, "scheduled_date": change["scheduled_date"]})
+                    updated += 1
+        return FakeResponse(updated)
+
+
+# --- KLIENT: tabele w pamięci + opóźnienie sieci + limit wierszy w odpowiedzi ---
+# Emuluje schemat z SQL_SCHEMA: brakujące kolumny (NULL / DEFAULT), ON DELETE CASCADE / SET NULL oraz triggery
+# (updated_at przy każdym zapisie, wpis w sync_tombstones przy usunięciu). Nie emuluje logowania ani RLS.
+class FakeSupabaseClient:
+    def __init__(self, latency=0.0, max_rows=1000):
+        self.latency = latency
+        self.max_rows = max_rows
+        self.tables = {}
+        self.requests = 0
+        # Awaria sieci po tylu zapisach (None = bez awarii) - do testu wznawiania migracji
+        self.fail_writes_after = None
+        # Zapis wykonany, ale odpowiedź zgubiona (tyle kolejnych zapisów) - do testu ponownej wysyłki z kolejki
+        self.lose_responses = 0
+        # Tabele odrzucające zapis naruszeniem ograniczenia (błąd trwały) - do testu odkładania wpisów
+        self.reject_tables = set()
+        # Tabele, których odczyt kończy się awarią sieci - do testu przerwanego pełnego pobrania
+        self.fail_read_tables = set()
+        # (tabela, klucz): wiersz usuwany po pierwszej stronie odczytu tej tabeli (inne urządzenie w trakcie pobierania)
+        self.delete_during_read = None
+        self.writes = 0
+        # Przesunięcie zegara chmury (np. dane testowe sprzed doby - starsze niż margines SYNC_SAFETY_WINDOW)
+        self.clock_offset = datetime.timedelta(0)
+        self.lock = threading.Lock()
+        self._last_stamp = None
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        return FakeRpc(self, name, params)
+
+    def _key(self, table, row):
+        columns = EXTRA_KEYS.get(table) or (SYNC_TABLES.get(table, "id"),)
+        return tuple(row.get(c) for c in columns)
+
+    def _stamp(self):
+        # Ściśle rosnące znaczniki (jak now() w kolejnych transakcjach), przesunięte o clock_offset
+        now = datetime.datetime.now(datetime.timezone.utc)
+        if self._last_stamp and now <= self._last_stamp:
+            now = self._last_stamp + datetime.timedelta(microseconds=1)
+        self._last_stamp = now
+        return (now + self.clock_offset).isoformat()
+
+    def _write(self, table, row):
+        rows = self.tables.setdefault(table, {})
+        row = copy.deepcopy(row)
+        if table in CLOUD_COLUMNS:
+            row = {**{c: CLOUD_DEFAULTS.get((table, c)) for c in CLOUD_COLUMNS[table]}, **row}
+        if table != SYNC_TOMBSTONES:
+            row["updated_at"] = self._stamp()
+        rows[self._key(table, row)] = row
+
+    def _delete(self, table, row):
+        key = self._key(table, row)
+        del self.tables[table][key]
+        self._write(SYNC_TOMBSTONES, {"table_name": table, "row_key": str(key[0]), "deleted_at": self._stamp()})
+        for child, column, parent, action in CLOUD_FOREIGN_KEYS:
+            if parent != table:
+                continue
+            for child_row in [r for r in self.tables.get(child, {}).values() if r.get(column) == key[0]]:
+                if action == "cascade":
+                    self._delete(child, child_row)
+                else:
+                    self._write(child, {**child_row, column: None})
+
+    def _embed(self, table, row, embedded):
+        for parent, columns in embedded.items():
+            column = next(c for t, c, p, _ in CLOUD_FOREIGN_KEYS if t == table and p == parent)
+            match = self.tables.get(parent, {}).get((row.get(column),))
+            row[parent] = {c: match.get(c) for c in columns} if match else None
+        return row
+
+    def seed(self, table, rows):
+        with self.lock:
+            for row in rows:
+                self._write(table, row)
+
+    def _execute(self, q):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.requests += 1
+            rows = self.tables.setdefault(q.table, {})
+            matched = [r for r in rows.values() if all(f(r) for f in q.filters)] \
+                if q.action in ("select", "update", "delete") else []
+
+            if q.action == "select":
+                if q.table in self.fail_read_tables:
+                    raise ConnectionError("simulated network failure")
+                for column, desc in reversed(q.orders):
+                    matched.sort(key=lambda r: (r.get(column) is None, str(r.get(column))), reverse=desc)
+                total = len(matched)
+                stop = q.stop if q.stop is not None else total
+                page = matched[q.start:min(stop, q.start + self.max_rows)]
+                if q.columns:
+                    page = [{c: r.get(c) for c in q.columns} for r in page]
+                page = [self._embed(q.table, dict(r), q.embedded) for r in page]
+                if self.delete_during_read and self.delete_during_read[0] == q.table:
+                    table, key = self.delete_during_read
+                    self.delete_during_read = None
+                    self._delete(table, rows[(key,)])
+                return FakeResponse(copy.deepcopy(page), total if q.count else None)
+
+            if self.fail_writes_after is not None and self.writes >= self.fail_writes_after:
+                raise ConnectionError("simulated network failure")
+            if q.table in self.reject_tables:
+                raise FakeAPIError(f"new row violates check constraint ({q.table})", "23514")
+            self.writes += 1
+            payloads = q.payload if isinstance(q.payload, list) else [q.payload]
+            if q.action == "insert":
+                for p in payloads:
+                    if self._key(q.table, p) in rows:
+                        raise FakeAPIError(f"duplicate key value violates unique constraint ({q.table})", "23505")
+                for p in payloads:
+                    self._write(q.table, p)
+            elif q.action == "upsert":
+                for p in payloads:
+                    self._write(q.table, {**rows.get(self._key(q.table, p), {}), **p})
+            elif q.action == "update":
+                for r in matched:
+                    self._write(q.table, {**r, **q.payload})
+            elif q.action == "delete":
+                for r in matched:
+                    if self._key(q.table, r) in rows:
+                        self._delete(q.table, r)
+            if self.lose_responses:
+                self.lose_responses -= 1
+                raise ConnectionError("simulated lost response")
+            return FakeResponse(copy.deepcopy(payloads if q.action != "delete" else matched))
+
+
+# --- DANE TESTOWE ---
+def seed_account(client, topics):
+    exams = max(1, topics // 50)
+    client.seed("settings", [{"key": "theme", "value": "dark"}, {"key": "lang", "value": "pl"}])
+    client.seed("subjects", [{"id": f"sub{i}", "name": f"Subject {i}", "short_name": f"S{i}", "color": "#3498db"}
+                             for i in range(20)])
+    client.seed("exams", [{"id": f"ex{i}", "subject_id": f"sub{i % 20}", "subject": f"Subject {i % 20}",
+                           "title": f"Exam {i}", "date": "2026-12-01", "ignore_barrier": False}
+                          for i in range(exams)])
+    client.seed("topics", [{"id": f"t{i}", "exam_id": f"ex{i % exams}", "name": f"Topic {i}", "status": "todo",
+                            "scheduled_date": None, "locked": i % 7 == 0} for i in range(topics)])
+    client.seed("daily_tasks", [{"id": f"d{i}", "content": f"Task {i}", "status": "done", "date": "2026-10-01"}
+                                for i in range(topics // 4)])
+
+
+def local_counts(manager):
+    conn = manager.local._get_conn()
+    return {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ("exams", "topics", "daily_tasks")}
+
+
+def timed_sync(client, db_path, workers):
+    sync_fetch.SYNC_WORKERS = workers
+    manager = StorageManager(db_path, config={"db_mode": "local", "supabase_url": "fake"}, migrate_legacy_json=False)
+    manager.cloud = SupabaseProvider("fake", "fake", client=client)
+    requests = client.requests
+    start = time.perf_counter()
+    manager.sync_down(status_callback=lambda text: None)
+    seconds = time.perf_counter() - start
+    counts = local_counts(manager)
+    manager.close()
+    return seconds, client.requests - requests, counts
+
+
+def check_migration(db_path, latency, expected):
+    manager = StorageManager(db_path, config={"db_mode": "local"}, migrate_legacy_json=False)
+    target = FakeSupabaseClient(latency=latency)
+    cloud = SupabaseProvider("fake-target", "fake", client=target)
+    total = sum(manager.local.count_rows(t) for t in SYNC_TABLES)
+
+    target.fail_writes_after = 10
+    ok_first, _ = DataMigrator(manager.local, "fake-target", "fake", cloud_provider=cloud).run(lambda msg: None)
+    writes_first = target.writes
+    target.fail_writes_after = None
+    start = time.perf_counter()
+    ok_second, _ = DataMigrator(manager.local, "fake-target", "fake", cloud_provider=cloud).run(lambda msg: None)
+    seconds = time.perf_counter() - start
+    manager.close()
+
+    counts = {t: len(target.tables.get(t, {})) for t in expected}
+    ok = not ok_first and ok_second and counts == expected
+    print(f"migration: {total} rows, failed after {writes_first} batches, resumed in {seconds:.2f}s "
+          f"({target.writes - writes_first} more batches), {'ok' if ok else f'MISMATCH {counts}'}")
+    return ok
+
+
+def check_outbox(db_path):
+    # Ponowna wysyłka po zgubionej odpowiedzi nie może dublować wierszy, a błąd trwały nie blokuje kolejki
+    client = FakeSupabaseClient()
+    manager = StorageManager(db_path, config={"db_mode": "local"}, migrate_legacy_json=False)
+    manager.cloud = SupabaseProvider("fake", "fake", client=client)
+    manager.add_subject({"id": "sub_x", "semester_id": None, "name": "X", "short_name": "X", "color": "#3498db"})
+    manager.add_schedule_entry({"id": "se_x", "subject_id": "sub_x", "day_of_week": 0, "start_time": "08:00",
+                                "end_time": "10:00", "room": "", "type": "", "period_start": None,
+                                "period_end": None})
+    client.lose_responses = 2
+    manager.add_schedule_cancellation("se_x", "2026-11-02")
+    client.reject_tables = {"grades"}
+    manager.add_grade({"id": "g_x", "subject_id": "sub_x", "value": 5, "weight": 1, "desc": "", "date": None,
+                       "module_id": None})
+    manager.add_exam({"id": "ex_x", "subject": "X", "subject_id": "sub_x", "title": "X", "date": "2026-12-01",
+                      "ignore_barrier": False, "note": "", "color": None})
+    flushed = manager.outbox.flush(timeout=10)
+    stats = manager.outbox.stats()
+    manager.close()
+
+    ok = flushed and stats["failed"] == 1 and len(client.tables.get("schedule_cancellations", {})) == 1 \
+        and ("ex_x",) in client.tables.get("exams", {})
+    print(f"outbox: lost responses resent, {stats['failed']} parked, "
+          f"{len(client.tables.get('schedule_cancellations', {}))} cancellation(s), {'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pobieranie z chmury (sync_down) na atrapie Supabase.")
+    parser.add_argument("--topics", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.03, help="opóźnienie jednego zapytania [s]")
+    parser.add_argument("--max-rows", type=int, default=500, help="limit wierszy w jednej odpowiedzi serwera")
+    args = parser.parse_args()
+
+    client = FakeSupabaseClient(latency=args.latency, max_rows=args.max_rows)
+    # Konto używane od dawna: dane sprzed doby, ostatnia zmiana w każdej tabeli sprzed godziny - przyrost pobiera
+    # wtedy tylko nowe zmiany i końcówkę z marginesu SYNC_SAFETY_WINDOW, a nie całą tabelę
+    client.clock_offset = -datetime.timedelta(days=1)
+    seed_account(client, args.topics)
+    client.clock_offset = -datetime.timedelta(hours=1)
+    for table, rows in list(client.tables.items()):
+        client.seed(table, [next(iter(rows.values()))])
+    client.clock_offset = datetime.timedelta(0)
+    expected = {t: len(client.tables[t]) for t in ("exams", "topics", "daily_tasks")}
+    workdir = Path(tempfile.mkdtemp(prefix="splanner_sync_"))
+    failed = False
+    try:
+        for workers in (1, sync_fetch.SYNC_WORKERS):
+            seconds, requests, counts = timed_sync(client, workdir / f"full_{workers}.db", workers)
+            ok = counts == expected
+            failed |= not ok
+            print(f"full sync, {workers} worker(s): {seconds:.2f}s, {requests} requests, "
+                  f"{'ok' if ok else f'MISMATCH {counts} != {expected}'}")
+
+        # Przyrost: zmiana 10 tematów i usunięcie jednego zadania
+        db_path = workdir / f"full_{sync_fetch.SYNC_WORKERS}.db"
+        client.seed("topics", [{**client.tables["topics"][(f"t{i}",)], "status": "done"} for i in range(10)])
+        client.table("daily_tasks").delete().eq("id", "d0").execute()
+        expected["daily_tasks"] -= 1
+        seconds, requests, counts = timed_sync(client, db_path, sync_fetch.SYNC_WORKERS)
+        ok = counts == expected
+        failed |= not ok
+        print(f"delta sync: {seconds:.2f}s, {requests} requests, {'ok' if ok else f'MISMATCH {counts}'}")
+
+        # Wiersz z transakcji rozpoczętej przed pobraniem, a zatwierdzonej po nim (updated_at = start transakcji,
+        # starszy niż najnowszy pobrany) - margines punktu kontrolnego nie może go pominąć
+        client.clock_offset = -datetime.timedelta(seconds=60)
+        client.seed("topics", [{**client.tables["topics"][("t0",)], "id": "t_late"}])
+        client.clock_offset = datetime.timedelta(0)
+        expected["topics"] += 1
+        seconds, requests, counts = timed_sync(client, db_path, sync_fetch.SYNC_WORKERS)
+        ok = counts == expected
+        failed |= not ok
+        print(f"late commit: {seconds:.2f}s, {requests} requests, {'ok' if ok else f'MISMATCH {counts}'}")
+
+        # Pełne pobranie (chmura bez sync_tombstones) przerwane awarią sieci nie może wyczyścić lokalnych danych,
+        # a następne udane pobranie wraca do przyrostu
+        client.fail_read_tables = {SYNC_TOMBSTONES, "topics"}
+        _, _, counts = timed_sync(client, db_path, sync_fetch.SYNC_WORKERS)
+        client.fail_read_tables = set()
+        kept = counts
+        _, requests, counts = timed_sync(client, db_path, sync_fetch.SYNC_WORKERS)
+        ok = kept == expected and counts == expected
+        failed |= not ok
+        print(f"failed full sync: local data kept, next sync {requests} requests, "
+              f"{'ok' if ok else f'MISMATCH after failure {kept}, after next sync {counts}'}")
+
+        # Migracja lokalnej bazy do pustego projektu: awaria w połowie, potem wznowienie
+        failed |= not check_migration(db_path, args.latency, expected)
+
+        # Wiersz z pierwszej strony usunięty przez inne urządzenie w trakcie pełnego pobrania - stronicowanie po
+        # kluczu nie przesuwa kolejnych stron, więc żaden pozostały wiersz nie może zostać pominięty
+        # (usunięty wiersz zostaje lokalnie do następnego pobrania, które zabiera go z sync_tombstones)
+        path = workdir / "deleted_during_read.db"
+        client.delete_during_read = ("topics", "t1")
+        expected["topics"] -= 1
+        _, requests, _ = timed_sync(client, path, sync_fetch.SYNC_WORKERS)
+        conn = sqlite3.connect(path)
+        local = {k for (k,) in conn.execute("SELECT id FROM topics")}
+        conn.close()
+        missing = {k for (k,) in client.tables["topics"]} - local
+        _, _, counts = timed_sync(client, path, sync_fetch.SYNC_WORKERS)
+        ok = not missing and counts == expected
+        failed |= not ok
+        print(f"delete during download: {requests} requests, "
+              f"{'ok' if ok else f'MISMATCH missing {sorted(missing)}, next sync {counts}'}")
+
+        failed |= not check_outbox(workdir / "outbox.db")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
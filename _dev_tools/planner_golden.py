@@ -0,0 +1,265 @@
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+# Uruchamiane z katalogu _dev_tools -> dodajemy katalog projektu do ścieżki
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.storage import SQLiteProvider
+from core.planner import (plan, replan, date_format, callendar_create, topics_list_create,
+                          CHANGE_BLOCK_DATE, CHANGE_UNBLOCK_DATE, CHANGE_EXAM_MOVED)
+
+
+# --- WZORZEC: algorytm plan() sprzed przepisania (v2.2.0), bez zapisu do bazy ---
+# Zwraca końcowy stan {topic_id: scheduled_date}, który stary plan() zapisałby w bazie.
+def reference_plan(storage, only_unscheduled=False):
+    today = date.today()
+    blocked_set = set(storage.get_blocked_dates())
+    exams = storage.get_exams()
+    callendar = callendar_create(storage, today)
+
+    for exam in exams:
+        if not exam["date"]:
+            continue
+        exam_date = date_format(exam["date"])
+        if exam_date <= today:
+            continue
+        end_study_date = exam_date - timedelta(days=1)
+        if end_study_date < today:
+            continue
+
+        scan_date = end_study_date
+        while scan_date > today and "E" not in callendar.get(scan_date, []):
+            scan_date -= timedelta(days=1)
+        start_study_date = scan_date
+
+        t_list = topics_list_create(storage, exam["id"], only_unscheduled)
+        if not t_list:
+            continue
+
+        valid_days = []
+        curr = start_study_date
+        if curr < today: curr = today
+        while curr <= end_study_date:
+            has_exam = "E" in callendar.get(curr, [])
+            if str(curr) not in blocked_set:
+                if not has_exam or (has_exam and curr == start_study_date):
+                    valid_days.append(curr)
+            curr += timedelta(days=1)
+        valid_days.sort()
+        if not valid_days:
+            continue
+
+        days_total = len(valid_days)
+        tasks_total = len(t_list)
+        start_index = 0
+        if tasks_total <= days_total:
+            start_index = days_total - tasks_total
+
+        for i in range(start_index, days_total):
+            if not t_list:
+                break
+            current_day = valid_days[i]
+            days_remaining_in_loop = days_total - i
+            tasks_remaining_now = len(t_list)
+            if days_remaining_in_loop > 0:
+                per_day = math.ceil(tasks_remaining_now / days_remaining_in_loop)
+            else:
+                per_day = tasks_remaining_now
+            for _ in range(per_day):
+                if t_list:
+                    task_id = t_list.pop(0)
+                    if current_day in callendar:
+                        callendar[current_day].append(task_id)
+
+    all_topics = [dict(t) for t in storage.get_topics()]
+    topics_map = {t["id"]: t for t in all_topics}
+    if not only_unscheduled:
+        for topic in all_topics:
+            if topic["status"] == "todo" and not topic["locked"]:
+                topic["scheduled_date"] = None
+    for date_key, items in callendar.items():
+        for item_id in items:
+            if item_id == "E": continue
+            if item_id in topics_map:
+                topics_map[item_id]["scheduled_date"] = str(date_key)
+    return {t["id"]: t["scheduled_date"] for t in all_topics}
+
+
+# --- GENERATOR SCENARIUSZY ---
+def build_scenario(provider, seed):
+    rng = random.Random(seed)
+    today = date.today()
+    conn = provider._get_conn()
+
+    exam_count = rng.randint(1, 25)
+    horizon = rng.choice([5, 20, 60, 180])
+    exams = []
+    for e in range(exam_count):
+        kind = rng.random()
+        if kind < 0.05:
+            exam_date = ""  # egzamin bez daty
+        elif kind < 0.08:
+            exam_date = "bad-date"  # uszkodzona data (fallback na dziś)
+        elif kind < 0.15:
+            exam_date = str(today - timedelta(days=rng.randint(0, 10)))  # egzamin w przeszłości / dziś
+        else:
+            exam_date = str(today + timedelta(days=rng.randint(1, horizon)))
+        exams.append((f"exam_{e}", "Subj", f"Exam {e}", exam_date, 1 if rng.random() < 0.25 else 0))
+    # Kilka egzaminów tego samego dnia
+    if exam_count > 3 and rng.random() < 0.5:
+        exams[1] = exams[1][:3] + (exams[2][3],) + exams[1][4:]
+    conn.executemany("INSERT INTO exams (id, subject, title, date, ignore_barrier) VALUES (?, ?, ?, ?, ?)", exams)
+
+    topics = []
+    for exam_id, *_ in exams:
+        for i in range(rng.choice([0, 1, 3, 8, 20, 60])):
+            status = "done" if rng.random() < 0.2 else "todo"
+            locked = 1 if rng.random() < 0.1 else 0
+            scheduled = None
+            if rng.random() < 0.4:
+                scheduled = str(today + timedelta(days=rng.randint(-5, horizon)))
+            topics.append((f"{exam_id}_t{i}", exam_id, f"Topic {i}", status, scheduled, locked))
+    rng.shuffle(topics)  # kolejność wstawiania != kolejność egzaminów
+    conn.executemany("INSERT INTO topics (id, exam_id, name, status, scheduled_date, locked) VALUES (?, ?, ?, ?, ?, ?)",
+                     topics)
+
+    blocked = {str(today + timedelta(days=rng.randint(-3, horizon))) for _ in range(rng.randint(0, horizon // 2 + 1))}
+    if rng.random() < 0.2:
+        blocked.add("2026-1-5")  # niepoprawny format - nie może niczego blokować
+    conn.executemany("INSERT INTO blocked_dates (date) VALUES (?)", [(d,) for d in blocked])
+
+    # Połowa scenariuszy z planem zajęć i wydarzeniami (wolne minuty zmieniają rozkład tematów)
+    timetable = rng.random() < 0.5
+    if timetable:
+        conn.execute("INSERT INTO subjects (id, name) VALUES ('sub_golden', 'Subj')")
+        entries = []
+        for i in range(rng.randint(1, 10)):
+            start = rng.randint(7, 19)
+            entries.append((f"entry_{i}", rng.randint(0, 6), f"{start:02d}:00", f"{start + rng.randint(1, 4):02d}:30"))
+        conn.executemany("INSERT INTO schedule_entries (id, subject_id, day_of_week, start_time, end_time) "
+                         "VALUES (?, 'sub_golden', ?, ?, ?)", entries)
+        events = []
+        for i in range(rng.randint(0, horizon // 4 + 1)):
+            day = today + timedelta(days=rng.randint(0, horizon))
+            end_day = day + timedelta(days=rng.choice([0, 0, 1, 3]))
+            start = rng.choice([6, 8, 12, 16])
+            end = rng.choice([start + 2, 23])
+            events.append((f"event_{i}", str(day), str(end_day), f"{start:02d}:00", f"{end:02d}:00"))
+        conn.executemany("INSERT INTO custom_events (id, title, is_recurring, start_date, end_date, start_time, "
+                         "end_time) VALUES (?, 'Event', 0, ?, ?, ?, ?)", events)
+    conn.commit()
+    return timetable
+
+
+#   None = scenariusz z planem zajęć (wzorzec v2.2.0 go nie zna - z zajęciami rozkład celowo się różni)
+def run_case(seed, only_unscheduled, tmp_dir):
+    provider = SQLiteProvider(os.path.join(tmp_dir, f"golden_{seed}_{int(only_unscheduled)}.db"))
+    if build_scenario(provider, seed):
+        provider.close()
+        return None
+
+    expected = reference_plan(provider, only_unscheduled)
+    plan(provider, only_unscheduled)
+    actual = {t["id"]: t["scheduled_date"] for t in provider.get_topics()}
+    provider.close()
+
+    diffs = [(tid, expected[tid], actual.get(tid)) for tid in expected if expected[tid] != actual.get(tid)]
+    return diffs
+
+
+# --- PRZEPLANOWANIE PRZYROSTOWE: replan() po zmianie == pełny plan() po tej samej zmianie ---
+def apply_random_change(provider, rng):
+    today = date.today()
+    conn = provider._get_conn()
+    blocked = provider.get_blocked_dates()
+    kind = rng.choice([CHANGE_BLOCK_DATE, CHANGE_UNBLOCK_DATE, CHANGE_EXAM_MOVED])
+
+    if kind == CHANGE_UNBLOCK_DATE and blocked:
+        day = rng.choice(blocked)
+        provider.remove_blocked_date(day)
+        return kind, day, None
+    if kind == CHANGE_EXAM_MOVED:
+        exams = [e for e in provider.get_exams() if e["date"]]
+        if exams:
+            exam = rng.choice(exams)
+            new_date = str(today + timedelta(days=rng.randint(-2, 60)))
+            conn.execute("UPDATE exams SET date=? WHERE id=?", (new_date, exam["id"]))
+            conn.commit()
+            return kind, exam["id"], exam["date"]
+    day = str(today + timedelta(days=rng.randint(-2, 60)))
+    if day not in blocked:
+        provider.add_blocked_date(day)
+    return CHANGE_BLOCK_DATE, day, None
+
+
+def run_incremental_case(seed, tmp_dir):
+    rng = random.Random(seed)
+    incremental = SQLiteProvider(os.path.join(tmp_dir, f"inc_{seed}.db"))
+    build_scenario(incremental, seed)
+    plan(incremental)
+
+    diffs = []
+    for step in range(5):
+        kind, target, old_date = apply_random_change(incremental, rng)
+        replan(incremental, kind, target, old_date)
+        actual = {t["id"]: t["scheduled_date"] for t in incremental.get_topics()}
+
+        # Wzorzec: pełne planowanie kopii bazy w tym samym stanie
+        full_path = os.path.join(tmp_dir, f"inc_{seed}_{step}_full.db")
+        incremental._get_conn().execute("VACUUM INTO ?", (full_path,))
+        full = SQLiteProvider(full_path)
+        plan(full)
+        expected = {t["id"]: t["scheduled_date"] for t in full.get_topics()}
+        full.close()
+
+        diffs += [(kind, target, tid, expected[tid], actual.get(tid)) for tid in expected
+                  if expected[tid] != actual.get(tid)]
+        if diffs:
+            break
+    incremental.close()
+    return diffs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Porównanie plan() ze wzorcowym algorytmem v2.2.0")
+    parser.add_argument("--cases", type=int, default=200, help="liczba losowych scenariuszy")
+    parser.add_argument("--seed", type=int, default=0, help="pierwsze ziarno losowania")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="splanner_golden_") as tmp_dir:
+        failures = 0
+        compared = 0
+        for seed in range(args.seed, args.seed + args.cases):
+            for only_unscheduled in (False, True):
+                diffs = run_case(seed, only_unscheduled, tmp_dir)
+                if diffs is None:
+                    continue
+                compared += 1
+                if diffs:
+                    failures += 1
+                    print(f"[FAIL] seed={seed} only_unscheduled={only_unscheduled}: "
+                          f"{len(diffs)} różnic, np. {diffs[:3]}")
+
+        skipped = args.cases * 2 - compared
+        print(f"{compared - failures}/{compared} scenariuszy zgodnych ze wzorcem "
+              f"({skipped} z planem zajęć pominiętych).")
+
+        inc_failures = 0
+        for seed in range(args.seed, args.seed + args.cases):
+            diffs = run_incremental_case(seed, tmp_dir)
+            if diffs:
+                inc_failures += 1
+                print(f"[FAIL] replan seed={seed}: {len(diffs)} różnic, np. {diffs[:3]}")
+        print(f"{args.cases - inc_failures}/{args.cases} scenariuszy replan() zgodnych z pełnym plan().")
+    return 1 if failures or inc_failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,431 @@
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Uruchamiane z katalogu _dev_tools -> dodajemy katalog projektu do ścieżki
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.memory_provider import MemoryProvider
+from core.storage import BaseProvider, SQLiteProvider, SupabaseProvider, DEFAULT_SOUNDS
+from fake_supabase import FakeSupabaseClient
+
+# Rozmiary danych: tematy (reszta tabel skaluje się od nich)
+SIZES = {"small": 50, "medium": 500, "large": 2000}
+PROVIDERS = ("sqlite", "memory", "supabase")
+
+# Kolumny istniejące tylko w chmurze (punkt kontrolny synchronizacji) - pomijane w porównaniu
+CLOUD_ONLY_COLUMNS = ("updated_at",)
+# Identyfikatory losowane przez dostawcę (przedmiot z add_exam); ID odwołań zajęć są stałe i porównywane wprost
+GENERATED_ID = re.compile(r"^sub_[0-9a-f]{8}$")
+
+# Metody spoza BaseProvider, których StorageManager używa na każdym dostawcy
+EXTRA_METHODS = (
+    "get_event_lists", "add_event_list", "delete_event_list", "get_custom_events", "add_custom_event",
+    "delete_custom_event", "get_subscriptions", "get_subscription", "add_subscription", "update_subscription",
+    "delete_subscription",
+)
+
+
+# --- DOSTAWCY ---
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, statement):
+        self.count += 1
+
+
+def make_provider(name, tmp_dir, size):
+    # Zwraca (dostawca, funkcja -> liczba zapytań do tej pory, sprzątanie)
+    if name == "sqlite":
+        provider = SQLiteProvider(os.path.join(tmp_dir, f"conformance_{size}.db"), migrate_legacy_json=False)
+        counter = QueryCounter()
+        provider._get_conn().set_trace_callback(counter)
+        return provider, lambda: counter.count, provider.close
+    if name == "memory":
+        provider = MemoryProvider()
+        return provider, lambda: provider.calls, provider.close
+    # Chmura: SupabaseProvider na atrapie klienta z _dev_tools/fake_supabase.py (dźwięki domyślne jak po migracji)
+    client = FakeSupabaseClient(max_rows=10 ** 9)
+    client.seed("custom_sounds", [{"id": s["id"], "name": s["name"], "steps_json": json.dumps(s["steps"])}
+                                  for s in DEFAULT_SOUNDS])
+    return SupabaseProvider("fake", "fake", client=client), lambda: client.requests, lambda: None
+
+
+# --- DANE ---
+def seed(p, topics):
+    today = date.today()
+    exams = max(2, topics // 20)
+    tasks = max(4, topics // 2)
+
+    p.add_semester({"id": "sem_1", "name": "Winter", "start_date": str(today - timedelta(days=30)),
+                    "end_date": str(today + timedelta(days=120)), "is_current": True})
+    p.add_semester({"id": "sem_2", "name": "Summer", "start_date": str(today + timedelta(days=121)),
+                    "end_date": str(today + timedelta(days=240)), "is_current": False})
+    for i in range(10):
+        p.add_subject({"id": f"subj_{i}", "semester_id": f"sem_{i % 2 + 1}", "name": f"Subject {i}",
+                       "short_name": f"S{i}", "color": "#3498db", "weight": 1.0 + i % 3,
+                       "start_datetime": None, "end_datetime": None})
+        p.add_grade_module({"id": f"mod_{i}", "subject_id": f"subj_{i}", "name": "Lab", "weight": 40.0})
+        p.add_grade({"id": f"grade_{i}", "subject_id": f"subj_{i}", "module_id": f"mod_{i}", "value": 4.5,
+                     "weight": 1.0, "desc": f"Test {i}", "date": str(today - timedelta(days=i))})
+        p.add_schedule_entry({"id": f"entry_{i}", "subject_id": f"subj_{i}", "day_of_week": i % 5,
+                              "start_time": "08:00", "end_time": "09:30", "room": f"{100 + i}", "type": "lecture",
+                              "period_start": None, "period_end": None})
+    for i in range(exams):
+        p.add_exam({"id": f"exam_{i}", "subject_id": f"subj_{i % 10}", "subject": f"Subject {i % 10}",
+                    "title": f"Exam {i}", "date": str(today + timedelta(days=5 + i % 60)), "time": "10:00",
+                    "note": "", "ignore_barrier": i % 4 == 0, "color": None})
+    for i in range(topics):
+        p.add_topic({"id": f"topic_{i}", "exam_id": f"exam_{i % exams}", "name": f"Topic {i}",
+                     "status": "done" if i % 5 == 0 else "todo", "scheduled_date": None, "locked": i % 7 == 0,
+                     "note": "", "estimated_minutes": 30 if i % 3 == 0 else None})
+    p.add_task_list({"id": "list_1", "name": "Home", "icon": "🏠", "list_type": "tasks"})
+    p.add_task_list({"id": "list_2", "name": "Work", "icon": "💼", "list_type": "tasks"})
+    for i in range(tasks):
+        p.add_daily_task({"id": f"task_{i}", "content": f"Task {i}", "status": "done" if i % 3 == 0 else "todo",
+                          "date": str(today + timedelta(days=i % 20 - 10)), "color": None,
+                          "created_at": str(today), "note": "", "list_id": f"list_{i % 2 + 1}"})
+    for i in range(20):
+        p.add_blocked_date(str(today + timedelta(days=7 * i)))
+    for i in range(5):
+        p.add_achievement(f"ach_{i}")
+    p.add_event_list({"id": "evl_1", "name": "Gym", "color": "#e74c3c"})
+    p.add_custom_event({"id": "ev_1", "list_id": "evl_1", "title": "Training", "is_recurring": True, "date": None,
+                        "day_of_week": 2, "start_time": "18:00", "end_time": "19:00", "start_date": None,
+                        "end_date": None, "color": "#e74c3c"})
+    p.add_subscription({"id": "subs_1", "subject_id": "subj_1", "name": "Library", "provider": "Uni",
+                        "expiry_date": str(today + timedelta(days=90)), "cost": 10.0, "currency": "PLN",
+                        "billing_cycle": "yearly", "note": "", "is_active": True, "billing_date": None})
+    p.update_setting("theme", "dark")
+    p.update_global_stat("total_topics_done", 12)
+    p.update_other_stat("streak", 3)
+
+
+# --- SCENARIUSZ: każda metoda dostawcy, odczyty po zapisach (porównujemy też stan po zmianie) ---
+def scenario(topics):
+    today = date.today()
+    exams = max(2, topics // 20)
+    sample = [f"topic_{i}" for i in range(0, topics, max(1, topics // 50))]
+    bulk = [{"id": t, "exam_id": f"exam_{i % exams}", "name": f"Bulk {t}", "status": "todo", "locked": False,
+             "scheduled_date": str(today + timedelta(days=1)), "note": "bulk", "estimated_minutes": 45}
+            for i, t in ((int(t.split("_")[1]), t) for t in sample)]
+    dates = [(t, str(today + timedelta(days=n % 10))) for n, t in enumerate(sample)]
+    new_exam = {"id": "exam_new", "subject": "Brand new subject", "title": "Auto", "date": str(today),
+                "time": "", "note": "", "ignore_barrier": False, "color": None}
+
+    return [
+        ("get_settings", lambda p: p.get_settings()),
+        ("update_setting", lambda p: p.update_setting("daily_goal", {"topics": 5})),
+        ("get_settings", lambda p: p.get_settings()),
+        ("get_global_stats", lambda p: p.get_global_stats()),
+        ("update_global_stat", lambda p: p.update_global_stat("pomodoros", 7)),
+        ("update_global_stats", lambda p: p.update_global_stats({"pomodoros": 8, "focus_minutes": 200})),
+        ("get_global_stats", lambda p: p.get_global_stats()),
+        ("get_other_stats", lambda p: p.get_other_stats()),
+        ("update_other_stat", lambda p: p.update_other_stat("streak", 4)),
+        ("get_other_stats", lambda p: p.get_other_stats()),
+
+        ("get_custom_sounds", lambda p: p.get_custom_sounds()),
+        ("add_custom_sound", lambda p: p.add_custom_sound(
+            {"id": "snd_1", "name": "Beep", "steps": [{"freq": 440, "dur": 0.1, "type": "Sine"}]})),
+        ("get_custom_sound", lambda p: p.get_custom_sound("snd_1")),
+        ("delete_custom_sound", lambda p: p.delete_custom_sound("snd_1")),
+        ("get_custom_sounds", lambda p: p.get_custom_sounds()),
+
+        ("get_exams", lambda p: p.get_exams()),
+        ("get_exam", lambda p: p.get_exam("exam_1")),
+        ("add_exam", lambda p: p.add_exam(dict(new_exam))),
+        ("get_exam", lambda p: p.get_exam("exam_new")),
+        ("update_exam", lambda p: p.update_exam({**new_exam, "title": "Renamed", "ignore_barrier": True})),
+        ("get_exam", lambda p: p.get_exam("exam_new")),
+        ("get_subjects", lambda p: p.get_subjects()),
+
+        ("get_topics", lambda p: p.get_topics()),
+        ("get_topics", lambda p: p.get_topics("exam_1")),
+        ("get_topic", lambda p: p.get_topic(sample[0])),
+        ("add_topic", lambda p: p.add_topic({"id": "topic_new", "exam_id": "exam_new", "name": "New",
+                                             "status": "todo", "scheduled_date": None, "locked": True,
+                                             "note": "", "estimated_minutes": None})),
+        ("update_topic", lambda p: p.update_topic({"id": "topic_new", "exam_id": "exam_new", "name": "New 2",
+                                                   "status": "done", "scheduled_date": str(today),
+                                                   "locked": False, "note": "x", "estimated_minutes": 20})),
+        ("get_topic", lambda p: p.get_topic("topic_new")),
+        ("update_topics_bulk", lambda p: p.update_topics_bulk(bulk)),
+        ("update_topic_dates", lambda p: p.update_topic_dates(dates)),
+        ("get_topics", lambda p: p.get_topics()),
+        ("delete_topic", lambda p: p.delete_topic("topic_new")),
+        ("delete_exam", lambda p: p.delete_exam("exam_0")),
+        ("get_topics", lambda p: p.get_topics()),
+
+        ("get_task_lists", lambda p: p.get_task_lists()),
+        ("add_task_list", lambda p: p.add_task_list({"id": "list_3", "name": "Misc", "icon": "", "list_type": ""})),
+        ("get_daily_tasks", lambda p: p.get_daily_tasks()),
+        ("get_daily_task", lambda p: p.get_daily_task("task_1")),
+        ("add_daily_task", lambda p: p.add_daily_task(
+            {"id": "task_new", "content": "New", "status": "todo", "date": str(today), "color": None,
+             "created_at": str(today), "note": "", "list_id": "list_3"})),
+        ("update_daily_task", lambda p: p.update_daily_task(
+            {"id": "task_new", "content": "New 2", "status": "done", "date": str(today), "color": "#fff",
+             "created_at": str(today), "note": "n", "list_id": "list_3"})),
+        ("get_daily_task", lambda p: p.get_daily_task("task_new")),
+        ("delete_daily_task", lambda p: p.delete_daily_task("task_2")),
+        ("delete_task_list", lambda p: p.delete_task_list("list_3")),
+        ("get_task_history", lambda p: p.get_task_history()),
+        ("restore_overdue_tasks", lambda p: p.restore_overdue_tasks(str(today))),
+        ("clear_task_history", lambda p: p.clear_task_history(str(today))),
+        ("get_daily_tasks", lambda p: p.get_daily_tasks()),
+        ("get_task_lists", lambda p: p.get_task_lists()),
+
+        ("get_blocked_dates", lambda p: p.get_blocked_dates()),
+        ("add_blocked_date", lambda p: p.add_blocked_date(str(today + timedelta(days=3)))),
+        ("add_blocked_date", lambda p: p.add_blocked_date(str(today + timedelta(days=3)))),
+        ("remove_blocked_date", lambda p: p.remove_blocked_date(str(today))),
+        ("get_blocked_dates", lambda p: p.get_blocked_dates()),
+        ("get_achievements", lambda p: p.get_achievements()),
+        ("add_achievement", lambda p: p.add_achievement("ach_new")),
+        ("add_achievement", lambda p: p.add_achievement("ach_new")),
+        ("get_achievements", lambda p: p.get_achievements()),
+
+        ("get_semesters", lambda p: p.get_semesters()),
+        ("add_semester", lambda p: p.add_semester({"id": "sem_3", "name": "Extra", "start_date": str(today),
+                                                   "end_date": str(today + timedelta(days=30)),
+                                                   "is_current": False})),
+        ("update_semester", lambda p: p.update_semester({"id": "sem_3", "name": "Extra 2", "start_date": str(today),
+                                                         "end_date": str(today + timedelta(days=60)),
+                                                         "is_current": True})),
+        ("get_subjects", lambda p: p.get_subjects("sem_1")),
+        ("get_subject", lambda p: p.get_subject("subj_1")),
+        ("add_subject", lambda p: p.add_subject({"id": "subj_new", "semester_id": "sem_3", "name": "New subject",
+                                                 "short_name": "NS", "color": "#000000", "weight": 2.0,
+                                                 "start_datetime": None, "end_datetime": None})),
+        ("update_subject", lambda p: p.update_subject({"id": "subj_new", "semester_id": "sem_3",
+                                                       "name": "New subject 2", "short_name": "NS2",
+                                                       "color": "#111111", "weight": 3.0,
+                                                       "start_datetime": None, "end_datetime": None})),
+        ("get_subject", lambda p: p.get_subject("subj_new")),
+
+        ("get_schedule", lambda p: p.get_schedule()),
+        ("get_schedule_entries_by_subject", lambda p: p.get_schedule_entries_by_subject("subj_2")),
+        ("add_schedule_entry", lambda p: p.add_schedule_entry(
+            {"id": "entry_new", "subject_id": "subj_new", "day_of_week": 1, "start_time": "12:00",
+             "end_time": "13:00", "room": "A1", "type": "lab", "period_start": None, "period_end": None})),
+        ("add_schedule_cancellation", lambda p: p.add_schedule_cancellation("entry_new", str(today))),
+        ("add_schedule_cancellation", lambda p: p.add_schedule_cancellation("entry_1", str(today))),
+        ("get_schedule_cancellations", lambda p: p.get_schedule_cancellations()),
+        ("delete_schedule_entry", lambda p: p.delete_schedule_entry("entry_1")),
+        ("get_schedule_cancellations", lambda p: p.get_schedule_cancellations()),
+
+        ("get_grades", lambda p: p.get_grades()),
+        ("get_grades", lambda p: p.get_grades("subj_3")),
+        ("get_grade_modules", lambda p: p.get_grade_modules("subj_3")),
+        ("add_grade_module", lambda p: p.add_grade_module({"id": "mod_new", "subject_id": "subj_new",
+                                                           "name": "Exam", "weight": 60.0})),
+        ("update_grade_module", lambda p: p.update_grade_module({"id": "mod_new", "subject_id": "subj_new",
+                                                                 "name": "Final", "weight": 50.0})),
+        ("add_grade", lambda p: p.add_grade({"id": "grade_new", "subject_id": "subj_new", "module_id": "mod_new",
+                                             "value": 5.0, "weight": 2.0, "desc": "Final", "date": str(today)})),
+        ("delete_grade_module", lambda p: p.delete_grade_module("mod_3")),
+        ("delete_grade", lambda p: p.delete_grade("grade_4")),
+        ("get_grades", lambda p: p.get_grades()),
+
+        ("get_event_lists", lambda p: p.get_event_lists()),
+        ("add_event_list", lambda p: p.add_event_list({"id": "evl_2", "name": "Work", "color": "#2ecc71"})),
+        ("get_custom_events", lambda p: p.get_custom_events()),
+        ("add_custom_event", lambda p: p.add_custom_event(
+            {"id": "ev_2", "list_id": "evl_2", "title": "Shift", "is_recurring": False, "date": str(today),
+             "day_of_week": None, "start_time": "09:00", "end_time": "17:00", "start_date": None,
+             "end_date": None, "color": "#2ecc71"})),
+        ("delete_event_list", lambda p: p.delete_event_list("evl_2")),
+        ("delete_custom_event", lambda p: p.delete_custom_event("ev_1")),
+        ("get_custom_events", lambda p: p.get_custom_events()),
+
+        ("get_subscriptions", lambda p: p.get_subscriptions()),
+        ("add_subscription", lambda p: p.add_subscription(
+            {"id": "subs_2", "subject_id": None, "name": "Cloud", "provider": "X", "expiry_date": "",
+             "cost": 5.0, "currency": "EUR", "billing_cycle": "monthly", "note": "", "is_active": True,
+             "billing_date": ""})),
+        ("update_subscription", lambda p: p.update_subscription(
+            {"id": "subs_2", "subject_id": "subj_2", "name": "Cloud", "provider": "X",
+             "expiry_date": str(today + timedelta(days=30)), "cost": 6.0, "currency": "EUR",
+             "billing_cycle": "monthly", "note": "up", "is_active": False, "billing_date": str(today)})),
+        ("get_subscription", lambda p: p.get_subscription("subs_2")),
+        ("delete_subscription", lambda p: p.delete_subscription("subs_1")),
+
+        # Kaskady: przedmiot (egzaminy SET NULL, plan/oceny/moduły CASCADE), semestr (przedmioty CASCADE)
+        ("delete_subject", lambda p: p.delete_subject("subj_2")),
+        ("delete_semester", lambda p: p.delete_semester("sem_3")),
+        ("get_subjects", lambda p: p.get_subjects()),
+        ("get_exams", lambda p: p.get_exams()),
+        ("get_schedule", lambda p: p.get_schedule()),
+        ("get_grades", lambda p: p.get_grades()),
+        ("get_subscriptions", lambda p: p.get_subscriptions()),
+        ("get_semesters", lambda p: p.get_semesters()),
+    ]
+
+
+# --- PORÓWNANIE ---
+def normalize(value):
+    # Kolejność wierszy nie jest częścią kontraktu (Postgres bez ORDER BY), liczby jak REAL w SQLite,
+    # bool i 0/1 są rozróżniane (json: true != 1)
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items() if k not in CLOUD_ONLY_COLUMNS}
+    if isinstance(value, (list, tuple)):
+        return sorted((normalize(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True))
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str) and GENERATED_ID.match(value):
+        return "<generated>"
+    return value
+
+
+def describe_difference(expected, actual, path="wynik"):
+    if type(expected) is not type(actual):
+        return f"{path}: {expected!r} != {actual!r}"
+    if isinstance(expected, dict):
+        for k in sorted(set(expected) | set(actual)):
+            if k not in actual or k not in expected:
+                return f"{path}: klucz '{k}' tylko w {'wzorcu' if k in expected else 'wyniku'}"
+            if expected[k] != actual[k]:
+                return describe_difference(expected[k], actual[k], f"{path}.{k}")
+    if isinstance(expected, list):
+        if len(expected) != len(actual):
+            return f"{path}: {len(expected)} elementów != {len(actual)}"
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            if e != a:
+                return describe_difference(e, a, f"{path}[{i}]")
+    return f"{path}: {expected!r} != {actual!r}"
+
+
+def check_history_order(result):
+    dates = [t["date"] or "" for t in result]
+    return dates == sorted(dates, reverse=True)
+
+
+# --- PRZEBIEG DLA JEDNEGO ROZMIARU ---
+def run_size(size, tmp_dir, providers):
+    topics = SIZES[size]
+    steps = scenario(topics)
+    results = {}
+    metrics = {}
+    for name in providers:
+        provider, queries, cleanup = make_provider(name, tmp_dir, size)
+        try:
+            seed(provider, topics)
+            outputs, per_method = [], {}
+            for method, call in steps:
+                before = queries()
+                start = time.perf_counter()
+                out = call(provider)
+                seconds = time.perf_counter() - start
+                m = per_method.setdefault(method, {"seconds": 0.0, "queries": 0, "calls": 0})
+                m["seconds"] += seconds
+                m["queries"] += queries() - before
+                m["calls"] += 1
+                if method == "get_task_history" and not check_history_order(out):
+                    outputs.append("ZŁA KOLEJNOŚĆ (ORDER BY date DESC)")
+                else:
+                    outputs.append(normalize(out))
+            for m in per_method.values():
+                m["seconds"] = round(m["seconds"], 6)
+            results[name] = outputs
+            metrics[name] = per_method
+        finally:
+            cleanup()
+
+    mismatches = []
+    reference = results[providers[0]]
+    for name in providers[1:]:
+        for (method, _), expected, actual in zip(steps, reference, results[name]):
+            if expected != actual:
+                mismatches.append(f"{size}/{name}/{method}: {describe_difference(expected, actual)}")
+    return metrics, mismatches
+
+
+# --- POKRYCIE INTERFEJSU ---
+def uncovered_methods():
+    covered = {method for method, _ in scenario(10)}
+    return sorted((set(BaseProvider.__abstractmethods__) | set(EXTRA_METHODS)) - covered)
+
+
+# --- PORÓWNANIE Z WYNIKAMI BAZOWYMI ---
+def check_baseline(results, baseline, tolerance):
+    regressions = []
+    for size, by_provider in results["sizes"].items():
+        for provider, methods in by_provider.items():
+            base_methods = baseline.get("sizes", {}).get(size, {}).get(provider, {})
+            for method, m in methods.items():
+                base = base_methods.get(method)
+                if not base:
+                    continue
+                # Czas z tolerancją (szum pomiaru), liczba zapytań musi się zgadzać co do sztuki
+                if m["seconds"] > base["seconds"] * tolerance and m["seconds"] - base["seconds"] > 0.005:
+                    regressions.append(f"{size}/{provider}/{method}: czas {m['seconds']:.4f}s > "
+                                       f"{base['seconds']:.4f}s x {tolerance}")
+                if m["queries"] > base["queries"]:
+                    regressions.append(f"{size}/{provider}/{method}: zapytania {m['queries']} > {base['queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zgodność i wydajność dostawców danych (BaseProvider)")
+    parser.add_argument("--sizes", default=",".join(SIZES), help=f"rozmiary oddzielone przecinkami ({', '.join(SIZES)})")
+    parser.add_argument("--providers", default=",".join(PROVIDERS),
+                        help=f"dostawcy oddzieleni przecinkami, pierwszy jest wzorcem ({', '.join(PROVIDERS)})")
+    parser.add_argument("--output", help="plik wynikowy JSON (bez tej opcji wyniki nie są zapisywane)")
+    parser.add_argument("--baseline", help="plik JSON z poprzedniego uruchomienia do porównania")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="dopuszczalny mnożnik czasu")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    providers = [p.strip() for p in args.providers.split(",") if p.strip()]
+    unknown = [s for s in sizes if s not in SIZES] + [p for p in providers if p not in PROVIDERS]
+    if unknown:
+        parser.error(f"nieznane rozmiary / dostawcy: {', '.join(unknown)}")
+
+    missing = uncovered_methods()
+    for method in missing:
+        print(f"[BRAK POKRYCIA] {method} nie występuje w scenariuszu")
+
+    results = {"python": platform.python_version(), "platform": platform.platform(), "sizes": {}}
+    mismatches = []
+    with tempfile.TemporaryDirectory(prefix="splanner_conformance_") as tmp_dir:
+        for size in sizes:
+            metrics, size_mismatches = run_size(size, tmp_dir, providers)
+            results["sizes"][size] = metrics
+            mismatches += size_mismatches
+            print(f"[{size}] {SIZES[size]} tematów" + "".join(f"{p:>24}" for p in providers))
+            for method in sorted(metrics[providers[0]]):
+                cells = "".join(f"{metrics[p][method]['seconds'] * 1000:>14.2f} ms {metrics[p][method]['queries']:>5} q"
+                                for p in providers)
+                print(f"    {method:<32}{cells}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Zapisano wyniki: {args.output}")
+
+    for line in mismatches:
+        print(f"[NIEZGODNOŚĆ] {line}")
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = check_baseline(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"[REGRESJA] {line}")
+    if missing or mismatches or regressions:
+        return 1
+    print(f"Wszyscy dostawcy zgodni z {providers[0]}" + (", brak regresji." if args.baseline else "."))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
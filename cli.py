@@ -1,107 +1,355 @@
+import argparse
+import json
+import os
+import re
+import sys
 import uuid
-from core.storage import load, save
-from core.planner import plan
 from datetime import date, timedelta
 
-# terminalowa podstawowa wersja aplikacji zawierająca podstawowe funkcje
-# dodawanie egzaminu
-# planowanie kalendarza
-# oznaczanie tematu jako wykonany
-# wyswietlanie planu na najblizszy tydzień
+# Wersja konsolowa bez GUI: tylko SQLite + planer (szybki start, nadaje się do crona i potoków powłoki).
+# Nie używamy core.storage.manager ani load_config() - żadnego zapisu schema.sql / config.json i żadnej chmury.
+from core.storage import StorageManager, DB_PATH
+from core.planner import compute_plan, commit_plan, date_format
+
+# Tryb wyłącznie lokalny: StorageManager nie tworzy klienta Supabase
+CLI_CONFIG = {"db_mode": "local"}
+
+
+class CliError(Exception):
+    pass
 
 
 # funkcja nadająca id za pomocą uuid
 def new_id(prefix):
     return f"{prefix}_{uuid.uuid4().hex[:8]}"
 
-# funkcja dodawania egzaminu razem z tematami
-def cmd_add(data):
-    subject = input("Przedmiot: ")
-    title = input("Forma: ")
-    date = input("Data (YYYY-MM-DD): ")
 
-    print("Tematy (pusta linia konczy):")
+def open_storage(db_path):
+    # Migracja starego storage.json tylko dla domyślnej bazy aplikacji
+    return StorageManager(db_path, config=CLI_CONFIG, migrate_legacy_json=(str(db_path) == str(DB_PATH)))
+
+
+def parse_day(text):
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{text}' (expected YYYY-MM-DD)")
+
+
+# --- WEJŚCIE: TEMATY HURTOWO ---
+#   Tematy z --topic oraz z pliku / stdin (--topics-file -), jeden na linię, bez numeracji "1. "
+def collect_topics(args):
+    lines = list(args.topic or [])
+    if args.topics_file:
+        if args.topics_file == "-":
+            lines += sys.stdin.read().splitlines()
+        else:
+            with open(args.topics_file, encoding="utf-8") as f:
+                lines += f.read().splitlines()
     topics = []
-    while True:
-        t = input("> ")
-        if not t:
-            break
-        topics.append(t)
+    for line in lines:
+        clean = re.sub(r"^\d+\.\s*", "", line.strip())
+        if clean:
+            topics.append(clean)
+    return topics
+
+
+def add_topics(storage, exam_id, names):
+    ids = []
+    for name in names:
+        topic = {
+            "id": new_id("topic"), "exam_id": exam_id, "name": name,
+            "status": "todo", "scheduled_date": None, "locked": False, "note": ""
+        }
+        storage.add_topic(topic)
+        ids.append(topic["id"])
+    return ids
+
+
+#   Przedmiot po nazwie, a jeśli go nie ma - nowy w bieżącym semestrze (jak w oknie dodawania egzaminu)
+def ensure_subject(storage, name):
+    for sub in storage.get_subjects(None):
+        if sub["name"] == name:
+            return sub["id"]
+
+    semesters = storage.get_semesters()
+    current = [s for s in semesters if s["is_current"]]
+    if current:
+        semester_id = current[0]["id"]
+    elif semesters:
+        semester_id = semesters[0]["id"]
+    else:
+        semester_id = new_id("sem")
+        storage.add_semester({
+            "id": semester_id, "name": "Default Semester", "start_date": str(date.today()),
+            "end_date": str(date.today() + timedelta(days=180)), "is_current": 1
+        })
+    subject_id = new_id("sub")
+    storage.add_subject({
+        "id": subject_id, "semester_id": semester_id, "name": name,
+        "short_name": name[:3].upper(), "color": "#3498db", "weight": 1.0
+    })
+    return subject_id
 
+
+# --- KOMENDY ---
+# Każda komenda zwraca (dane dla --format json, wiersze tabeli, kolumny tabeli)
+
+def cmd_add_exam(storage, args):
+    topics = collect_topics(args)
+    subject_id = ensure_subject(storage, args.subject)
     exam_id = new_id("exam")
-    data["exams"].append({
-        "id": exam_id,
-        "subject": subject,
-        "title": title,
-        "date": date
+    storage.add_exam({
+        "id": exam_id, "subject_id": subject_id, "subject": args.subject, "title": args.title,
+        "date": str(args.date), "time": args.time or "", "note": "",
+        "ignore_barrier": args.ignore_barrier, "color": None
     })
-    for name in topics:
-        data["topics"].append({
-            "id": new_id("topic"),
-            "exam_id": exam_id,
-            "name": name,
-            "status": "todo",
-            "scheduled_date": None
-        })
+    stats = storage.get_global_stats()
+    storage.update_global_stat("exams_added", stats.get("exams_added", 0) + 1)
+
+    topic_ids = add_topics(storage, exam_id, topics)
+    data = {"exam_id": exam_id, "subject": args.subject, "title": args.title, "date": str(args.date),
+            "topics_added": len(topic_ids), "topic_ids": topic_ids}
+    return data, [data], ["exam_id", "subject", "title", "date", "topics_added"]
+
+
+def cmd_add_topics(storage, args):
+    if not storage.get_exam(args.exam_id):
+        raise CliError(f"exam not found: {args.exam_id}")
+    topics = collect_topics(args)
+    if not topics:
+        raise CliError("no topics given (use --topic or --topics-file)")
+    topic_ids = add_topics(storage, args.exam_id, topics)
+    data = {"exam_id": args.exam_id, "topics_added": len(topic_ids), "topic_ids": topic_ids}
+    return data, [{"exam_id": args.exam_id, "topic_id": t_id, "name": name}
+                  for t_id, name in zip(topic_ids, topics)], ["exam_id", "topic_id", "name"]
+
 
-# funkcja wyswietlajaca plan na najblizszy tydzien
-def cmd_week(data):
+def cmd_exams(storage, args):
     today = date.today()
-    print("\nPLAN NA NAJBLIŻSZY TYDZIEN:")
-
-    for i in range(7):
-        day = today + timedelta(days=i)
-        day_str = day.isoformat()
-        print(f"\n{day}")
-        found = False
-        for exam in data["exams"]:
-            if exam["date"] == day_str:
-                print(f" * {exam["title"].upper()} | {exam["subject"]}")
-        for topic in data["topics"]:
-            if topic["status"] == "todo" and topic["scheduled_date"] == day_str:
-                for exam in data["exams"]:
-                    if exam["id"] == topic["exam_id"]:
-                        print(f" -{topic["id"]} {exam["subject"]} - {topic["name"]}")
-                        found = True
-                        break
-        if not found:
-            print("   brak")
-
-#funkcja oznaczajaca temat jako wykonany
-def cmd_done(data, t_id):
-    for topic in data["topics"]:
-        if topic["id"] == t_id:
+    counts = {}
+    for topic in storage.get_topics():
+        c = counts.setdefault(topic["exam_id"], [0, 0])
+        c[0] += 1
+        if topic["status"] == "done":
+            c[1] += 1
+
+    rows = []
+    for exam in sorted(storage.get_exams(), key=lambda e: str(e["date"])):
+        if not args.all and date_format(exam["date"]) < today:
+            continue
+        total, done = counts.get(exam["id"], (0, 0))
+        rows.append({"exam_id": exam["id"], "date": exam["date"], "subject": exam["subject"],
+                     "title": exam["title"], "topics": total, "done": done})
+    return rows, rows, ["exam_id", "date", "subject", "title", "topics", "done"]
+
+
+def cmd_plan(storage, args):
+    result = compute_plan(storage, only_unscheduled=args.only_unscheduled, mode=args.mode)
+    if not args.dry_run:
+        commit_plan(storage, result)
+
+    exams = {e["id"]: e for e in storage.get_exams()}
+    infeasible = [{"exam_id": e_id, "subject": exams[e_id]["subject"], "title": exams[e_id]["title"],
+                   "unplaced": count}
+                  for e_id, count in result.infeasible.items() if e_id in exams]
+    data = {
+        "mode": result.mode,
+        "dry_run": args.dry_run,
+        "assigned": sum(len(ids) for ids in result.assignments.values()),
+        "changed": result.moved_count,
+        "days": len(result.assignments),
+        "infeasible": infeasible
+    }
+    row = {k: data[k] for k in ("mode", "assigned", "changed", "days")}
+    row["infeasible"] = len(infeasible)
+    return data, [row], ["mode", "assigned", "changed", "days", "infeasible"]
+
+
+# funkcja wyswietlajaca plan na najblizsze dni (domyślnie tydzień)
+def cmd_week(storage, args):
+    first = args.start or date.today()
+    days = [str(first + timedelta(days=i)) for i in range(args.days)]
+    day_set = set(days)
+    exams = {e["id"]: e for e in storage.get_exams()}
+    blocked = set(storage.get_blocked_dates())
+
+    plan_days = {d: {"date": d, "blocked": d in blocked, "exams": [], "topics": []} for d in days}
+    for exam in exams.values():
+        if str(exam["date"]) in day_set:
+            plan_days[str(exam["date"])]["exams"].append(
+                {"exam_id": exam["id"], "subject": exam["subject"], "title": exam["title"]})
+    for topic in storage.get_topics():
+        day = topic.get("scheduled_date")
+        if day in day_set and topic["status"] == "todo":
+            exam = exams.get(topic["exam_id"])
+            plan_days[day]["topics"].append({"topic_id": topic["id"], "subject": exam["subject"] if exam else "",
+                                             "name": topic["name"]})
+
+    data = [plan_days[d] for d in days]
+    rows = []
+    for day in data:
+        for exam in day["exams"]:
+            rows.append({"date": day["date"], "type": "EXAM", "id": exam["exam_id"], "subject": exam["subject"],
+                         "name": exam["title"]})
+        for topic in day["topics"]:
+            rows.append({"date": day["date"], "type": "topic", "id": topic["topic_id"], "subject": topic["subject"],
+                         "name": topic["name"]})
+        if not day["exams"] and not day["topics"]:
+            rows.append({"date": day["date"], "type": "blocked" if day["blocked"] else "-", "id": "", "subject": "",
+                         "name": ""})
+    return data, rows, ["date", "type", "id", "subject", "name"]
+
+
+#funkcja oznaczajaca tematy jako wykonane
+def cmd_done(storage, args):
+    done, missing = [], []
+    for t_id in args.topic_ids:
+        topic = storage.get_topic(t_id)
+        if not topic:
+            missing.append(t_id)
+            continue
+        if topic["status"] != "done":
             topic["status"] = "done"
+            storage.update_topic(topic)
+            done.append(t_id)
 
-# glowna funkcja z petla programu
-def main():
-    while True:
-        data = load()
-
-        print("PLANER NAUKI - CLI")
-        print("1 - Dodaj egzamin")
-        print("2 - Zaplanuj")
-        print("3 - Pokaz tydzien")
-        print("4 - Oznacz jako zrobione")
-        print("X - Wyjscie")
-        choice = input("> ")
-
-        if choice == "1":
-            cmd_add(data)
-        elif choice == "2":
-            plan(data)
-            print("planowanie zakonczone")
-        elif choice == "3":
-            cmd_week(data)
-        elif choice == "4":
-            t_id = input("ID: ")
-            cmd_done(data, t_id)
-        elif choice == "X":
-            break
-        else:
-            print("Niepoprawna opcja")
+    if done:
+        stats = storage.get_global_stats()
+        storage.update_global_stat("topics_done", stats.get("topics_done", 0) + len(done))
+        storage.update_global_stat("activity_started", True)
+    if missing:
+        raise CliError(f"topic not found: {', '.join(missing)}")
+    data = {"done": done}
+    return data, [{"topic_id": t_id} for t_id in done], ["topic_id"]
+
+
+# Zaległe: termin minął, temat nadal "todo", a egzamin jeszcze się nie odbył (jak w oknie planu)
+def cmd_overdue(storage, args):
+    today = date.today()
+    exams = {e["id"]: e for e in storage.get_exams() if date_format(e["date"]) >= today}
+    rows = []
+    for topic in storage.get_topics():
+        if (topic["status"] == "todo" and topic.get("scheduled_date") and topic["exam_id"] in exams
+                and date_format(topic["scheduled_date"]) < today):
+            exam = exams[topic["exam_id"]]
+            rows.append({"topic_id": topic["id"], "scheduled_date": topic["scheduled_date"],
+                         "subject": exam["subject"], "exam_date": exam["date"], "name": topic["name"]})
+    rows.sort(key=lambda r: (r["scheduled_date"], r["subject"]))
+    return rows, rows, ["topic_id", "scheduled_date", "subject", "exam_date", "name"]
+
+
+# --- WYJŚCIE ---
+def format_table(rows, columns):
+    if not rows:
+        return "(no results)"
+    cells = [[str(r.get(c, "") if r.get(c) is not None else "") for c in columns] for r in rows]
+    widths = [max(len(c), *(len(row[i]) for row in cells)) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.upper().ljust(w) for c, w in zip(columns, widths)).rstrip()]
+    for row in cells:
+        lines.append("  ".join(v.ljust(w) for v, w in zip(row, widths)).rstrip())
+    return "\n".join(lines)
+
+
+def add_topic_source(parser):
+    parser.add_argument("--topic", action="append", help="topic name (repeatable)")
+    parser.add_argument("--topics-file", help="file with one topic per line ('-' reads stdin)")
+
+
+def add_common(parser, defaults):
+    parser.add_argument("--db", default=str(DB_PATH) if defaults else argparse.SUPPRESS,
+                        help="database file (default: the application's storage.db)")
+    parser.add_argument("--format", choices=["table", "json"], default="table" if defaults else argparse.SUPPRESS,
+                        help="output format")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="SPlanner - command line interface (no GUI).")
+    add_common(parser, defaults=True)
+    # --db / --format działają też po nazwie komendy (np. "cli.py week --format json")
+    common = argparse.ArgumentParser(add_help=False)
+    add_common(common, defaults=False)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("add-exam", parents=[common], help="add an exam with its topics")
+    p.add_argument("subject")
+    p.add_argument("title")
+    p.add_argument("date", type=parse_day, help="YYYY-MM-DD")
+    p.add_argument("--time", help="HH:MM")
+    p.add_argument("--ignore-barrier", action="store_true", help="do not treat this exam as a planning barrier")
+    add_topic_source(p)
+    p.set_defaults(func=cmd_add_exam)
+
+    p = sub.add_parser("add-topics", parents=[common], help="add topics to an existing exam")
+    p.add_argument("exam_id")
+    add_topic_source(p)
+    p.set_defaults(func=cmd_add_topics)
+
+    p = sub.add_parser("exams", parents=[common], help="list exams")
+    p.add_argument("--all", action="store_true", help="include past exams")
+    p.set_defaults(func=cmd_exams)
+
+    p = sub.add_parser("plan", parents=[common], help="generate the study plan")
+    p.add_argument("--only-unscheduled", action="store_true", help="only plan topics without a date")
+    p.add_argument("--mode", choices=["default", "capacity", "effort"], default=None,
+                   help="planner mode (default: the planner_mode setting)")
+    p.add_argument("--dry-run", action="store_true", help="compute the plan without saving it")
+    p.set_defaults(func=cmd_plan)
+
+    p = sub.add_parser("week", parents=[common], help="show the plan for the next days")
+    p.add_argument("--days", type=int, default=7, help="number of days (default: 7)")
+    p.add_argument("--from", dest="start", type=parse_day, help="first day (default: today)")
+    p.set_defaults(func=cmd_week)
+
+    p = sub.add_parser("done", parents=[common], help="mark topics as done")
+    p.add_argument("topic_ids", nargs="+")
+    p.set_defaults(func=cmd_done)
+
+    p = sub.add_parser("overdue", parents=[common], help="list overdue topics")
+    p.set_defaults(func=cmd_overdue)
+
+    # Planowanie wielu baz naraz (core.batch) - własne ścieżki, więc bez otwierania --db
+    from core import batch
+    p = sub.add_parser("batch", help="plan many databases in parallel")
+    batch.build_parser(p)
+    p.set_defaults(func=None)
+    return parser
+
+
+# glowna funkcja programu
+def run(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.func is None:
+        from core import batch
+        return batch.run_from_args(args)
+
+    storage = open_storage(args.db)
+    try:
+        data, rows, columns = args.func(storage, args)
+    except CliError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        storage.close()
+
+    if args.format == "json":
+        print(json.dumps(data, indent=2, ensure_ascii=False, default=str))
+    else:
+        print(format_table(rows, columns))
+    sys.stdout.flush()
+    return 0
+
+
+def main(argv=None):
+    try:
+        return run(argv)
+    except BrokenPipeError:
+        # Odbiorca wyjścia zamknął potok (np. "| head") - stdout na devnull, żeby zamknięcie
+        # interpretera nie wypisało drugiego błędu przy opróżnianiu bufora
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
 
-        save(data)
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
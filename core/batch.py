@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Bez GUI: tylko SQLite i planer (żadnego tkinter / customtkinter), żeby start na serwerze był szybki
+from core.storage import SQLiteProvider
+from core.planner import compute_plan, commit_plan
+
+
+#   PLANOWANIE JEDNEJ BAZY (uruchamiane w procesie roboczym, osobny SQLiteProvider na bazę)
+def plan_database(path, only_unscheduled=False, mode=None, dry_run=False):
+    start = time.perf_counter()
+    report = {"path": str(path), "ok": False}
+    if not os.path.isfile(path):
+        # SQLiteProvider założyłby pustą bazę - brakujący plik to błąd, nie nowy profil
+        report["error"] = "file not found"
+        report["seconds"] = 0.0
+        return report
+
+    try:
+        provider = SQLiteProvider(path, migrate_legacy_json=False)
+        try:
+            result = compute_plan(provider, only_unscheduled=only_unscheduled, mode=mode)
+            if not dry_run:
+                commit_plan(provider, result)
+        finally:
+            provider.close()
+
+        report.update({
+            "ok": True,
+            "mode": result.mode,
+            "assigned": sum(len(ids) for ids in result.assignments.values()),
+            "changed": result.moved_count,
+            "days": len(result.assignments),
+            "infeasible_exams": len(result.infeasible)
+        })
+    except Exception as e:
+        report["error"] = str(e)
+    report["seconds"] = round(time.perf_counter() - start, 4)
+    return report
+
+
+#   PLANOWANIE WIELU BAZ W PULI PROCESÓW (wyniki w kolejności ścieżek wejściowych)
+def run_batch(paths, workers=None, only_unscheduled=False, mode=None, dry_run=False, progress=None):
+    results = [None] * len(paths)
+    if not paths:
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(plan_database, path, only_unscheduled, mode, dry_run): i
+                   for i, path in enumerate(paths)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                # Np. proces roboczy zabity przez system
+                results[i] = {"path": str(paths[i]), "ok": False, "error": str(e), "seconds": 0.0}
+            if progress:
+                progress(done, len(paths), results[i])
+    return results
+
+
+def summarize(results, wall_seconds):
+    ok = [r for r in results if r["ok"]]
+    return {
+        "databases": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "assigned": sum(r["assigned"] for r in ok),
+        "changed": sum(r["changed"] for r in ok),
+        "cpu_seconds": round(sum(r["seconds"] for r in results), 4),
+        "wall_seconds": round(wall_seconds, 4)
+    }
+
+
+def format_report(results, summary):
+    lines = [f"{'DATABASE':<50} {'STATUS':<8} {'TIME[s]':>8} {'ASSIGNED':>9} {'CHANGED':>8} {'INFEAS.':>8}"]
+    for r in results:
+        name = r["path"] if len(r["path"]) <= 50 else "..." + r["path"][-47:]
+        if r["ok"]:
+            lines.append(f"{name:<50} {'ok':<8} {r['seconds']:>8.3f} {r['assigned']:>9} {r['changed']:>8} "
+                         f"{r['infeasible_exams']:>8}")
+        else:
+            lines.append(f"{name:<50} {'error':<8} {r['seconds']:>8.3f}  {r['error']}")
+    lines.append("")
+    lines.append(f"{summary['succeeded']}/{summary['databases']} ok, {summary['assigned']} assigned, "
+                 f"{summary['changed']} changed, {summary['wall_seconds']:.2f}s wall / "
+                 f"{summary['cpu_seconds']:.2f}s total")
+    return "\n".join(lines)
+
+
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(prog="python -m core.batch",
+                                               description="Plan many SPlanner databases in parallel (no GUI).")
+    parser.add_argument("paths", nargs="+", help="storage.db files to plan")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--only-unscheduled", action="store_true", help="only plan topics without a date")
+    parser.add_argument("--mode", choices=["default", "capacity", "effort"], default=None,
+                        help="planner mode (default: each database's planner_mode setting)")
+    parser.add_argument("--dry-run", action="store_true", help="compute plans without writing them")
+    parser.add_argument("--report", help="also write the report as JSON to this file")
+    return parser
+
+
+def run_from_args(args):
+    start = time.perf_counter()
+    results = run_batch(args.paths, workers=args.workers, only_unscheduled=args.only_unscheduled,
+                        mode=args.mode, dry_run=args.dry_run)
+    summary = summarize(results, time.perf_counter() - start)
+    print(format_report(results, summary))
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "databases": results}, f, indent=2)
+    return 0 if summary["failed"] == 0 else 1
+
+
+def main(argv=None):
+    return run_from_args(build_parser().parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
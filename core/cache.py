@@ -0,0 +1,141 @@
+import threading
+from types import MappingProxyType
+
+# Wszystkie tabele, które StorageManager potrafi trzymać w cache
+CACHED_TABLES = (
+    "settings", "global_stats", "other_stats", "custom_sounds", "exams", "topics", "task_lists",
+    "daily_tasks", "blocked_dates", "achievements", "semesters", "subjects", "schedule_entries",
+    "schedule_cancellations", "grades", "event_lists", "custom_events", "subscriptions"
+)
+
+
+def _freeze(data):
+    # Migawka jest niemodyfikowalna: wiersze jako MappingProxyType, listy jako krotki
+    if isinstance(data, list):
+        return tuple(_freeze(item) for item in data)
+    if isinstance(data, dict):
+        return MappingProxyType({k: _freeze(v) if isinstance(v, (dict, list)) else v for k, v in data.items()})
+    return data
+
+
+def _thaw(snap):
+    # Każdy odczyt dostaje własną kopię, więc GUI może dowolnie modyfikować zwrócone słowniki
+    if isinstance(snap, tuple):
+        return [_thaw(item) for item in snap]
+    if isinstance(snap, MappingProxyType):
+        return {k: _thaw(v) if isinstance(v, (tuple, MappingProxyType)) else v for k, v in snap.items()}
+    return snap
+
+
+class EntityCache:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._snapshots = {}
+        self._versions = {}
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    def get(self, table, loader, where=None):
+        # loader() zwraca całą, zdekodowaną tabelę; where() filtruje wiersze bez kopiowania reszty
+        if not self.enabled:
+            data = loader()
+            return [r for r in data if where(r)] if where else data
+
+        with self._lock:
+            snap = self._snapshots.get(table)
+            if snap is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                version = self._versions.get(table, 0)
+
+        if snap is None:
+            snap = _freeze(loader())
+            with self._lock:
+                # Jeśli w trakcie odczytu ktoś zapisał do tabeli, nie zapisujemy nieaktualnej migawki
+                if self.enabled and self._versions.get(table, 0) == version:
+                    self._snapshots[table] = snap
+
+        if where:
+            return [_thaw(r) for r in snap if where(r)]
+        return _thaw(snap)
+
+    def get_frozen_many(self, tables, loader):
+        # Zwraca zamrożone migawki kilku tabel; brakujące ładuje JEDNYM wywołaniem loader(lista_tabel)
+        result = {}
+        with self._lock:
+            missing = [t for t in tables if not self.enabled or t not in self._snapshots]
+            if self.enabled:
+                for t in tables:
+                    if t not in missing: result[t] = self._snapshots[t]
+                self.hits += len(tables) - len(missing)
+                self.misses += len(missing)
+            versions = {t: self._versions.get(t, 0) for t in missing}
+
+        if missing:
+            loaded = loader(missing)
+            with self._lock:
+                for t in missing:
+                    result[t] = _freeze(loaded[t])
+                    if self.enabled and self._versions.get(t, 0) == versions[t]:
+                        self._snapshots[t] = result[t]
+        return result
+
+    def get_derived(self, key, tables, loader):
+        # Dane wyliczone z kilku tabel (np. wolny czas z planu zajęć): ważne, dopóki żadna z tabel się nie zmieni.
+        # Wartość jest współdzielona, więc loader powinien zwracać obiekt niemodyfikowalny.
+        with self._lock:
+            stamp = tuple(self._versions.get(t, 0) for t in tables)
+            entry = self._derived.get(key)
+            if entry is not None and entry[0] == stamp:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            if tuple(self._versions.get(t, 0) for t in tables) == stamp:
+                # Nieaktualne wpisy (stare wersje tabel) nie będą już trafione - usuwamy je przy okazji
+                self._derived = {k: v for k, v in self._derived.items()
+                                 if v[0] == tuple(self._versions.get(t, 0) for t in v[2])}
+                self._derived[key] = (stamp, value, tables)
+        return value
+
+    def versions(self, tables):
+        # Znacznik stanu tabel (rośnie przy każdym zapisie) - do wykrywania zmian między odczytem a zapisem
+        with self._lock:
+            return tuple(self._versions.get(t, 0) for t in tables)
+
+    def invalidate(self, *tables):
+        with self._lock:
+            for table in tables:
+                self._snapshots.pop(table, None)
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def invalidate_all(self):
+        self.invalidate(*CACHED_TABLES)
+        with self._lock:
+            self._derived.clear()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self.invalidate_all()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+                "cached_tables": sorted(self._snapshots)
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,125 @@
+from datetime import date, datetime, timedelta
+from types import MappingProxyType
+
+# Domyślne okno nauki w ciągu dnia (nadpisywane ustawieniami study_day_start / study_day_end)
+DEFAULT_STUDY_START = "08:00"
+DEFAULT_STUDY_END = "22:00"
+
+# Tabele, od których zależy wolny czas - zapis do którejkolwiek unieważnia wyliczenie
+CAPACITY_TABLES = ("schedule_entries", "schedule_cancellations", "custom_events", "subjects", "settings")
+
+
+#   "HH:MM" -> minuty od północy (None przy błędnym formacie)
+def _minutes(text):
+    try:
+        h, m = map(int, str(text).split(":")[:2])
+    except (ValueError, TypeError):
+        return None
+    return h * 60 + m
+
+
+#   "YYYY-MM-DD[ HH:MM]" -> "YYYY-MM-DD" (None, jeśli brak / błąd)
+def _day_part(text):
+    if not text:
+        return None
+    day = str(text).split()[0]
+    try:
+        datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        return None
+    return day
+
+
+#   SCALANIE PRZEDZIAŁÓW: posortowane, nakładające się / stykające się łączone w jeden
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _study_window(settings):
+    start = _minutes(settings.get("study_day_start", DEFAULT_STUDY_START))
+    end = _minutes(settings.get("study_day_end", DEFAULT_STUDY_END))
+    if start is None or end is None or end <= start:
+        start, end = _minutes(DEFAULT_STUDY_START), _minutes(DEFAULT_STUDY_END)
+    return start, end
+
+
+#   WOLNE MINUTY NAUKI DLA KAŻDEGO DNIA [first, last] (ordinale): {ordinal: minuty}
+def compute_free_minutes(storage, first, last):
+    win_start, win_end = _study_window(storage.get_settings())
+    subjects = {s["id"]: s for s in storage.get_subjects(None)}
+    cancellations = {(c["entry_id"], c["date"]) for c in storage.get_schedule_cancellations()}
+
+    # Zajęcia cykliczne pogrupowane po dniu tygodnia (0 = poniedziałek), z zakresem ważności
+    recurring = [[] for _ in range(7)]
+    for entry in storage.get_schedule():
+        subject = subjects.get(entry.get("subject_id"))
+        start, end = _minutes(entry.get("start_time")), _minutes(entry.get("end_time"))
+        day_idx = entry.get("day_of_week")
+        if not subject or start is None or end is None or day_idx is None or not 0 <= day_idx <= 6:
+            continue
+        # Zakres: daty przedmiotu zawężone okresem wpisu (jeśli ustawiony)
+        lo = max(filter(None, (_day_part(subject.get("start_datetime")), _day_part(entry.get("period_start")))),
+                 default=None)
+        hi = min(filter(None, (_day_part(subject.get("end_datetime")), _day_part(entry.get("period_end")))),
+                 default=None)
+        recurring[day_idx].append((entry["id"], lo, hi, start, end))
+
+    # Wydarzenia własne: cykliczne (dzień tygodnia + zakres) i jedno/wielodniowe (rozwinięte na dni)
+    one_off = {}
+    first_day, last_day = str(date.fromordinal(first)), str(date.fromordinal(last))
+    for ev in storage.get_custom_events():
+        start, end = _minutes(ev.get("start_time")), _minutes(ev.get("end_time"))
+        if start is None or end is None:
+            continue
+        if ev.get("is_recurring"):
+            day_idx = ev.get("day_of_week")
+            if day_idx is not None and 0 <= day_idx <= 6:
+                recurring[day_idx].append((None, _day_part(ev.get("start_date")), _day_part(ev.get("end_date")),
+                                           start, end))
+            continue
+        s_day = _day_part(ev.get("date") or ev.get("start_date"))
+        e_day = _day_part(ev.get("end_date")) or s_day
+        if not s_day or e_day < first_day or s_day > last_day:
+            continue
+        curr = max(date.fromisoformat(s_day), date.fromordinal(first))
+        stop = min(date.fromisoformat(e_day), date.fromordinal(last))
+        while curr <= stop:
+            one_off.setdefault(curr.toordinal(), []).append((start, end))
+            curr += timedelta(days=1)
+
+    window = win_end - win_start
+    free = {}
+    for ordinal in range(first, last + 1):
+        day = date.fromordinal(ordinal)
+        day_str = str(day)
+        intervals = list(one_off.get(ordinal, ()))
+        for entry_id, lo, hi, start, end in recurring[day.weekday()]:
+            if (lo and day_str < lo) or (hi and day_str > hi):
+                continue
+            if entry_id and (entry_id, day_str) in cancellations:
+                continue
+            intervals.append((start, end))
+
+        # Przycinamy do okna nauki i liczymy sumę zajętego czasu po scaleniu
+        clipped = [(max(s, win_start), min(e, win_end)) for s, e in intervals if s < win_end and e > win_start]
+        busy = sum(e - s for s, e in merge_intervals(clipped))
+        free[ordinal] = window - busy
+    return MappingProxyType(free)
+
+
+#   WOLNE MINUTY Z CACHE: liczone raz dla horyzontu, ważne do zmiany planu zajęć / wydarzeń / ustawień
+def get_free_minutes(storage, first, last):
+    if last < first:
+        return MappingProxyType({})
+    cache = getattr(storage, "cache", None)
+    if cache is None:
+        return compute_free_minutes(storage, first, last)
+    return cache.get_derived(("free_minutes", first, last), CAPACITY_TABLES,
+                             lambda: compute_free_minutes(storage, first, last))
@@ -0,0 +1,699 @@
+import datetime
+import json
+import sqlite3
+import threading
+import uuid
+
+from core.storage import (BaseProvider, DEFAULT_DATA, DEFAULT_SOUNDS, SYNC_TABLES, SYNC_JSON_COLUMNS,
+                          SYNC_MERGE_ONLY, SYNC_TOMBSTONES, cancellation_id)
+
+# Kolumny tabel w kolejności jak w SQLiteProvider (SELECT * zwraca te same klucze)
+COLUMNS = {
+    "settings": ("key", "value"),
+    "global_stats": ("key", "value"),
+    "stats": ("key", "value"),
+    "achievements": ("achievement_id", "date_earned"),
+    "blocked_dates": ("date",),
+    "custom_sounds": ("id", "name", "steps_json"),
+    "semesters": ("id", "name", "start_date", "end_date", "is_current"),
+    "subjects": ("id", "semester_id", "name", "short_name", "color", "weight", "start_datetime", "end_datetime"),
+    "subscriptions": ("id", "subject_id", "name", "provider", "expiry_date", "cost", "currency", "billing_cycle",
+                      "note", "is_active", "billing_date"),
+    "event_lists": ("id", "name", "color"),
+    "custom_events": ("id", "list_id", "title", "is_recurring", "date", "day_of_week", "start_time", "end_time",
+                      "start_date", "end_date", "color"),
+    "exams": ("id", "subject_id", "subject", "title", "date", "time", "note", "ignore_barrier", "color"),
+    "topics": ("id", "exam_id", "name", "status", "scheduled_date", "locked", "note", "estimated_minutes"),
+    "grade_modules": ("id", "subject_id", "name", "weight"),
+    "grades": ("id", "subject_id", "module_id", "value", "weight", "desc", "date"),
+    "task_lists": ("id", "name", "icon", "list_type"),
+    "daily_tasks": ("id", "content", "status", "date", "color", "created_at", "note", "list_id"),
+    "schedule_entries": ("id", "subject_id", "day_of_week", "start_time", "end_time", "room", "type", "period_start",
+                         "period_end"),
+    "schedule_cancellations": ("id", "entry_id", "date"),
+}
+
+# Wartości DEFAULT z lokalnego schematu (pozostałe kolumny bez wartości to NULL)
+DEFAULTS = {
+    ("exams", "ignore_barrier"): 0,
+    ("topics", "locked"): 0,
+    ("semesters", "is_current"): 0,
+    ("subjects", "weight"): 1.0,
+    ("grade_modules", "weight"): 0.0,
+    ("grades", "weight"): 1.0,
+    ("subscriptions", "is_active"): 1,
+}
+
+# Klucze obce jak w SQLite: (tabela, kolumna, tabela nadrzędna, akcja przy usunięciu rodzica)
+FOREIGN_KEYS = (
+    ("subjects", "semester_id", "semesters", "cascade"),
+    ("exams", "subject_id", "subjects", "set_null"),
+    ("subscriptions", "subject_id", "subjects", "set_null"),
+    ("schedule_entries", "subject_id", "subjects", "cascade"),
+    ("grade_modules", "subject_id", "subjects", "cascade"),
+    ("grades", "subject_id", "subjects", "cascade"),
+    ("grades", "module_id", "grade_modules", "set_null"),
+    ("schedule_cancellations", "entry_id", "schedule_entries", "cascade"),
+    ("topics", "exam_id", "exams", "cascade"),
+    ("custom_events", "list_id", "event_lists", "set_null"),
+)
+
+# Indeksy pomocnicze: (tabela, kolumna) -> {wartość: {klucz: None}} (odpowiedniki LOCAL_INDEXES i kluczy obcych)
+INDEXED = {(table, column) for table, column, _, _ in FOREIGN_KEYS} | {("subjects", "name"),
+                                                                       ("daily_tasks", "list_id")}
+
+
+# --- DOSTAWCA: PAMIĘĆ (testy, dema, benchmarki) ---
+# Pełny BaseProvider na słownikach: te same kształty wyników co SQLiteProvider (0/1 tam, gdzie SQLite zwraca
+# INTEGER, bool tam, gdzie SQLiteProvider konwertuje), te same kaskady przy usuwaniu.
+# Może też udawać chmurę dla StorageManager (fetch_rows / fetch_tombstones / upsert_rows), z licznikiem zmian
+# zamiast updated_at - wtedy sync_down, kolejka zapisów i DataMigrator działają bez sieci.
+class MemoryProvider(BaseProvider):
+    def __init__(self, default_sounds=True):
+        self.tables = {table: {} for table in COLUMNS}
+        self.indexes = {key: {} for key in INDEXED}
+        self.lock = threading.RLock()
+        # Dla roli chmury: numer zmiany wiersza i usunięte klucze
+        self.sequence = 0
+        self.updated = {}
+        self.tombstones = {}
+        # Stan synchronizacji / migracji (jak tabele sync_state i migration_checkpoints)
+        self.sync_state = {}
+        self.migration_checkpoints = {}
+        self._outbox_conn = None
+        self.calls = 0
+
+        if default_sounds:
+            for sound in DEFAULT_SOUNDS:
+                self._insert("custom_sounds", {"id": sound["id"], "name": sound["name"],
+                                               "steps_json": json.dumps(sound["steps"])})
+
+    # --- PRYMITYWY TABEL ---
+    def _stamp(self, table, key):
+        self.sequence += 1
+        self.updated[(table, key)] = f"{self.sequence:012d}"
+
+    def _index_add(self, table, row):
+        for column in COLUMNS[table]:
+            index = self.indexes.get((table, column))
+            if index is not None:
+                index.setdefault(row[column], {})[row[SYNC_TABLES[table]]] = None
+
+    def _index_remove(self, table, row):
+        for column in COLUMNS[table]:
+            index = self.indexes.get((table, column))
+            if index is not None:
+                bucket = index.get(row[column])
+                if bucket is not None:
+                    bucket.pop(row[SYNC_TABLES[table]], None)
+                    if not bucket: del index[row[column]]
+
+    #   INSERT (replace=True jak INSERT OR REPLACE - wiersz trafia na koniec, ignore=True jak INSERT OR IGNORE)
+    def _insert(self, table, values, replace=False, ignore=False):
+        with self.lock:
+            self.calls += 1
+            rows = self.tables[table]
+            row = {c: values.get(c, DEFAULTS.get((table, c))) for c in COLUMNS[table]}
+            key = row[SYNC_TABLES[table]]
+            if key in rows:
+                if ignore:
+                    return
+                if not replace:
+                    raise sqlite3.IntegrityError(f"UNIQUE constraint failed: {table}.{SYNC_TABLES[table]}")
+                self._index_remove(table, rows.pop(key))
+            rows[key] = row
+            self._index_add(table, row)
+            self._stamp(table, key)
+
+    def _update(self, table, key, values):
+        with self.lock:
+            self.calls += 1
+            row = self.tables[table].get(key)
+            if row is None:
+                return
+            self._index_remove(table, row)
+            row.update({c: v for c, v in values.items() if c in row})
+            self._index_add(table, row)
+            self._stamp(table, key)
+
+    #   DELETE z kaskadami kluczy obcych (cascade=False jak PRAGMA foreign_keys = OFF)
+    def _delete(self, table, key, cascade=True):
+        with self.lock:
+            self.calls += 1
+            row = self.tables[table].pop(key, None)
+            if row is None:
+                return
+            self._index_remove(table, row)
+            self.updated.pop((table, key), None)
+            self.sequence += 1
+            self.tombstones[(table, str(key))] = f"{self.sequence:012d}"
+            if not cascade:
+                return
+            for child, column, parent, action in FOREIGN_KEYS:
+                if parent != table:
+                    continue
+                for child_key in list(self.indexes[(child, column)].get(key, {})):
+                    if action == "cascade":
+                        self._delete(child, child_key)
+                    else:
+                        self._update(child, child_key, {column: None})
+
+    def _get(self, table, key):
+        with self.lock:
+            self.calls += 1
+            row = self.tables[table].get(key)
+            return dict(row) if row else None
+
+    def _select(self, table, column=None, value=None):
+        with self.lock:
+            self.calls += 1
+            rows = self.tables[table]
+            if column is None:
+                return [dict(r) for r in rows.values()]
+            if (table, column) in self.indexes:
+                return [dict(rows[k]) for k in self.indexes[(table, column)].get(value, {})]
+            return [dict(r) for r in rows.values() if r[column] == value]
+
+    # --- POŁĄCZENIE I STATYSTYKI (zgodność z SQLiteProvider) ---
+    def _get_conn(self):
+        # Tylko dla kolejki zapisów do chmury (core/outbox.py), która przechowuje wpisy w SQLite
+        with self.lock:
+            if self._outbox_conn is None:
+                conn = sqlite3.connect(":memory:", check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                conn.execute("""CREATE TABLE sync_outbox
+                (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    method TEXT NOT NULL,
+                    args_json TEXT NOT NULL,
+                    coalesce_key TEXT,
+                    created_at REAL NOT NULL,
+                    attempts INTEGER DEFAULT 0,
+                    next_attempt REAL DEFAULT 0,
+                    last_error TEXT,
+                    sending INTEGER DEFAULT 0,
+                    failed INTEGER DEFAULT 0
+                )""")
+                self._outbox_conn = conn
+            return self._outbox_conn
+
+    def connection_stats(self):
+        return {"opened": 0, "open": 0}
+
+    def close(self):
+        if self._outbox_conn is not None:
+            self._outbox_conn.close()
+            self._outbox_conn = None
+
+    # --- USTAWIENIA I STATYSTYKI ---
+    def _kv(self, table):
+        res = {}
+        for r in self._select(table):
+            try:
+                res[r["key"]] = json.loads(r["value"])
+            except (TypeError, ValueError):
+                res[r["key"]] = r["value"]
+        return res
+
+    def get_settings(self):
+        defaults = DEFAULT_DATA["settings"].copy()
+        for k, v in self._kv("settings").items():
+            if k in defaults and isinstance(defaults[k], dict) and isinstance(v, dict):
+                defaults[k].update(v)
+            else:
+                defaults[k] = v
+        return defaults
+
+    def update_setting(self, key, value):
+        self._insert("settings", {"key": key, "value": json.dumps(value)}, replace=True)
+
+    def get_global_stats(self):
+        defaults = DEFAULT_DATA["global_stats"].copy()
+        defaults.update(self._kv("global_stats"))
+        return defaults
+
+    def update_global_stat(self, key, value):
+        self._insert("global_stats", {"key": key, "value": json.dumps(value)}, replace=True)
+
+    def update_global_stats(self, stats_dict):
+        with self.lock:
+            for k, v in stats_dict.items():
+                self.update_global_stat(k, v)
+
+    def get_other_stats(self):
+        return self._kv("stats")
+
+    def update_other_stat(self, key, value):
+        self._insert("stats", {"key": key, "value": json.dumps(value)}, replace=True)
+
+    # --- DŹWIĘKI ---
+    @staticmethod
+    def _sound(row):
+        try:
+            row["steps"] = json.loads(row["steps_json"])
+        except (TypeError, ValueError):
+            row["steps"] = []
+        return row
+
+    def get_custom_sounds(self):
+        results = []
+        for row in self._select("custom_sounds"):
+            row = self._sound(row)
+            del row["steps_json"]
+            results.append(row)
+        return results
+
+    def get_custom_sound(self, sound_id):
+        row = self._get("custom_sounds", sound_id)
+        return self._sound(row) if row else None
+
+    def add_custom_sound(self, sound_dict):
+        self._insert("custom_sounds", {"id": sound_dict["id"], "name": sound_dict["name"],
+                                       "steps_json": json.dumps(sound_dict["steps"])}, replace=True)
+
+    def delete_custom_sound(self, sound_id):
+        self._delete("custom_sounds", sound_id)
+
+    # --- EGZAMINY I TEMATY ---
+    def _exam_joined(self, row):
+        subject = self.tables["subjects"].get(row["subject_id"]) if row["subject_id"] else None
+        row["subject_name"] = subject["name"] if subject else None
+        row["subject_color"] = subject["color"] if subject else None
+        return row
+
+    def get_exam(self, exam_id):
+        with self.lock:
+            row = self._get("exams", exam_id)
+            if not row:
+                return None
+            data = self._exam_joined(row)
+        data["ignore_barrier"] = bool(data["ignore_barrier"])
+        if data.get("subject_name"): data["subject"] = data["subject_name"]
+        return data
+
+    def get_exams(self):
+        with self.lock:
+            rows = [self._exam_joined(r) for r in self._select("exams")]
+        for d in rows:
+            if d.get("subject_name"): d["subject"] = d["subject_name"]
+            if d.get("subject_color"): d["color"] = d["subject_color"]
+        return rows
+
+    def read_tables(self, tables):
+        # Pod blokadą - spójny stan jak transakcja w SQLiteProvider.read_tables
+        readers = {
+            "exams": self.get_exams,
+            "topics": lambda: self._select("topics"),
+            "daily_tasks": lambda: self._select("daily_tasks"),
+            "settings": self.get_settings,
+            "global_stats": self.get_global_stats,
+            "blocked_dates": self.get_blocked_dates,
+        }
+        with self.lock:
+            return {t: readers[t]() for t in tables}
+
+    def add_exam(self, exam_dict):
+        created = None
+        with self.lock:
+            subj_id = exam_dict.get("subject_id")
+            if not subj_id and exam_dict.get("subject"):
+                same_name = self._select("subjects", "name", exam_dict["subject"])
+                if same_name:
+                    subj_id = same_name[0]["id"]
+                elif self.tables["semesters"]:
+                    # Jak w SQLiteProvider: przedmiot zakładany w pierwszym semestrze
+                    created = {"id": f"sub_{uuid.uuid4().hex[:8]}",
+                               "semester_id": next(iter(self.tables["semesters"])), "name": exam_dict["subject"],
+                               "short_name": exam_dict["subject"][:3], "color": "#3498db"}
+                    self._insert("subjects", created)
+                    subj_id = created["id"]
+            self._insert("exams", {"id": exam_dict["id"], "subject_id": subj_id, "subject": exam_dict["subject"],
+                                   "title": exam_dict["title"], "date": exam_dict["date"],
+                                   "time": exam_dict.get("time"), "note": exam_dict.get("note", ""),
+                                   "ignore_barrier": 1 if exam_dict.get("ignore_barrier") else 0,
+                                   "color": exam_dict.get("color")})
+        return created
+
+    def update_exam(self, exam_dict):
+        self._update("exams", exam_dict["id"], {
+            "subject": exam_dict["subject"], "title": exam_dict["title"], "date": exam_dict["date"],
+            "time": exam_dict.get("time"), "note": exam_dict.get("note", ""),
+            "ignore_barrier": 1 if exam_dict.get("ignore_barrier") else 0, "color": exam_dict.get("color")})
+
+    def delete_exam(self, exam_id):
+        self._delete("exams", exam_id)
+
+    @staticmethod
+    def _topic_values(t):
+        return {"exam_id": t["exam_id"], "name": t["name"], "status": t["status"],
+                "scheduled_date": t.get("scheduled_date"), "locked": 1 if t.get("locked") else 0,
+                "note": t.get("note", ""), "estimated_minutes": t.get("estimated_minutes") or None}
+
+    def get_topic(self, topic_id):
+        data = self._get("topics", topic_id)
+        if data:
+            data["locked"] = bool(data["locked"])
+        return data
+
+    def get_topics(self, exam_id=None):
+        if exam_id: return self._select("topics", "exam_id", exam_id)
+        return self._select("topics")
+
+    def add_topic(self, topic_dict):
+        self._insert("topics", {"id": topic_dict["id"], **self._topic_values(topic_dict)})
+
+    def update_topic(self, topic_dict):
+        self._update("topics", topic_dict["id"], self._topic_values(topic_dict))
+
+    def update_topics_bulk(self, topics_list):
+        # Jak upsert w SupabaseProvider: nieistniejący temat jest dodawany (kolejka zapisów wysyła tak add_topic)
+        with self.lock:
+            for t in topics_list:
+                if t["id"] in self.tables["topics"]:
+                    self._update("topics", t["id"], self._topic_values(t))
+                else:
+                    self.add_topic(t)
+
+    def update_topic_dates(self, changes):
+        with self.lock:
+            for topic_id, new_date in changes:
+                self._update("topics", topic_id, {"scheduled_date": new_date})
+
+    def delete_topic(self, topic_id):
+        self._delete("topics", topic_id)
+
+    # --- LISTY I ZADANIA ---
+    def get_task_lists(self):
+        return self._select("task_lists")
+
+    def add_task_list(self, list_dict):
+        self._insert("task_lists", {"id": list_dict["id"], "name": list_dict["name"],
+                                    "icon": list_dict.get("icon", ""), "list_type": list_dict.get("list_type", "")},
+                     replace=True)
+
+    def delete_task_list(self, list_id):
+        with self.lock:
+            self._delete("task_lists", list_id)
+            for task in self._select("daily_tasks", "list_id", list_id):
+                self._delete("daily_tasks", task["id"])
+
+    def get_daily_task(self, task_id):
+        return self._get("daily_tasks", task_id)
+
+    def get_daily_tasks(self):
+        return self._select("daily_tasks")
+
+    @staticmethod
+    def _task_values(t):
+        return {"content": t["content"], "status": t["status"], "date": t["date"], "color": t.get("color"),
+                "created_at": t.get("created_at"), "note": t.get("note", ""), "list_id": t.get("list_id")}
+
+    def add_daily_task(self, task_dict):
+        self._insert("daily_tasks", {"id": task_dict["id"], **self._task_values(task_dict)})
+
+    def update_daily_task(self, task_dict):
+        self._update("daily_tasks", task_dict["id"], self._task_values(task_dict))
+
+    def delete_daily_task(self, task_id):
+        self._delete("daily_tasks", task_id)
+
+    def get_task_history(self):
+        today = str(datetime.date.today())
+        rows = [r for r in self._select("daily_tasks")
+                if r["status"] == "done" or (r["date"] is not None and r["date"] < today and r["status"] == "todo")]
+        rows.sort(key=lambda r: r["date"] or "", reverse=True)
+        return rows
+
+    def clear_task_history(self, today_str):
+        with self.lock:
+            for r in self._select("daily_tasks"):
+                if r["status"] == "done" or (r["date"] is not None and r["date"] < today_str):
+                    self._delete("daily_tasks", r["id"])
+
+    def restore_overdue_tasks(self, today_str):
+        with self.lock:
+            overdue = [r for r in self._select("daily_tasks")
+                       if r["date"] is not None and r["date"] < today_str and r["status"] == "todo"]
+            for r in overdue:
+                self._update("daily_tasks", r["id"], {"date": today_str})
+            return len(overdue)
+
+    # --- KALENDARZ I OSIĄGNIĘCIA ---
+    def get_blocked_dates(self):
+        return [r["date"] for r in self._select("blocked_dates")]
+
+    def add_blocked_date(self, date_str):
+        self._insert("blocked_dates", {"date": date_str}, ignore=True)
+
+    def remove_blocked_date(self, date_str):
+        self._delete("blocked_dates", date_str)
+
+    def get_achievements(self):
+        return [r["achievement_id"] for r in self._select("achievements")]
+
+    def add_achievement(self, achievement_id):
+        self._insert("achievements", {"achievement_id": achievement_id,
+                                      "date_earned": datetime.date.today().isoformat()}, ignore=True)
+
+    # --- SEMESTRY I PRZEDMIOTY ---
+    def get_semesters(self):
+        return self._select("semesters")
+
+    def add_semester(self, sem_dict):
+        self._insert("semesters", {"id": sem_dict["id"], "name": sem_dict["name"],
+                                   "start_date": sem_dict["start_date"], "end_date": sem_dict["end_date"],
+                                   "is_current": 1 if sem_dict.get("is_current") else 0})
+
+    def update_semester(self, sem_dict):
+        self._update("semesters", sem_dict["id"], {"name": sem_dict["name"], "start_date": sem_dict["start_date"],
+                                                   "end_date": sem_dict["end_date"],
+                                                   "is_current": 1 if sem_dict.get("is_current") else 0})
+
+    def delete_semester(self, sem_id):
+        self._delete("semesters", sem_id)
+
+    def get_subjects(self, semester_id=None):
+        if semester_id: return self._select("subjects", "semester_id", semester_id)
+        return self._select("subjects")
+
+    def get_subject(self, subject_id):
+        return self._get("subjects", subject_id)
+
+    @staticmethod
+    def _subject_values(s):
+        return {"semester_id": s["semester_id"], "name": s["name"], "short_name": s["short_name"],
+                "color": s["color"], "weight": s.get("weight", 1.0), "start_datetime": s.get("start_datetime"),
+                "end_datetime": s.get("end_datetime")}
+
+    def add_subject(self, sub_dict):
+        self._insert("subjects", {"id": sub_dict["id"], **self._subject_values(sub_dict)})
+
+    def update_subject(self, sub_dict):
+        self._update("subjects", sub_dict["id"], self._subject_values(sub_dict))
+
+    def delete_subject(self, sub_id):
+        self._delete("subjects", sub_id)
+
+    # --- PLAN ZAJĘĆ ---
+    def get_schedule(self):
+        return self._select("schedule_entries")
+
+    def get_schedule_entries_by_subject(self, subject_id):
+        return self._select("schedule_entries", "subject_id", subject_id)
+
+    def add_schedule_entry(self, entry_dict):
+        self._insert("schedule_entries", {
+            "id": entry_dict["id"], "subject_id": entry_dict["subject_id"], "day_of_week": entry_dict["day_of_week"],
+            "start_time": entry_dict["start_time"], "end_time": entry_dict["end_time"], "room": entry_dict.get("room"),
+            "type": entry_dict.get("type"), "period_start": entry_dict.get("period_start"),
+            "period_end": entry_dict.get("period_end")})
+
+    def delete_schedule_entry(self, entry_id):
+        self._delete("schedule_entries", entry_id)
+
+    def add_schedule_cancellation(self, entry_id, date_str):
+        self._insert("schedule_cancellations", {"id": cancellation_id(entry_id, date_str), "entry_id": entry_id,
+                                                "date": date_str}, ignore=True)
+
+    def get_schedule_cancellations(self):
+        return [{"entry_id": r["entry_id"], "date": r["date"]} for r in self._select("schedule_cancellations")]
+
+    # --- OCENY ---
+    def get_grades(self, subject_id=None):
+        if subject_id: return self._select("grades", "subject_id", subject_id)
+        return self._select("grades")
+
+    def add_grade(self, grade_dict):
+        self._insert("grades", {"id": grade_dict["id"], "subject_id": grade_dict["subject_id"],
+                                "module_id": grade_dict.get("module_id"), "value": grade_dict["value"],
+                                "weight": grade_dict.get("weight", 1.0), "desc": grade_dict.get("desc"),
+                                "date": grade_dict.get("date")})
+
+    def delete_grade(self, grade_id):
+        self._delete("grades", grade_id)
+
+    def get_grade_modules(self, subject_id):
+        return self._select("grade_modules", "subject_id", subject_id)
+
+    def add_grade_module(self, module_dict):
+        self._insert("grade_modules", {"id": module_dict["id"], "subject_id": module_dict["subject_id"],
+                                       "name": module_dict["name"], "weight": module_dict["weight"]})
+
+    def update_grade_module(self, module_dict):
+        self._update("grade_modules", module_dict["id"], {"name": module_dict["name"],
+                                                          "weight": module_dict["weight"]})
+
+    def delete_grade_module(self, module_id):
+        self._delete("grade_modules", module_id)
+
+    # --- GRAFIK ---
+    def get_event_lists(self):
+        return self._select("event_lists")
+
+    def add_event_list(self, lst_dict):
+        self._insert("event_lists", {"id": lst_dict["id"], "name": lst_dict["name"],
+                                     "color": lst_dict.get("color", "#3498db")}, replace=True)
+
+    def delete_event_list(self, lst_id):
+        self._delete("event_lists", lst_id)
+
+    def get_custom_events(self):
+        rows = self._select("custom_events")
+        for d in rows:
+            d["is_recurring"] = bool(d["is_recurring"])
+        return rows
+
+    def add_custom_event(self, ev_dict):
+        self._insert("custom_events", {
+            "id": ev_dict["id"], "list_id": ev_dict.get("list_id"), "title": ev_dict["title"],
+            "is_recurring": 1 if ev_dict.get("is_recurring") else 0, "date": ev_dict.get("date"),
+            "day_of_week": ev_dict.get("day_of_week"), "start_time": ev_dict["start_time"],
+            "end_time": ev_dict["end_time"], "start_date": ev_dict.get("start_date"),
+            "end_date": ev_dict.get("end_date"), "color": ev_dict.get("color", "#3498db")}, replace=True)
+
+    def delete_custom_event(self, ev_id):
+        self._delete("custom_events", ev_id)
+
+    # --- SUBSKRYPCJE ---
+    def get_subscriptions(self):
+        return self._select("subscriptions")
+
+    def get_subscription(self, sub_id):
+        return self._get("subscriptions", sub_id)
+
+    @staticmethod
+    def _subscription_values(s):
+        return {"subject_id": s.get("subject_id"), "name": s["name"], "provider": s.get("provider"),
+                "expiry_date": s.get("expiry_date"), "cost": s.get("cost", 0.0), "currency": s.get("currency", "PLN"),
+                "billing_cycle": s.get("billing_cycle", "yearly"), "note": s.get("note", ""),
+                "is_active": 1 if s.get("is_active", True) else 0, "billing_date": s.get("billing_date")}
+
+    def add_subscription(self, sub_dict):
+        self._insert("subscriptions", {"id": sub_dict["id"], **self._subscription_values(sub_dict)})
+
+    def update_subscription(self, sub_dict):
+        self._update("subscriptions", sub_dict["id"], self._subscription_values(sub_dict))
+
+    def delete_subscription(self, sub_id):
+        self._delete("subscriptions", sub_id)
+
+    # --- MIGRACJA DO CHMURY (jak w SQLiteProvider) ---
+    def count_rows(self, table):
+        return len(self.tables[table])
+
+    def read_rows_after(self, table, after_key=None, limit=500):
+        with self.lock:
+            keys = sorted(k for k in self.tables[table] if after_key is None or k > after_key)[:limit]
+            return [dict(self.tables[table][k]) for k in keys]
+
+    def get_migration_checkpoints(self, target):
+        return {t: dict(c) for t, c in self.migration_checkpoints.items() if c["target"] == target}
+
+    def save_migration_checkpoint(self, target, table, last_key, rows_done, finished=False):
+        self.migration_checkpoints[table] = {"table_name": table, "target": target, "last_key": last_key,
+                                             "rows_done": rows_done, "finished": 1 if finished else 0}
+
+    def clear_migration_checkpoints(self):
+        self.migration_checkpoints.clear()
+
+    # --- SYNCHRONIZACJA: STRONA LOKALNA (jak w SQLiteProvider) ---
+    def get_sync_state(self):
+        return dict(self.sync_state)
+
+    @staticmethod
+    def _local_value(table, column, value):
+        if column == SYNC_JSON_COLUMNS.get(table) or isinstance(value, (dict, list)):
+            return json.dumps(value)
+        if isinstance(value, bool):
+            return 1 if value else 0
+        return value
+
+    def apply_sync_batch(self, batches, high_water, replace=()):
+        # Jak SQLiteProvider: blokada tylko na czas jednej strony, usunięcia z tabel pobranych w całości
+        # i punkty kontrolne na końcu
+        changed = 0
+        seen = {table: set() for table in replace if table not in SYNC_MERGE_ONLY}
+        for table, rows, deleted in batches:
+            with self.lock:
+                key = SYNC_TABLES[table]
+                if table in seen:
+                    seen[table].update(row[key] for row in rows)
+                for k in deleted:
+                    self._delete(table, k, cascade=False)
+                changed += len(deleted)
+                for row in rows:
+                    values = {c: self._local_value(table, c, row[c]) for c in COLUMNS[table] if c in row}
+                    if row[key] in self.tables[table]:
+                        self._update(table, row[key], values)
+                    else:
+                        self._insert(table, values)
+                changed += len(rows)
+        with self.lock:
+            for table, keys in seen.items():
+                stale = [k for k in self.tables[table] if k not in keys]
+                for k in stale:
+                    self._delete(table, k, cascade=False)
+                changed += len(stale)
+            for table in replace:
+                self.sync_state.pop(table, None)
+            self.sync_state.update(high_water)
+        return changed
+
+    # --- SYNCHRONIZACJA: ROLA CHMURY (jak w SupabaseProvider, licznik zmian zamiast updated_at) ---
+    def fetch_rows(self, table, since=None, after=None, limit=1000, count=False):
+        json_column = SYNC_JSON_COLUMNS.get(table)
+        with self.lock:
+            rows = self.tables[table]
+            keys = sorted(k for k in rows if not since or self.updated[(table, k)] >= since)
+            total = len(keys)
+            if after is not None:
+                keys = [k for k in keys if k > after]
+            data = []
+            for k in keys[:limit]:
+                d = dict(rows[k])
+                if json_column and isinstance(d.get(json_column), str):
+                    try:
+                        d[json_column] = json.loads(d[json_column])
+                    except ValueError:
+                        pass
+                d["updated_at"] = self.updated[(table, k)]
+                data.append(d)
+        return (data, total) if count else data
+
+    def fetch_tombstones(self, since=None, offset=0, limit=1000, count=False):
+        with self.lock:
+            items = sorted((t, k, d) for (t, k), d in self.tombstones.items() if not since or d >= since)
+        data = [{"table_name": t, "row_key": k, "deleted_at": d} for t, k, d in items[offset:offset + limit]]
+        return (data, len(items)) if count else data
+
+    def upsert_rows(self, table, rows):
+        key = SYNC_TABLES[table]
+        with self.lock:
+            for row in rows:
+                values = {c: self._local_value(table, c, v) if c == SYNC_JSON_COLUMNS.get(table) and
+                          not isinstance(v, str) else (1 if v is True else 0 if v is False else v)
+                          for c, v in row.items() if c in COLUMNS[table]}
+                if row[key] in self.tables[table]:
+                    self._update(table, row[key], values)
+                else:
+                    self._insert(table, values)
@@ -1,12 +1,19 @@
-import json
-from datetime import date
-from core.storage import SQLiteProvider, SupabaseProvider
+import time
+from core.storage import SQLiteProvider, SupabaseProvider, SYNC_TABLES
+
+# Wierszy w jednym upsercie (jedno zapytanie HTTP na porcję zamiast jednego na wiersz)
+MIGRATION_BATCH = 500
 
 
 class DataMigrator:
-    def __init__(self, local_provider: SQLiteProvider, supabase_url, supabase_key):
+    # cloud_provider: gotowy dostawca chmury (np. z atrapą klienta w _dev_tools/fake_supabase.py)
+    def __init__(self, local_provider: SQLiteProvider, supabase_url, supabase_key, cloud_provider=None,
+                 batch_size=MIGRATION_BATCH):
         self.local = local_provider
-        self.cloud = SupabaseProvider(supabase_url, supabase_key)
+        self.cloud = cloud_provider or SupabaseProvider(supabase_url, supabase_key)
+        # Punkty kontrolne dotyczą konkretnego projektu Supabase
+        self.target = supabase_url or ""
+        self.batch_size = batch_size
 
     def run(self, progress_callback=None):
         def log(msg):
@@ -15,83 +22,45 @@ class DataMigrator:
 
         try:
             log("Inicjalizacja migracji...")
-
-            # 1. Ustawienia i Statystyki
-            log("Migracja ustawień i statystyk...")
-            settings = self.local.get_settings()
-            for k, v in settings.items():
-                self.cloud.update_setting(k, v)
-
-            g_stats = self.local.get_global_stats()
-            for k, v in g_stats.items():
-                self.cloud.update_global_stat(k, v)
-
-            # 2. Tabele proste (Dźwięki, Daty, Osiągnięcia)
-            log("Migracja dźwięków i kalendarza...")
-            for s in self.local.get_custom_sounds():
-                self.cloud.add_custom_sound(s)
-            for d in self.local.get_blocked_dates():
-                self.cloud.add_blocked_date(d)
-            for a in self.local.get_achievements():
-                self.cloud.add_achievement(a)
-
-            # 3. Struktura Akademicka (Kolejność: Semestry -> Przedmioty)
-            log("Migracja struktury semestrów...")
-            for sem in self.local.get_semesters():
-                self.cloud.add_semester(dict(sem))
-
-            for sub in self.local.get_subjects():
-                self.cloud.add_subject(dict(sub))
-
-            # 4. Grafik (Kolejność: Listy -> Wydarzenia)
-            log("Migracja grafiku i kategorii...")
-            for ev_list in self.local.get_event_lists():
-                self.cloud.add_event_list(dict(ev_list))
-
-            for ev in self.local.get_custom_events():
-                self.cloud.add_custom_event(dict(ev))
-
-            # 5. Edukacja (Egzaminy i Tematy)
-            log("Migracja egzaminów...")
-            for ex in self.local.get_exams():
-                self.cloud.add_exam(dict(ex))
-
-            topics = self.local.get_topics()
-            if topics:
-                # Mapowanie locked na boolean dla Supabase
-                for t in topics:
-                    t["locked"] = bool(t.get("locked", 0))
-                self.cloud.update_topics_bulk(topics)
-
-            # 6. Oceny i Moduły
-            log("Migracja ocen...")
-            # Pobieramy wszystkie przedmioty, aby przejść przez ich moduły i oceny
-            subjects = self.local.get_subjects()
-            for s in subjects:
-                for mod in self.local.get_grade_modules(s["id"]):
-                    self.cloud.add_grade_module(dict(mod))
-                for grade in self.local.get_grades(s["id"]):
-                    # SupabaseProvider obsłuży mapowanie desc -> desc_text
-                    self.cloud.add_grade(dict(grade))
-
-            # 7. Plan lekcji i Zadania
-            log("Migracja planu i zadań...")
-            for entry in self.local.get_schedule():
-                self.cloud.add_schedule_entry(dict(entry))
-
-            for cancel in self.local.get_schedule_cancellations():
-                self.cloud.add_schedule_cancellation(cancel["entry_id"], cancel["date"])
-
-            for t_list in self.local.get_task_lists():
-                self.cloud.add_task_list(dict(t_list))
-
-            for task in self.local.get_daily_tasks():
-                self.cloud.add_daily_task(dict(task))
-
-            log("Migracja zakończona sukcesem!")
+            checkpoints = self.local.get_migration_checkpoints(self.target)
+            if checkpoints:
+                log("Wznawianie przerwanej migracji...")
+
+            start = time.perf_counter()
+            sent = 0
+            # Tabele w kolejności zależności (rodzice przed dziećmi), każda porcją po batch_size wierszy
+            for table, key in SYNC_TABLES.items():
+                checkpoint = checkpoints.get(table, {})
+                if checkpoint.get("finished"):
+                    continue
+                last_key = checkpoint.get("last_key")
+                done = checkpoint.get("rows_done", 0)
+                total = self.local.count_rows(table)
+
+                while True:
+                    rows = self.local.read_rows_after(table, last_key, self.batch_size)
+                    if not rows:
+                        break
+                    self.cloud.upsert_rows(table, rows)
+                    last_key = rows[-1][key]
+                    done += len(rows)
+                    sent += len(rows)
+                    # Punkt kontrolny po każdej wysłanej porcji - po błędzie wznawiamy od następnej
+                    self.local.save_migration_checkpoint(self.target, table, last_key, done)
+
+                    rate = sent / max(time.perf_counter() - start, 1e-6)
+                    log(f"Migracja {table}: {done}/{total} ({rate:.0f} wierszy/s)")
+                    if len(rows) < self.batch_size:
+                        break
+
+                self.local.save_migration_checkpoint(self.target, table, last_key, done, finished=True)
+
+            self.local.clear_migration_checkpoints()
+            seconds = time.perf_counter() - start
+            log(f"Migracja zakończona sukcesem! ({sent} wierszy w {seconds:.1f}s, {sent / max(seconds, 1e-6):.0f} wierszy/s)")
             return True, "Success"
 
         except Exception as e:
             error_msg = str(e)
             log(f"Błąd: {error_msg}")
-            return False, error_msg
\ No newline at end of file
+            return False, error_msg
@@ -0,0 +1,262 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+
+# Ile wpisów kolejki czytamy naraz (i maksymalna wielkość jednej paczki)
+BATCH_LIMIT = 200
+# Ponawianie: 0.5s, 1s, 2s, ... do 5 min; po MAX_ATTEMPTS wpis jest odkładany (failed) do następnego uruchomienia
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 300
+MAX_ATTEMPTS = 20
+
+# Błędy trwałe - ponowienie nic nie zmieni, więc wpis od razu jest odkładany i nie blokuje kolejki ani sync_down:
+# SQLSTATE 22 (złe dane), 23 (naruszenie ograniczeń), 42 (brak kolumny / uprawnień), PGRST1xx/2xx (zapytanie,
+# schemat) i HTTP 4xx poza 401 (wygasła sesja), 408 (timeout) i 429 (limit zapytań)
+PERMANENT_SQLSTATE = ("22", "23", "42")
+TRANSIENT_HTTP = (401, 408, 429)
+
+# Zapisy nadpisujące cały wiersz (albo wartość klucza) - nowszy zastępuje starszy oczekujący wpis
+KEYED_METHODS = ("update_setting", "update_global_stat", "update_other_stat")
+
+# Operacje łączone w jedną paczkę: metoda -> (metoda chmury, funkcja zwracająca listę elementów paczki)
+BATCHABLE = {
+    "add_topic": ("update_topics_bulk", lambda args: [args[0]]),
+    "update_topic": ("update_topics_bulk", lambda args: [args[0]]),
+    "update_topics_bulk": ("update_topics_bulk", lambda args: list(args[0])),
+    "update_topic_dates": ("update_topic_dates", lambda args: [tuple(c) for c in args[0]]),
+}
+
+
+def _json_default(value):
+    if isinstance(value, sqlite3.Row):
+        return dict(value)
+    return str(value)
+
+
+#   KLUCZ SCALANIA: ten sam wiersz / klucz ustawienia -> w kolejce zostaje tylko najnowszy zapis
+def coalesce_key(method, args):
+    if method in KEYED_METHODS and args:
+        return f"{method}:{args[0]}"
+    if method.startswith("update_") and len(args) == 1 and isinstance(args[0], dict) and args[0].get("id"):
+        return f"{method}:{args[0]['id']}"
+    return None
+
+
+#   KLASYFIKACJA BŁĘDU WYSYŁKI: True = trwały (postgrest APIError.code albo status odpowiedzi HTTP)
+def is_permanent(error):
+    code = str(getattr(error, "code", None) or "")
+    if len(code) == 5 and code[:2] in PERMANENT_SQLSTATE:
+        return True
+    if code.startswith("PGRST") and code[5:6] in ("1", "2"):
+        return True
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in TRANSIENT_HTTP
+
+
+#   ELEMENTY PACZKI BEZ DUPLIKATÓW (ostatnia wersja wiersza wygrywa, upsert nie przyjmie dwóch takich samych id)
+def _dedupe(items, key):
+    latest = {}
+    for item in items:
+        latest.pop(key(item), None)
+        latest[key(item)] = item
+    return list(latest.values())
+
+
+# --- TRWAŁA KOLEJKA ZAPISÓW DO CHMURY (write-behind) ---
+# Zapis lokalny dodaje wpis do tabeli sync_outbox, a jeden wątek roboczy wysyła je po kolei do chmury.
+# Wpisy przeżywają zamknięcie aplikacji i są wysyłane po ponownym uruchomieniu.
+class Outbox:
+    def __init__(self, provider, get_cloud):
+        self.provider = provider
+        self.get_cloud = get_cloud
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.idle = threading.Event()
+        self.worker = None
+        self.stopping = False
+
+        self.sent = 0
+        self.batches = 0
+        self.errors = 0
+        self.coalesced = 0
+        self.last_latency = None
+        self.total_latency = 0.0
+        self.last_error = None
+
+        # Wznowienie po poprzednim uruchomieniu: wpisy "w locie" i odłożone wracają do kolejki
+        with self.provider._get_conn() as conn:
+            conn.execute("UPDATE sync_outbox SET sending = 0, failed = 0, next_attempt = 0")
+
+    def enqueue(self, method, *args):
+        key = coalesce_key(method, args)
+        payload = json.dumps(args, default=_json_default)
+        with self.lock:
+            with self.provider._get_conn() as conn:
+                if key:
+                    # Starszy wpis jest usuwany, a nowy trafia na koniec (kolejność względem innych zapisów zostaje)
+                    cur = conn.execute("DELETE FROM sync_outbox WHERE coalesce_key = ? AND sending = 0", (key,))
+                    self.coalesced += cur.rowcount
+                conn.execute("""INSERT INTO sync_outbox (method, args_json, coalesce_key, created_at)
+                                VALUES (?, ?, ?, ?)""", (method, payload, key, time.time()))
+        self.idle.clear()
+        self.start()
+        self.wake.set()
+
+    def start(self):
+        if self.worker and self.worker.is_alive():
+            return
+        if self.get_cloud() is None:
+            return
+        self.stopping = False
+        self.worker = threading.Thread(target=self._run, name="cloud-outbox", daemon=True)
+        self.worker.start()
+
+    def stop(self):
+        self.stopping = True
+        self.wake.set()
+
+    #   CZEKANIE NA OPRÓŻNIENIE KOLEJKI (np. przed sync_down); False po upływie czasu
+    def flush(self, timeout=30):
+        if self.pending_count() == 0:
+            return True
+        self.start()
+        self.wake.set()
+        deadline = time.time() + timeout
+        while self.pending_count() > 0:
+            remaining = deadline - time.time()
+            if remaining <= 0 or not (self.worker and self.worker.is_alive()):
+                return False
+            self.idle.wait(min(remaining, 0.5))
+        return True
+
+    def pending_count(self):
+        row = self.provider._get_conn().execute("SELECT COUNT(*) FROM sync_outbox WHERE failed = 0").fetchone()
+        return row[0]
+
+    #   METRYKI: głębokość kolejki, wiek najstarszego wpisu, opóźnienie wysyłki (od zapisu lokalnego do chmury)
+    def stats(self):
+        conn = self.provider._get_conn()
+        pending, oldest = conn.execute(
+            "SELECT COUNT(*), MIN(created_at) FROM sync_outbox WHERE failed = 0").fetchone()
+        failed = conn.execute("SELECT COUNT(*) FROM sync_outbox WHERE failed = 1").fetchone()[0]
+        return {
+            "pending": pending,
+            "failed": failed,
+            "oldest_age": round(time.time() - oldest, 3) if oldest else 0.0,
+            "sent": self.sent,
+            "batches": self.batches,
+            "errors": self.errors,
+            "coalesced": self.coalesced,
+            "last_latency": round(self.last_latency, 3) if self.last_latency is not None else None,
+            "avg_latency": round(self.total_latency / self.sent, 3) if self.sent else None,
+            "last_error": self.last_error
+        }
+
+    # --- WĄTEK ROBOCZY ---
+    def _run(self):
+        while not self.stopping:
+            cloud = self.get_cloud()
+            wait = self._step(cloud) if cloud else None
+            if wait == 0:
+                continue
+            self.idle.set()
+            self.wake.wait(wait)
+            self.wake.clear()
+
+    #   JEDEN KROK: wysyła paczkę z początku kolejki; zwraca 0 (dalej), czas czekania albo None (pusto)
+    def _step(self, cloud):
+        conn = self.provider._get_conn()
+        rows = conn.execute("""SELECT id, method, args_json, created_at, attempts, next_attempt
+                               FROM sync_outbox WHERE failed = 0 ORDER BY id LIMIT ?""",
+                            (BATCH_LIMIT,)).fetchall()
+        if not rows:
+            return None
+
+        # Kolejność ma znaczenie (np. egzamin przed tematami), więc nie wyprzedzamy wstrzymanego wpisu
+        head = rows[0]
+        now = time.time()
+        if head["next_attempt"] > now:
+            return head["next_attempt"] - now
+
+        group = self._group(rows)
+        ids = [r["id"] for r in group]
+        marks = ",".join("?" * len(ids))
+        with self.lock:
+            with conn:
+                conn.execute(f"UPDATE sync_outbox SET sending = 1 WHERE id IN ({marks})", ids)
+
+        try:
+            self._send(cloud, group)
+        except Exception as e:
+            self._failed(conn, group, e)
+            return 0
+
+        with self.lock:
+            with conn:
+                conn.execute(f"DELETE FROM sync_outbox WHERE id IN ({marks})", ids)
+        done = time.time()
+        for r in group:
+            self.last_latency = done - r["created_at"]
+            self.total_latency += self.last_latency
+        self.sent += len(group)
+        self.batches += 1
+        return 0
+
+    #   PACZKA: kolejne wpisy z początku kolejki, które da się wysłać jednym zapytaniem
+    #   (po błędzie wpis wysyłany jest pojedynczo, żeby jeden zły wiersz nie blokował reszty)
+    def _group(self, rows):
+        head = rows[0]
+        target = BATCHABLE.get(head["method"])
+        if not target or head["attempts"] > 0:
+            return [head]
+        group = [head]
+        for r in rows[1:]:
+            other = BATCHABLE.get(r["method"])
+            if not other or other[0] != target[0] or r["attempts"] > 0:
+                break
+            group.append(r)
+        return group
+
+    def _send(self, cloud, group):
+        method = group[0]["method"]
+        if len(group) == 1 and method not in BATCHABLE:
+            getattr(cloud, method)(*json.loads(group[0]["args_json"]))
+            return
+
+        cloud_method = BATCHABLE[method][0]
+        items = []
+        for r in group:
+            items_of = BATCHABLE[r["method"]][1]
+            items.extend(items_of(json.loads(r["args_json"])))
+        if cloud_method == "update_topic_dates":
+            cloud.update_topic_dates(_dedupe(items, key=lambda change: change[0]))
+            return
+
+        # Upsert uzupełnia brakujące kolumny NULL-ami, więc jedna paczka = wiersze z tym samym zestawem kolumn
+        runs = []
+        for topic in items:
+            columns = sorted(topic)
+            if not runs or runs[-1][0] != columns:
+                runs.append((columns, []))
+            runs[-1][1].append(topic)
+        for _, run in runs:
+            cloud.update_topics_bulk(_dedupe(run, key=lambda topic: topic["id"]))
+
+    def _failed(self, conn, group, error):
+        self.errors += 1
+        self.last_error = f"{group[0]['method']}: {error}"
+        # Paczka jest najpierw rozbijana na pojedyncze wpisy - trwały błąd odkłada tylko winny wiersz
+        permanent = len(group) == 1 and is_permanent(error)
+        with self.lock:
+            with conn:
+                for r in group:
+                    attempts = r["attempts"] + 1
+                    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+                    conn.execute("""UPDATE sync_outbox SET sending = 0, attempts = ?, next_attempt = ?,
+                                    last_error = ?, failed = ? WHERE id = ?""",
+                                 (attempts, time.time() + delay, str(error)[:500],
+                                  1 if permanent or attempts >= MAX_ATTEMPTS else 0, r["id"]))
+        if permanent or group[0]["attempts"] + 1 >= MAX_ATTEMPTS:
+            print(f"[Supabase Sync Error in {group[0]['method']}]: {error} (odłożone do następnego uruchomienia)")
@@ -0,0 +1,146 @@
+from dataclasses import dataclass, field
+from datetime import date
+
+from core.planner import date_format
+
+# Wiersz odstępu w tabeli planu (bez iid - Treeview nada własne)
+SPACER = (None, ("", "", ""), ())
+BAR = (None, ("│", "", ""), ("todo",))
+
+
+# --- MODEL WIERSZY TABELI PLANU (bez GUI) ---
+# rows: lista (iid lub None, values, tags) w kolejności wyświetlania
+# theme_tags: {nazwa tagu: kolor} - jeden tag na egzamin z kolorem, konfigurowany raz
+@dataclass
+class PlanRows:
+    rows: list = field(default_factory=list)
+    theme_tags: dict = field(default_factory=dict)
+    has_items: bool = False
+
+
+#   WYKRZYKNIKI / ZNACZNIKI PRZY TEMACIE (notatka, blokada)
+def _topic_marks(topic):
+    marks = " ✎" if (topic.get("note") or "").strip() else ""
+    if topic.get("locked", False): marks += " ☒"
+    return marks
+
+
+#   ETYKIETA DNIA: tekst, tag koloru i ikona (liczba dni do daty, dzień wolny)
+def _day_label(txt, days_left, is_blocked, has_exams):
+    day_off = txt.get("tag_day_off", "(Day Off)")
+    if is_blocked and not has_exams:
+        return day_off, "blocked", "○"
+
+    tag = "normal"
+    if days_left == 0:
+        text, tag = txt["tag_today"], "today"
+    elif days_left == 1:
+        text, tag = txt["tag_1_day"], "red"
+    else:
+        text = txt["tag_x_days"].format(days=days_left)
+        if days_left <= 3:
+            tag = "orange"
+        elif days_left <= 6:
+            tag = "yellow"
+    if is_blocked:
+        return f"{text} {day_off}", tag, "○"
+    return text, tag, "●"
+
+
+#   BUDOWANIE MODELU W JEDNYM PRZEJŚCIU: indeksy po dacie i po id egzaminu, każda data parsowana raz
+def build_plan_rows(exams, topics, blocked_dates, txt, today=None):
+    today = today or date.today()
+    today_str = str(today)
+    blocked = set(blocked_dates)
+    other = txt["val_other"]
+
+    parsed = {}
+
+    def day_of(value):
+        d = parsed.get(value)
+        if d is None:
+            d = parsed[value] = date_format(value)
+        return d
+
+    result = PlanRows()
+    rows = result.rows
+
+    exams_by_id = {}
+    exams_by_date = {}
+    active_exam_ids = set()
+    all_dates = set()
+    for exam in exams:
+        exams_by_id.setdefault(exam["id"], exam)
+        exams_by_date.setdefault(exam["date"], []).append(exam)
+        if day_of(exam["date"]) >= today:
+            active_exam_ids.add(exam["id"])
+            all_dates.add(str(exam["date"]))
+
+    topics_by_date = {}
+    overdue_topics = []
+    for topic in topics:
+        scheduled = topic.get("scheduled_date")
+        topics_by_date.setdefault(str(scheduled), []).append(topic)
+        if not scheduled:
+            continue
+        if day_of(scheduled) >= today:
+            all_dates.add(str(scheduled))
+        elif topic["status"] == "todo" and topic["exam_id"] in active_exam_ids:
+            overdue_topics.append(topic)
+
+    # 1. ZALEGŁE
+    rows.append(SPACER)
+    if overdue_topics:
+        rows.append((None, ("", txt["tag_overdue"], ""), ("overdue",)))
+        for topic in overdue_topics:
+            exam = exams_by_id.get(topic["exam_id"])
+            subj_name = exam["subject"] if exam else other
+            rows.append((topic["id"], (_topic_marks(topic), f"{topic['scheduled_date']}\t{subj_name}", topic["name"]),
+                         ("overdue",)))
+        rows.append(SPACER)
+
+    # 2. DATY (dni wolne tylko w zakresie od dziś do ostatniej daty z planu)
+    if all_dates:
+        last = max(all_dates)
+        all_dates.update(bd for bd in blocked if today_str <= bd <= last)
+
+    days_short = txt["days_short"]
+    for day_str in sorted(all_dates):
+        todays_exams = exams_by_date.get(day_str, ())
+        todays_topics = topics_by_date.get(day_str, ())
+        is_blocked = day_str in blocked
+        has_exams = len(todays_exams) > 0
+
+        day = day_of(day_str)
+        display_text, tag, icon = _day_label(txt, (day - today).days, is_blocked, has_exams)
+        rows.append((f"date_{day_str}", (icon, f"{display_text} ({days_short[day.weekday()]}, {day_str})", ""),
+                     (tag,)))
+
+        if not is_blocked or has_exams:
+            rows.append(BAR)
+            for exam in todays_exams:
+                marks = ""
+                if (exam.get("note") or "").strip(): marks += " ✎"
+                if exam.get("ignore_barrier", False): marks += " ø"
+                rows.append((exam["id"], (f"{marks} │", exam["subject"], exam["title"]), ("exam",)))
+
+            if not is_blocked:
+                if todays_exams and todays_topics: rows.append(BAR)
+
+                for topic in todays_topics:
+                    exam = exams_by_id.get(topic["exam_id"])
+                    if topic["status"] == "done":
+                        tags = ("done",)
+                    elif exam and exam.get("color"):
+                        tag_name = f"theme_{exam['id']}"
+                        result.theme_tags[tag_name] = exam["color"]
+                        tags = (tag_name,)
+                    else:
+                        tags = ("todo",)
+                    rows.append((topic["id"], (f"{_topic_marks(topic)} │", exam["subject"] if exam else other,
+                                               topic["name"]), tags))
+            rows.append(BAR)
+        rows.append(SPACER)
+
+    result.has_items = bool(all_dates) or bool(overdue_topics)
+    return result
@@ -1,5 +1,11 @@
+from dataclasses import dataclass, field
 from datetime import datetime, date, timedelta
-import math
+from bisect import bisect_left, bisect_right
+from collections import deque
+from types import MappingProxyType
+import heapq
+
+from core.capacity import get_free_minutes, CAPACITY_TABLES
 
 
 #   FUNKCJA ZMIENIAJACA NA FORMAT DATY
@@ -88,132 +94,630 @@ def topics_list_create(storage, e_id, only_unscheduled=False):
     return topics_list
 
 
-#   GLOWNA FUNKCJA PLANUJACA
-def plan(storage, only_unscheduled=False):
-    today = date.today()
+# --- SILNIK PLANOWANIA (jeden przebieg, dane wczytane raz) ---
 
-    # 1. Pobieramy dane wejściowe on-demand (Pure SQL)
-    # blocked_dates to lista stringów, rzutujemy na set dla O(1) lookup
-    blocked_set = set(storage.get_blocked_dates())
-    exams = storage.get_exams()
+# Tryby planujące wszystkie egzaminy razem (potrzebują dat tematów spoza zakresu przeplanowania)
+GLOBAL_MODES = ("capacity", "effort")
 
-    # 2. Tworzymy strukturę kalendarza
-    callendar = callendar_create(storage, today)
-
-    # 3. Iterujemy po egzaminach (Algorytm)
-    for exam in exams:
-        if not exam["date"]:
-            continue
-
-        exam_date = date_format(exam["date"])
-        if exam_date <= today:
-            continue
+DEFAULT_TOPIC_MINUTES = 30
 
-        end_study_date = exam_date - timedelta(days=1)
-        if end_study_date < today:
-            continue
+# Tabele czytane przez planer - zmiana którejś między wyliczeniem a zapisem unieważnia plan.
+# global_stats celowo pominięte: timer zapisuje je co chwilę, a wpływają tylko na domyślny czas tematu.
+PLAN_TABLES = ("exams", "topics", "blocked_dates") + CAPACITY_TABLES
 
-        # Określamy START okna nauki (skanujemy wstecz do bariery "E")
-        scan_date = end_study_date
-        while scan_date > today and "E" not in callendar.get(scan_date, []):
-            scan_date -= timedelta(days=1)
 
-        start_study_date = scan_date
+#   DOMYŚLNY CZAS TEMATU: średni czas nauki z timera na zrobiony temat, inaczej 30 min
+def default_topic_minutes(stats):
+    try:
+        total_seconds = float(stats.get("total_study_time", 0) or 0)
+        done = int(stats.get("topics_done", 0) or 0)
+    except (TypeError, ValueError):
+        return DEFAULT_TOPIC_MINUTES
+    if total_seconds <= 0 or done <= 0:
+        return DEFAULT_TOPIC_MINUTES
+    return max(5, round(total_seconds / 60 / done))
 
-        # Pobieramy listę ID tematów do zaplanowania dla tego egzaminu
-        t_list = topics_list_create(storage, exam["id"], only_unscheduled)
 
+#   LIMIT Z USTAWIEŃ: liczba > 0 albo brak limitu (0, puste lub niepoprawne wartości)
+def _cap_value(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return float("inf")
+    return value if value > 0 else float("inf")
+
+
+#   PRZERWANIE PLANOWANIA (cancel_event ustawiony z innego wątku)
+class PlanCancelled(Exception):
+    pass
+
+
+#   NIEAKTUALNY PLAN (dane zmieniły się między wyliczeniem a commit_plan) - trzeba policzyć od nowa
+class PlanStale(Exception):
+    pass
+
+
+# Tabele indeksu egzaminów - zapis do którejś unieważnia indeks w cache
+INDEX_TABLES = ("exams", "blocked_dates")
+
+
+#   INDEKS EGZAMINÓW: bariery, dni egzaminów i dni wolne jako posortowane ordinale (niemodyfikowalny,
+#   współdzielony przez cache między wywołaniami planera)
+class PlanIndex:
+    def __init__(self, exams, blocked_dates, today_ord):
+        self.exams = tuple(MappingProxyType(dict(e)) for e in exams)
+        self.exam_by_id = MappingProxyType({e["id"]: e for e in self.exams})
+
+        # Dni zablokowane: tylko poprawne daty ISO (tak jak porównanie str(date) w starym algorytmie)
+        blocked = set()
+        for text in blocked_dates:
+            day = date_format(text)
+            if str(day) == text:
+                blocked.add(day.toordinal())
+        self.blocked = frozenset(blocked)
+        self.blocked_sorted = tuple(sorted(blocked))
+
+        # Bariery "E": egzaminy bez ignore_barrier, od dziś w przód (posortowane pod bisect)
+        # oraz wszystkie egzaminy z datą posortowane po dniu (szukanie okien obejmujących dany dzień)
+        barriers = set()
+        exam_days = []
+        for exam in self.exams:
+            if not exam["date"]:
+                continue
+            exam_ord = date_format(exam["date"]).toordinal()
+            exam_days.append((exam_ord, exam["id"]))
+            if not exam["ignore_barrier"] and exam_ord >= today_ord:
+                barriers.add(exam_ord)
+        self.barriers = tuple(sorted(barriers))
+        exam_days.sort()
+        self.exam_ords = tuple(d for d, _ in exam_days)
+        self.exam_ids_by_day = tuple(e_id for _, e_id in exam_days)
+
+
+#   INDEKS Z CACHE: liczony raz na dzień, ważny do zmiany egzaminów / dni wolnych
+def get_plan_index(storage, today):
+    today_ord = today.toordinal()
+    cache = getattr(storage, "cache", None)
+    if cache is None:
+        return PlanIndex(storage.get_exams(), storage.get_blocked_dates(), today_ord)
+    return cache.get_derived(("plan_index", today_ord), INDEX_TABLES,
+                             lambda: PlanIndex(storage.get_exams(), storage.get_blocked_dates(), today_ord))
+
+
+#   DANE WEJSCIOWE PLANERA: egzaminy, tematy pogrupowane po egzaminie, bariery i dni wolne jako ordinale
+class PlanInputs:
+    def __init__(self, storage, only_unscheduled=False, today=None, mode=None, load_topics=True,
+                 progress=None, cancel_event=None):
+        self.today = today or date.today()
+        self.only_unscheduled = only_unscheduled
+        # progress(zrobione, wszystkie) i cancel_event (threading.Event) - dla planowania w wątku roboczym
+        self.progress = progress
+        self.cancel_event = cancel_event
+        # Wersje tabel sprzed odczytu (tylko StorageManager je śledzi; surowi dostawcy -> None)
+        self.versions = storage.table_versions(PLAN_TABLES) if hasattr(storage, "table_versions") else None
+
+        # Egzaminy, bariery i dni wolne z indeksu (przy przeplanowaniu zwykle z cache, bez odczytu tabel)
+        self.index = get_plan_index(storage, self.today)
+        self.exams = self.index.exams
+        self.blocked = self.index.blocked
+        self.blocked_sorted = self.index.blocked_sorted
+        self.barriers = self.index.barriers
+        self.exam_ords = self.index.exam_ords
+        self.exam_ids_by_day = self.index.exam_ids_by_day
+
+        # Tryb planera i limity dzienne (używane tylko w trybie "capacity")
+        settings = storage.get_settings()
+        self.mode = mode or settings.get("planner_mode", "default")
+        self.max_per_day = _cap_value(settings.get("max_per_day"))
+        self.max_same_subject = _cap_value(settings.get("max_same_subject_per_day"))
+        # Tryb "effort": tematy bez własnego szacunku dostają średni czas ze statystyk
+        self.default_minutes = DEFAULT_TOPIC_MINUTES
+        if self.mode == "effort":
+            self.default_minutes = default_topic_minutes(storage.get_global_stats())
+
+        # Wolne minuty nauki na dzień (plan zajęć + wydarzenia), od dziś do ostatniego egzaminu -
+        # używane we wszystkich trybach, żeby nie planować nauki na dni wypełnione zajęciami
+        self.free_minutes = {}
+        if self.exam_ords:
+            self.free_minutes = get_free_minutes(storage, self.today.toordinal(), self.exam_ords[-1] - 1)
+
+        # Zakres planowania: None = wszystkie egzaminy
+        self.scope = None
+        self.topics = []
+        self.topics_by_exam = {}
+        if load_topics:
+            self.load_topics(storage)
+
+    def load_topics(self, storage, exam_ids=None):
+        # exam_ids=None -> wszystkie tematy; inaczej planujemy tylko te egzaminy
+        self.scope = None if exam_ids is None else set(exam_ids)
+        if self.scope is None or self.mode in GLOBAL_MODES:
+            # Tryby globalne potrzebują też dat pozostałych egzaminów (obciążenie dni)
+            self.topics = storage.get_topics()
+        else:
+            self.topics = [t for e_id in self.scope for t in storage.get_topics(exam_id=e_id)]
+
+        # Tematy w kolejności z bazy, pogrupowane po egzaminie (zamiast get_topics(exam_id) per egzamin)
+        self.topics_by_exam = {}
+        for topic in self.topics:
+            self.topics_by_exam.setdefault(topic["exam_id"], []).append(topic)
+        self.check_cancel()
+
+    def check_cancel(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise PlanCancelled()
+
+    def checkpoint(self, done, total):
+        self.check_cancel()
+        if self.progress:
+            self.progress(done, total)
+
+    def in_scope(self, exam_id):
+        return self.scope is None or exam_id in self.scope
+
+    def planned_exams(self):
+        return [e for e in self.exams if self.in_scope(e["id"])]
+
+    def exams_covering(self, first, last):
+        # Egzaminy, których okno nauki może obejmować któryś dzień z [first, last]:
+        # data egzaminu w (first, pierwsza bariera po last] - dalsze egzaminy zaczynają się od tej bariery
+        first = max(first, self.today.toordinal())
+        if last < first:
+            return set()
+        idx = bisect_right(self.barriers, last)
+        limit = self.barriers[idx] if idx < len(self.barriers) else None
+        lo = bisect_right(self.exam_ords, first)
+        hi = bisect_right(self.exam_ords, limit) if limit is not None else len(self.exam_ords)
+        return set(self.exam_ids_by_day[lo:hi])
+
+    def exam_window(self, exam):
+        # Okno nauki (start, koniec) jako ordinale albo None, jeśli egzamin już był / nie ma daty
+        if not exam["date"]:
+            return None
+        today_ord = self.today.toordinal()
+        exam_ord = date_format(exam["date"]).toordinal()
+        if exam_ord <= today_ord:
+            return None
+
+        end = exam_ord - 1
+        # START = ostatnia bariera w (dziś, koniec]; jeśli brak - dziś
+        idx = bisect_right(self.barriers, end) - 1
+        start = self.barriers[idx] if idx >= 0 and self.barriers[idx] > today_ord else today_ord
+        return start, end
+
+    def pending_rows(self, exam_id):
+        # Odpowiednik topics_list_create: tematy "todo", niezablokowane (opcjonalnie tylko bez daty)
+        return [t for t in self.topics_by_exam.get(exam_id, ())
+                if t["status"] == "todo" and not t["locked"]
+                and (not self.only_unscheduled or not t["scheduled_date"])]
+
+    def pending_topics(self, exam_id):
+        return [t["id"] for t in self.pending_rows(exam_id)]
+
+    def topic_minutes(self, topic):
+        try:
+            minutes = int(topic.get("estimated_minutes") or 0)
+        except (TypeError, ValueError):
+            minutes = 0
+        return minutes if minutes > 0 else self.default_minutes
+
+    def valid_days(self, start, end):
+        return [d for d in range(start, end + 1) if d not in self.blocked]
+
+    def roomy_days(self, days):
+        # Dni, na które mieści się choć jeden typowy temat (pozostałe zajmuje plan zajęć / wydarzenia);
+        # jeśli takich nie ma, zostają wszystkie - wtedy planujemy jak bez planu zajęć
+        free = self.free_minutes
+        return [d for d in days if free.get(d, self.default_minutes) >= self.default_minutes] or days
+
+    def blocked_between(self, start, end):
+        return bisect_right(self.blocked_sorted, end) - bisect_left(self.blocked_sorted, start)
+
+
+#   ROZKŁAD TEMATÓW JEDNEGO EGZAMINU NA DNI OKNA (zwraca listę par (topic_id, ordinal))
+def spread_exam(inputs, t_list, start, end):
+    tasks_total = len(t_list)
+    # W oknie nie ma barier poza dniem startowym, więc poprawne dni = okno minus dni zablokowane
+    days = inputs.valid_days(start, end)
+    if not days or not tasks_total:
+        return []
+
+    # Dni wypełnione zajęciami / wydarzeniami pomijamy
+    days = inputs.roomy_days(days)
+    free = inputs.free_minutes
+
+    if tasks_total <= len(days):
+        # Back-loading: po jednym temacie na ostatnie tasks_total wolnych dni przed egzaminem
+        return list(zip(t_list, days[-tasks_total:]))
+
+    # Więcej tematów niż dni: dynamiczne zagęszczenie ceil(pozostałe * waga_dnia / suma_pozostałych_wag),
+    # waga = wolne minuty dnia; bez planu zajęć wagi są równe, czyli zwykłe ceil(pozostałe / pozostałe_dni)
+    weights = [max(free.get(d, 0), 1) for d in days] if free else [1] * len(days)
+    remaining = sum(weights)
+    queue = deque(t_list)
+    result = []
+    for day, weight in zip(days, weights):
+        per_day = -(-len(queue) * weight // remaining)
+        for _ in range(min(per_day, len(queue))):
+            result.append((queue.popleft(), day))
+        remaining -= weight
+    return result
+
+
+#   PRZYPISANIE DAT WSZYSTKIM EGZAMINOM (bez zapisu do bazy): topic_id -> "YYYY-MM-DD"
+def compute_assignments(inputs):
+    new_dates = {}
+    exams = inputs.planned_exams()
+    for done, exam in enumerate(exams):
+        inputs.checkpoint(done, len(exams))
+        window = inputs.exam_window(exam)
+        if window is None:
+            continue
+        t_list = inputs.pending_topics(exam["id"])
         if not t_list:
             continue
-
-        # Zbieramy listę PRAWIDŁOWYCH dni (niezablokowanych)
-        valid_days = []
-        curr = start_study_date
-        if curr < today: curr = today
-
-        while curr <= end_study_date:
-            has_exam = "E" in callendar.get(curr, [])
-
-            # Konwersja date -> string dla porównania z bazą blocked_dates (TEXT)
-            curr_str = str(curr)
-
-            # Dzień jest valid, jeśli:
-            # a) Nie jest zablokowany
-            # b) ORAZ (nie ma egzaminu LUB ma egzamin, ale jest to dzień startowy - bariera)
-            if curr_str not in blocked_set:
-                if not has_exam or (has_exam and curr == start_study_date):
-                    valid_days.append(curr)
-
-            curr += timedelta(days=1)
-
-        # Sortujemy rosnąco (chronologicznie)
-        valid_days.sort()
-
-        if not valid_days:
+        for topic_id, day in spread_exam(inputs, t_list, *window):
+            new_dates[topic_id] = str(date.fromordinal(day))
+    return new_dates
+
+
+# --- TRYB "capacity": wszystkie egzaminy naraz, z limitami max_per_day / max_same_subject_per_day ---
+
+#   KLUCZ PRZEDMIOTU: subject_id (albo nazwa przedmiotu dla starszych danych)
+def _exam_subject(exam):
+    return exam.get("subject_id") or exam.get("subject") or exam["id"]
+
+
+class CapacityJob:
+    def __init__(self, exam, order, t_list, start, end, valid_days):
+        self.exam_id = exam["id"]
+        self.subject = _exam_subject(exam)
+        self.order = order
+        self.topics = t_list
+        self.queue = list(t_list)
+        self.start = start
+        self.end = end
+        self.valid_days = valid_days
+        # Tempo jak w trybie domyślnym: ceil(tematy / wolne dni) na dzień
+        self.pace = -(-len(t_list) // valid_days)
+        self.days = []
+
+
+#   OBCIĄŻENIE DNI PRZEZ TEMATY, KTÓRE ZACHOWUJĄ SWOJĄ DATĘ (zablokowane / już zaplanowane przy "Doplanuj")
+def _kept_topics(inputs):
+    # (temat, ordinal) dla tematów "todo", które po planowaniu zostaną na swoim dniu (od dziś w przód)
+    today_ord = inputs.today.toordinal()
+    for topic in inputs.topics:
+        if topic["status"] != "todo" or not topic["scheduled_date"]:
+            continue
+        # Tematy spoza zakresu przeplanowania zachowują swoje daty i też zajmują limity
+        if not topic["locked"] and not inputs.only_unscheduled and inputs.in_scope(topic["exam_id"]):
+            continue
+        day = date_format(topic["scheduled_date"])
+        if str(day) != topic["scheduled_date"] or day.toordinal() < today_ord:
+            continue
+        yield topic, day.toordinal()
+
+
+def _fixed_load(inputs, subject_of):
+    day_load, subject_load, day_minutes = {}, {}, {}
+    for topic, day in _kept_topics(inputs):
+        day_load[day] = day_load.get(day, 0) + 1
+        key = (day, subject_of.get(topic["exam_id"], topic["exam_id"]))
+        subject_load[key] = subject_load.get(key, 0) + 1
+        day_minutes[day] = day_minutes.get(day, 0) + inputs.topic_minutes(topic)
+    return day_load, subject_load, day_minutes
+
+
+#   JEDEN PRZEBIEG WSTECZ W CZASIE (EDF w odwróconym czasie, "jak najpóźniej")
+def _capacity_pass(inputs, jobs, day_load, subject_load, day_minutes, minutes_of, use_pace):
+    # Idziemy od najpóźniejszego dnia do najwcześniejszego. Każdego dnia pierwszeństwo ma egzamin,
+    # którego okno zaczyna się najpóźniej - on pierwszy straci możliwość dalszego planowania.
+    # Poza limitami liczby tematów dzień ma też limit wolnych minut (plan zajęć + wydarzenia).
+    pending = sorted((j for j in jobs if j.queue), key=lambda j: j.end, reverse=True)
+    if not pending:
+        return
+    blocked = inputs.blocked
+    heap = []
+    nxt = 0
+    day = pending[0].end
+
+    while heap or nxt < len(pending):
+        inputs.check_cancel()
+        if not heap and pending[nxt].end < day:
+            day = pending[nxt].end  # przeskok przez dni bez aktywnych egzaminów
+        while nxt < len(pending) and pending[nxt].end >= day:
+            job = pending[nxt]
+            heapq.heappush(heap, (-job.start, job.order, job))
+            nxt += 1
+        # Egzaminy, których okno już minęło, wypadają z kolejki (zostają im niezaplanowane tematy)
+        while heap and -heap[0][0] > day:
+            heapq.heappop(heap)
+
+        if heap and day not in blocked:
+            free = inputs.max_per_day - day_load.get(day, 0)
+            free_minutes = inputs.free_minutes.get(day, float("inf"))
+            held = []
+            placed_today = {}
+            while heap and free > 0:
+                entry = heapq.heappop(heap)
+                job = entry[2]
+                key = (day, job.subject)
+                minutes = minutes_of[job.queue[-1]]
+                if subject_load.get(key, 0) >= inputs.max_same_subject or \
+                        day_minutes.get(day, 0) + minutes > free_minutes or \
+                        (use_pace and placed_today.get(job.order, 0) >= job.pace):
+                    held.append(entry)
+                    continue
+                # Od końca kolejki: ostatnie tematy trafiają najbliżej egzaminu
+                job.queue.pop()
+                job.days.append(day)
+                day_minutes[day] = day_minutes.get(day, 0) + minutes
+                placed_today[job.order] = placed_today.get(job.order, 0) + 1
+                day_load[day] = day_load.get(day, 0) + 1
+                subject_load[key] = subject_load.get(key, 0) + 1
+                free -= 1
+                if job.queue:
+                    heapq.heappush(heap, entry)
+            for entry in held:
+                heapq.heappush(heap, entry)
+        day -= 1
+
+
+#   TEMATY, KTÓRE NIE ZMIEŚCIŁY SIĘ W LIMITACH: na najmniej obciążone wolne dni okna
+#   (obciążenie względem wolnego czasu dnia - dni z zajęciami dostają mniej nadmiaru)
+def _overflow(inputs, job, day_load, day_minutes, minutes_of):
+    heap = [(_day_usage(inputs, d, day_minutes.get(d, 0)), -d)
+            for d in inputs.roomy_days(inputs.valid_days(job.start, job.end))]
+    heapq.heapify(heap)
+    while job.queue:
+        minutes = minutes_of[job.queue.pop()]
+        _, neg_day = heapq.heappop(heap)
+        day = -neg_day
+        job.days.append(day)
+        day_load[day] = day_load.get(day, 0) + 1
+        day_minutes[day] = day_minutes.get(day, 0) + minutes
+        heapq.heappush(heap, (_day_usage(inputs, day, day_minutes[day]), neg_day))
+
+
+#   PRZYPISANIE DAT W TRYBIE "capacity": (topic_id -> "YYYY-MM-DD", {exam_id: tematy ponad limit})
+def compute_capacity_assignments(inputs):
+    jobs = []
+    exams = inputs.planned_exams()
+    for order, exam in enumerate(exams):
+        inputs.checkpoint(order, len(exams))
+        window = inputs.exam_window(exam)
+        if window is None:
+            continue
+        t_list = inputs.pending_topics(exam["id"])
+        if not t_list:
+            continue
+        start, end = window
+        valid_days = (end - start + 1) - inputs.blocked_between(start, end)
+        if valid_days:
+            jobs.append(CapacityJob(exam, order, t_list, start, end, valid_days))
+
+    subject_of = {e["id"]: _exam_subject(e) for e in inputs.exams}
+    day_load, subject_load, day_minutes = _fixed_load(inputs, subject_of)
+    minutes_of = {t["id"]: inputs.topic_minutes(t) for t in inputs.topics}
+
+    # 1. Równomierne tempo (jak tryb domyślny) w granicach limitów
+    _capacity_pass(inputs, jobs, day_load, subject_load, day_minutes, minutes_of, use_pace=True)
+    # 2. Reszta: zagęszczamy dni, nadal w granicach limitów
+    _capacity_pass(inputs, jobs, day_load, subject_load, day_minutes, minutes_of, use_pace=False)
+
+    # 3. Egzaminy niewykonalne w limitach - nadmiar ląduje ponad limit i trafia do raportu
+    infeasible = {}
+    new_dates = {}
+    for job in jobs:
+        if job.queue:
+            infeasible[job.exam_id] = len(job.queue)
+            _overflow(inputs, job, day_load, day_minutes, minutes_of)
+        # Kolejność tematów egzaminu zgodna z kolejnością dni
+        for topic_id, day in zip(job.topics, sorted(job.days)):
+            new_dates[topic_id] = str(date.fromordinal(day))
+    return new_dates, infeasible
+
+
+# --- TRYB "effort": wyrównywanie minut nauki na dzień zamiast liczby tematów ---
+
+#   PRZYPISANIE DAT W TRYBIE "effort" (topic_id -> "YYYY-MM-DD")
+def compute_effort_assignments(inputs):
+    # Minuty już zajęte przez tematy, które zachowują datę
+    day_minutes = {}
+    for topic, day in _kept_topics(inputs):
+        day_minutes[day] = day_minutes.get(day, 0) + inputs.topic_minutes(topic)
+
+    new_dates = {}
+    exams = [(window, exam) for exam in inputs.planned_exams() for window in [inputs.exam_window(exam)] if window]
+    # Najpierw egzaminy z wcześniejszym końcem okna - mają mniej dni do wyboru
+    exams.sort(key=lambda item: item[0][1])
+    for done, ((start, end), exam) in enumerate(exams):
+        inputs.checkpoint(done, len(exams))
+        topics = inputs.pending_rows(exam["id"])
+        days = inputs.valid_days(start, end)
+        if not topics or not days:
             continue
 
-        # ALGORYTM ROZKŁADANIA (DYNAMICZNY + OFFSET)
-        days_total = len(valid_days)
-        tasks_total = len(t_list)
-        start_index = 0
-
-        # LOGIKA OFFSETU (Back-loading):
-        # Jeśli mamy mniej zadań niż dni, przesuwamy start, aby zadania były
-        # "przyklejone" do egzaminu, a nie do dnia dzisiejszego.
-        if tasks_total <= days_total:
-            start_index = days_total - tasks_total
-
-        # PĘTLA PLANUJĄCA
-        for i in range(start_index, days_total):
-            if not t_list:
-                break
-
-            current_day = valid_days[i]
-
-            # Przeliczamy zagęszczenie dynamicznie
-            days_remaining_in_loop = days_total - i
-            tasks_remaining_now = len(t_list)
-
-            if days_remaining_in_loop > 0:
-                per_day = math.ceil(tasks_remaining_now / days_remaining_in_loop)
-            else:
-                per_day = tasks_remaining_now
-
-            for _ in range(per_day):
-                if t_list:
-                    # Bierzemy PIERWSZY temat z listy (zachowanie kolejności)
-                    task_id = t_list.pop(0)
-
-                    if current_day in callendar:
-                        callendar[current_day].append(task_id)
-
-    # 4. Zapisanie wyników do bazy danych
-
-    # Pobieramy wszystkie tematy i konwertujemy na dict (mutable),
-    # aby móc je zmodyfikować i zapisać z powrotem.
-    # Używamy get_topics() bez filtrów, by mieć pełną mapę do aktualizacji.
-    all_topics = [dict(t) for t in storage.get_topics()]
-    topics_map = {t["id"]: t for t in all_topics}
-
-    # Krok A: Resetowanie dat (chyba że tryb only_unscheduled)
-    if not only_unscheduled:
-        for topic in all_topics:
-            if topic["status"] == "todo" and not topic["locked"]:
-                topic["scheduled_date"] = None
-
-    # Krok B: Przypisanie nowych dat z kalendarza
-    for date_key, items in callendar.items():
-        for item_id in items:
-            if item_id == "E": continue
-
-            if item_id in topics_map:
-                # Konwersja daty na string dla bazy SQL (TEXT)
-                topics_map[item_id]["scheduled_date"] = str(date_key)
-
-    # Krok C: Commit zmian do StorageManager
-    # Aktualizujemy wszystkie tematy, aby odzwierciedlić zarówno nowe daty, jak i resety (None)
-    if hasattr(storage, 'update_topics_bulk'):
-        storage.update_topics_bulk(all_topics)
+        # Min-kopiec obciążenia dni (wykorzystanie wolnego czasu, -dzień): dni z zajęciami dostają mniej,
+        # przy remisie wygrywa dzień bliżej egzaminu
+        heap = [(_day_usage(inputs, d, day_minutes.get(d, 0)), -d) for d in days]
+        heapq.heapify(heap)
+
+        # Najdłuższe tematy najpierw (LPT); przy równym czasie późniejsze tematy trafiają na późniejsze dni
+        order = sorted(range(len(topics)), key=lambda i: (-inputs.topic_minutes(topics[i]), -i))
+        for i in order:
+            _, neg_day = heapq.heappop(heap)
+            day = -neg_day
+            new_dates[topics[i]["id"]] = str(date.fromordinal(day))
+            day_minutes[day] = day_minutes.get(day, 0) + inputs.topic_minutes(topics[i])
+            heapq.heappush(heap, (_day_usage(inputs, day, day_minutes[day]), neg_day))
+    return new_dates
+
+
+#   WYKORZYSTANIE DNIA: (zaplanowane minuty + typowy temat) / wolne minuty nauki tego dnia
+def _day_usage(inputs, day, minutes):
+    free = inputs.free_minutes.get(day)
+    if free is None:
+        return minutes
+    return (minutes + inputs.default_minutes) / max(free, 1)
+
+
+#   LISTA ZMIAN WZGLĘDEM STANU W BAZIE: [(topic_id, nowa_data), ...]
+def diff_assignments(inputs, new_dates):
+    changes = []
+    for topic in inputs.topics:
+        if not inputs.in_scope(topic["exam_id"]):
+            continue
+        old_date = topic.get("scheduled_date")
+        new_date = old_date
+
+        # Resetowanie dat (chyba że tryb only_unscheduled)
+        if not inputs.only_unscheduled and topic["status"] == "todo" and not topic["locked"]:
+            new_date = None
+        if topic["id"] in new_dates:
+            new_date = new_dates[topic["id"]]
+
+        if new_date != old_date:
+            changes.append((topic["id"], new_date))
+    return changes
+
+
+# --- WYNIK PLANOWANIA (wyliczany bez zapisu, zapisywany osobno przez commit_plan) ---
+
+@dataclass
+class PlanResult:
+    # assignments: "YYYY-MM-DD" -> [topic_id, ...] (nowe daty zaplanowanych tematów, dni posortowane)
+    assignments: dict = field(default_factory=dict)
+    # exam_stats: exam_id -> {"topics", "days", "first", "last", "peak", "unplaced"}
+    exam_stats: dict = field(default_factory=dict)
+    # changes: [(topic_id, nowa_data lub None), ...] - tylko tematy, których data się zmienia
+    changes: list = field(default_factory=list)
+    # infeasible: exam_id -> liczba tematów ponad limity (tryb "capacity")
+    infeasible: dict = field(default_factory=dict)
+    mode: str = "default"
+    # versions: wersje PLAN_TABLES z chwili odczytu danych (None = bez sprawdzania w commit_plan)
+    versions: tuple = None
+
+    @property
+    def moved_count(self):
+        return len(self.changes)
+
+
+#   STATYSTYKI OBCIĄŻENIA EGZAMINÓW I PRZYPISANIA DZIEŃ -> TEMATY
+def _summarize(inputs, new_dates, infeasible):
+    exam_of = {t["id"]: t["exam_id"] for t in inputs.topics}
+    assignments = {}
+    per_exam = {}
+    for topic_id, day in new_dates.items():
+        assignments.setdefault(day, []).append(topic_id)
+        days = per_exam.setdefault(exam_of[topic_id], {})
+        days[day] = days.get(day, 0) + 1
+
+    exam_stats = {}
+    for exam_id, days in per_exam.items():
+        exam_stats[exam_id] = {
+            "topics": sum(days.values()),
+            "days": len(days),
+            "first": min(days),
+            "last": max(days),
+            "peak": max(days.values()),
+            "unplaced": infeasible.get(exam_id, 0)
+        }
+    return dict(sorted(assignments.items())), exam_stats
+
+
+#   WYLICZENIE PLANU DLA EGZAMINÓW Z ZAKRESU inputs (bez zapisu do bazy)
+def _compute(inputs):
+    if inputs.mode == "capacity":
+        new_dates, infeasible = compute_capacity_assignments(inputs)
+    elif inputs.mode == "effort":
+        new_dates, infeasible = compute_effort_assignments(inputs), {}
+    else:
+        new_dates, infeasible = compute_assignments(inputs), {}
+    assignments, exam_stats = _summarize(inputs, new_dates, infeasible)
+    inputs.checkpoint(1, 1)
+    return PlanResult(assignments=assignments, exam_stats=exam_stats,
+                      changes=diff_assignments(inputs, new_dates), infeasible=infeasible, mode=inputs.mode,
+                      versions=inputs.versions)
+
+
+#   PEŁNE PLANOWANIE BEZ ZAPISU (podgląd, narzędzia wsadowe)
+def compute_plan(storage, only_unscheduled=False, mode=None, progress=None, cancel_event=None):
+    # Jednorazowe wczytanie danych (egzaminy, tematy, dni wolne, ustawienia)
+    inputs = PlanInputs(storage, only_unscheduled, mode=mode, progress=progress, cancel_event=cancel_event)
+    return _compute(inputs)
+
+
+#   ZAPIS WYNIKU: tylko zmienione daty tematów
+def commit_plan(storage, result):
+    # Plan liczony na starych danych (zapis w tle, sync, inne okno) nie może nadpisać nowszych dat
+    if result.versions is not None and storage.table_versions(PLAN_TABLES) != result.versions:
+        raise PlanStale()
+    if hasattr(storage, 'update_topic_dates'):
+        storage.update_topic_dates(result.changes)
     else:
-        for topic in all_topics:
-            storage.update_topic(topic)
\ No newline at end of file
+        for topic_id, new_date in result.changes:
+            topic = storage.get_topic(topic_id)
+            if topic:
+                topic["scheduled_date"] = new_date
+                storage.update_topic(topic)
+    return result.moved_count
+
+
+#   GLOWNA FUNKCJA PLANUJACA (wyliczenie + zapis)
+def plan(storage, only_unscheduled=False, mode=None):
+    result = compute_plan(storage, only_unscheduled, mode)
+    commit_plan(storage, result)
+    return result
+
+
+# --- PRZEPLANOWANIE PRZYROSTOWE (tylko egzaminy, których dotyczy zmiana) ---
+
+CHANGE_BLOCK_DATE = "block_date"
+CHANGE_UNBLOCK_DATE = "unblock_date"
+CHANGE_TOPIC_DONE = "topic_done"
+CHANGE_TOPIC_ADDED = "topic_added"
+CHANGE_EXAM_MOVED = "exam_moved"
+
+
+#   EGZAMINY, KTÓRYCH OKNA OBEJMUJE ZMIANA
+def affected_exams(storage, inputs, kind, target, old_date=None):
+    if kind in (CHANGE_BLOCK_DATE, CHANGE_UNBLOCK_DATE):
+        day = date_format(target)
+        if str(day) != target:
+            return set()
+        return inputs.exams_covering(day.toordinal(), day.toordinal())
+
+    if kind in (CHANGE_TOPIC_DONE, CHANGE_TOPIC_ADDED):
+        topic = storage.get_topic(target)
+        return {topic["exam_id"]} if topic else set()
+
+    if kind == CHANGE_EXAM_MOVED:
+        affected = {target}
+        exam = inputs.index.exam_by_id.get(target)
+        if exam is None or exam["ignore_barrier"]:
+            return affected
+        # Przesunięta bariera zmienia start okien egzaminów między starą a nową datą (i do kolejnej bariery)
+        days = [date_format(d).toordinal() for d in (old_date, exam["date"]) if d]
+        if days:
+            affected |= inputs.exams_covering(min(days), max(days))
+        return affected
+
+    raise ValueError(f"Unknown change kind: {kind}")
+
+
+#   PRZEPLANOWANIE PO POJEDYNCZEJ ZMIANIE, BEZ ZAPISU (pozostałe przypisania zostają nietknięte)
+def compute_replan(storage, kind, target, old_date=None, mode=None, progress=None, cancel_event=None):
+    inputs = PlanInputs(storage, mode=mode, load_topics=False, progress=progress, cancel_event=cancel_event)
+    exam_ids = affected_exams(storage, inputs, kind, target, old_date)
+    if not exam_ids:
+        return PlanResult(mode=inputs.mode)
+    inputs.load_topics(storage, exam_ids)
+    return _compute(inputs)
+
+
+def replan(storage, kind, target, old_date=None, mode=None):
+    result = compute_replan(storage, kind, target, old_date, mode)
+    commit_plan(storage, result)
+    return result
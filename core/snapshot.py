@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+
+# Tabele potrzebne dashboardowi i plakietkom (czytane razem, w jednej transakcji)
+SNAPSHOT_TABLES = ("exams", "topics", "daily_tasks", "settings", "global_stats")
+
+
+def _group_by(rows, key):
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.get(key) or "", []).append(row)
+    return MappingProxyType({k: tuple(v) for k, v in groups.items()})
+
+
+@dataclass(frozen=True)
+class AppSnapshot:
+    # Wiersze są niemodyfikowalne (MappingProxyType), kolekcje to krotki
+    exams: tuple
+    topics: tuple
+    daily_tasks: tuple
+    settings: MappingProxyType
+    global_stats: MappingProxyType
+    exam_by_id: MappingProxyType
+    topics_by_exam: MappingProxyType
+    topics_by_date: MappingProxyType
+    tasks_by_date: MappingProxyType
+
+    @classmethod
+    def from_tables(cls, tables):
+        # tables: zamrożone dane z EntityCache.get_frozen_many (tabela -> krotka wierszy / mapa)
+        exams = tables["exams"]
+        topics = tables["topics"]
+        daily_tasks = tables["daily_tasks"]
+        return cls(
+            exams=exams,
+            topics=topics,
+            daily_tasks=daily_tasks,
+            settings=tables["settings"],
+            global_stats=tables["global_stats"],
+            exam_by_id=MappingProxyType({e["id"]: e for e in exams}),
+            topics_by_exam=_group_by(topics, "exam_id"),
+            # Klucz "" = brak daty (tematy niezaplanowane / zadania bez terminu)
+            topics_by_date=_group_by(topics, "scheduled_date"),
+            tasks_by_date=_group_by(daily_tasks, "date"),
+        )
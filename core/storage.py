@@ -1,19 +1,21 @@
 import json
 import sqlite3
 import datetime
+import hashlib
 import uuid
 from pathlib import Path
 import platformdirs
 from abc import ABC, abstractmethod
 import threading
+from core.cache import EntityCache
+from core.outbox import Outbox
+from core.sync_fetch import TableFetcher
+from core.snapshot import AppSnapshot, SNAPSHOT_TABLES
 
-# Próba importu supabase
-try:
-    from supabase import create_client, Client
+# Sprawdzenie, czy supabase jest dostępne (sam import jest ciężki - robimy go dopiero przy łączeniu z chmurą)
+import importlib.util
 
-    SUPABASE_AVAILABLE = True
-except ImportError:
-    SUPABASE_AVAILABLE = False
+SUPABASE_AVAILABLE = importlib.util.find_spec("supabase") is not None
 
 # --- KONFIGURACJA ŚRODOWISKA ---
 USE_SYSTEM_STORAGE = True
@@ -50,6 +52,9 @@ DEFAULT_DATA = {
     "settings": {
         "max_per_day": 2,
         "max_same_subject_per_day": 1,
+        "planner_mode": "default",
+        "study_day_start": "08:00",
+        "study_day_end": "22:00",
         "lang": "en",
         "theme": "dark",
         "next_exam_switch_hour": 24,
@@ -298,7 +303,8 @@ SQL_SCHEMA = """
                  status TEXT,
                  scheduled_date DATE,
                  locked BOOLEAN DEFAULT FALSE,
-                 note TEXT
+                 note TEXT,
+                 estimated_minutes INTEGER
                  );
 
 -- 5. OCENY I MODUŁY
@@ -424,6 +430,123 @@ SQL_SCHEMA = """
                  );
              """
 
+# --- SYNCHRONIZACJA PRZYROSTOWA (delta sync) ---
+# Tabele pobierane z chmury: nazwa -> kolumna klucza (kolejność: rodzice przed dziećmi)
+SYNC_TABLES = {
+    "settings": "key",
+    "global_stats": "key",
+    "stats": "key",
+    "achievements": "achievement_id",
+    "blocked_dates": "date",
+    "custom_sounds": "id",
+    "semesters": "id",
+    "subjects": "id",
+    "subscriptions": "id",
+    "event_lists": "id",
+    "custom_events": "id",
+    "exams": "id",
+    "topics": "id",
+    "grade_modules": "id",
+    "grades": "id",
+    "task_lists": "id",
+    "daily_tasks": "id",
+    "schedule_entries": "id",
+    "schedule_cancellations": "id",
+}
+# Kolumny JSON (w chmurze JSONB, lokalnie tekst z json.dumps)
+SYNC_JSON_COLUMNS = {"settings": "value", "global_stats": "value", "stats": "value", "custom_sounds": "steps_json"}
+# Kolumny BOOLEAN w chmurze (lokalnie INTEGER 0/1)
+SYNC_BOOL_COLUMNS = {"semesters": ("is_current",), "subscriptions": ("is_active",), "custom_events": ("is_recurring",),
+                     "exams": ("ignore_barrier",), "topics": ("locked",)}
+# Tabele klucz-wartość: przy pełnym pobraniu tylko nadpisujemy klucze, lokalnych nie usuwamy
+SYNC_MERGE_ONLY = ("settings", "global_stats", "stats")
+# Wiersz w sync_state z punktem kontrolnym dla usunięć
+SYNC_TOMBSTONES = "sync_tombstones"
+# Wiersz w sync_state z adresem projektu Supabase - punkty kontrolne innego projektu są nieważne
+SYNC_SOURCE = "_source"
+SYNC_PAGE_SIZE = 1000
+# Margines punktu kontrolnego [s]: updated_at / deleted_at w chmurze to now(), czyli czas STARTU transakcji, więc
+# wiersz zatwierdzony po naszym pobraniu może mieć znacznik starszy niż najnowszy pobrany. Zapisujemy znacznik
+# cofnięty o ten margines - kolejne pobranie powtórzy końcówkę (upserty są idempotentne), ale niczego nie pominie.
+SYNC_SAFETY_WINDOW = 300
+
+
+#   ZNACZNIK CZASU COFNIĘTY O SYNC_SAFETY_WINDOW (znaczniki nie-ISO, np. licznik MemoryProvider, bez zmian)
+def rewind_sync_mark(mark, seconds=SYNC_SAFETY_WINDOW):
+    if not isinstance(mark, str) or "-" not in mark:
+        return mark
+    try:
+        stamp = datetime.datetime.fromisoformat(mark.replace("Z", "+00:00"))
+    except ValueError:
+        return mark
+    return (stamp - datetime.timedelta(seconds=seconds)).isoformat()
+
+# Kolumna updated_at + triggery: każda zmiana podbija updated_at, każde usunięcie zostawia wpis w sync_tombstones
+SQL_SCHEMA += """
+-- 7. SYNCHRONIZACJA PRZYROSTOWA
+ALTER TABLE subscriptions ADD COLUMN IF NOT EXISTS billing_date DATE;
+
+CREATE TABLE IF NOT EXISTS sync_tombstones
+(
+    table_name TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (table_name, row_key)
+);
+CREATE INDEX IF NOT EXISTS sync_tombstones_deleted_at ON sync_tombstones (deleted_at);
+
+CREATE OR REPLACE FUNCTION sync_touch() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_tombstone() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO sync_tombstones (table_name, row_key)
+    VALUES (TG_TABLE_NAME, to_jsonb(OLD) ->> TG_ARGV[0])
+    ON CONFLICT (table_name, row_key) DO UPDATE SET deleted_at = now();
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE t RECORD;
+BEGIN
+    FOR t IN SELECT * FROM (VALUES """ + ", ".join(f"('{table}', '{key}')" for table, key in SYNC_TABLES.items()) + """) AS v(name, pk)
+    LOOP
+        EXECUTE format('ALTER TABLE %I ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now()', t.name);
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I (updated_at)', t.name || '_updated_at', t.name);
+        EXECUTE format('DROP TRIGGER IF EXISTS sync_touch ON %I', t.name);
+        EXECUTE format('CREATE TRIGGER sync_touch BEFORE INSERT OR UPDATE ON %I FOR EACH ROW EXECUTE FUNCTION sync_touch()', t.name);
+        EXECUTE format('DROP TRIGGER IF EXISTS sync_tombstone ON %I', t.name);
+        EXECUTE format('CREATE TRIGGER sync_tombstone AFTER DELETE ON %I FOR EACH ROW EXECUTE FUNCTION sync_tombstone(%L)', t.name, t.pk);
+    END LOOP;
+END;
+$$;
+"""
+
+# Zmiana dat tematów po planowaniu: UPDATE ... FROM (bez wstawiania tematów usuniętych w międzyczasie)
+SQL_SCHEMA += """
+-- 8. ZAPIS DAT TEMATÓW
+CREATE OR REPLACE FUNCTION update_topic_dates(changes JSONB) RETURNS INTEGER AS $$
+DECLARE updated INTEGER;
+BEGIN
+    UPDATE topics t SET scheduled_date = c.scheduled_date
+    FROM jsonb_to_recordset(changes) AS c(id TEXT, scheduled_date DATE)
+    WHERE t.id = c.id;
+    GET DIAGNOSTICS updated = ROW_COUNT;
+    RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+#   ID ODWOŁANIA ZAJĘĆ: stałe dla (wpis, dzień), więc ponowna wysyłka z kolejki nie tworzy duplikatu
+def cancellation_id(entry_id, date_str):
+    return f"cancel_{hashlib.sha1(f'{entry_id}|{date_str}'.encode()).hexdigest()[:8]}"
+
 
 # --- ABSTRAKCYJNY DOSTAWCA DANYCH ---
 class BaseProvider(ABC):
@@ -439,6 +562,9 @@ class BaseProvider(ABC):
     @abstractmethod
     def update_global_stat(self, key, value): pass
 
+    @abstractmethod
+    def update_global_stats(self, stats_dict): pass
+
     @abstractmethod
     def get_other_stats(self): pass
 
@@ -487,6 +613,9 @@ class BaseProvider(ABC):
     @abstractmethod
     def update_topics_bulk(self, topics_list): pass
 
+    @abstractmethod
+    def update_topic_dates(self, changes): pass
+
     @abstractmethod
     def delete_topic(self, topic_id): pass
 
@@ -605,21 +734,84 @@ class BaseProvider(ABC):
     def restore_overdue_tasks(self, today_str): pass
 
 
+# --- INDEKSY LOKALNEJ BAZY ---
+# Zarządzany zestaw indeksów (nazwa -> tabela, kolumny). Migracja tworzy brakujące
+# i usuwa przestarzałe indeksy z prefiksem "idx_", więc wystarczy edytować tę listę.
+LOCAL_INDEXES = {
+    "idx_topics_exam": ("topics", ("exam_id",)),
+    "idx_topics_scheduled_status": ("topics", ("scheduled_date", "status")),
+    "idx_daily_tasks_date_status": ("daily_tasks", ("date", "status")),
+    "idx_daily_tasks_status_date": ("daily_tasks", ("status", "date")),
+    "idx_grades_subject_module": ("grades", ("subject_id", "module_id")),
+    "idx_grade_modules_subject": ("grade_modules", ("subject_id",)),
+    "idx_schedule_entries_subject": ("schedule_entries", ("subject_id",)),
+    "idx_schedule_cancellations_entry": ("schedule_cancellations", ("entry_id", "date")),
+    "idx_subjects_semester": ("subjects", ("semester_id",)),
+    "idx_exams_subject": ("exams", ("subject_id",)),
+    "idx_sync_outbox_key": ("sync_outbox", ("coalesce_key",)),
+}
+
+
 # --- DOSTAWCA: LOKALNY SQLITE ---
 class SQLiteProvider(BaseProvider):
-    def __init__(self, db_path):
+    # Egzaminy z nazwą i kolorem przedmiotu (wspólne dla get_exams i read_tables)
+    EXAMS_SQL = "SELECT e.*, s.name as subject_name, s.color as subject_color FROM exams e LEFT JOIN subjects s ON e.subject_id = s.id"
+
+    def __init__(self, db_path, migrate_legacy_json=True):
         self.db_path = db_path
+        # Import starego storage.json dotyczy tylko bazy użytkownika aplikacji (nie baz wsadowych)
+        self.migrate_legacy_json = migrate_legacy_json
+
+        # Pula połączeń: jedno trwałe połączenie na wątek (zamiast nowego przy każdym zapytaniu)
+        self._local = threading.local()
+        self._conns = {}
+        self._conns_lock = threading.Lock()
+        self.connections_opened = 0
+
         self._init_db()
         self._check_migrations()
         self._ensure_default_sounds()
 
     def _get_conn(self):
-        conn = sqlite3.connect(self.db_path, timeout=20)
+        # "with conn:" zatwierdza/wycofuje transakcję, ale nie zamyka połączenia,
+        # więc wszystkie metody mogą bezpiecznie współdzielić połączenie danego wątku
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        # check_same_thread=False tylko po to, żeby close() mógł zamknąć połączenia innych wątków
+        conn = sqlite3.connect(self.db_path, timeout=20, check_same_thread=False)
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA foreign_keys = ON;")
         conn.execute("PRAGMA journal_mode = WAL;")
+
+        thread = threading.current_thread()
+        with self._conns_lock:
+            # Sprzątanie połączeń po wątkach, które już się zakończyły (np. splash / sync)
+            for ident, (owner, old_conn) in list(self._conns.items()):
+                if not owner.is_alive():
+                    old_conn.close()
+                    del self._conns[ident]
+            self._conns[thread.ident] = (thread, conn)
+            self.connections_opened += 1
+
+        self._local.conn = conn
         return conn
 
+    def connection_stats(self):
+        with self._conns_lock:
+            return {"opened": self.connections_opened, "open": len(self._conns)}
+
+    def close(self):
+        with self._conns_lock:
+            for owner, conn in self._conns.values():
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._conns.clear()
+        self._local = threading.local()
+
     def _init_db(self):
         with self._get_conn() as conn:
             conn.execute("""CREATE TABLE IF NOT EXISTS exams
@@ -674,6 +866,8 @@ class SQLiteProvider(BaseProvider):
                 0,
                 note
                 TEXT,
+                estimated_minutes
+                INTEGER,
                 FOREIGN
                 KEY
                             (
@@ -961,6 +1155,8 @@ class SQLiteProvider(BaseProvider):
                 INTEGER
                 DEFAULT
                 1,
+                billing_date
+                TEXT,
                 FOREIGN
                 KEY
                             (
@@ -971,6 +1167,38 @@ class SQLiteProvider(BaseProvider):
                             ) ON DELETE SET NULL
                 )""")
 
+            # Trwała kolejka zapisów do chmury (core/outbox.py) - przetrwa zamknięcie aplikacji
+            conn.execute("""CREATE TABLE IF NOT EXISTS sync_outbox
+            (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                method TEXT NOT NULL,
+                args_json TEXT NOT NULL,
+                coalesce_key TEXT,
+                created_at REAL NOT NULL,
+                attempts INTEGER DEFAULT 0,
+                next_attempt REAL DEFAULT 0,
+                last_error TEXT,
+                sending INTEGER DEFAULT 0,
+                failed INTEGER DEFAULT 0
+            )""")
+
+            # Punkty kontrolne migracji do chmury (core/migration.py): ostatni wysłany klucz tabeli
+            conn.execute("""CREATE TABLE IF NOT EXISTS migration_checkpoints
+            (
+                table_name TEXT PRIMARY KEY,
+                target TEXT,
+                last_key TEXT,
+                rows_done INTEGER DEFAULT 0,
+                finished INTEGER DEFAULT 0
+            )""")
+
+            # Punkty kontrolne synchronizacji: tabela -> najnowszy pobrany updated_at z chmury
+            conn.execute("""CREATE TABLE IF NOT EXISTS sync_state
+            (
+                table_name TEXT PRIMARY KEY,
+                high_water TEXT
+            )""")
+
             try:
                 conn.execute(
                     "ALTER TABLE grades ADD COLUMN module_id TEXT REFERENCES grade_modules(id) ON DELETE SET NULL")
@@ -992,10 +1220,13 @@ class SQLiteProvider(BaseProvider):
             if conn.execute("SELECT count(*) FROM exams").fetchone()[0] == 0:
                 if conn.execute("SELECT count(*) FROM settings").fetchone()[0] == 0:
                     should_migrate_json = True
-        if should_migrate_json and OLD_JSON_PATH.exists(): self._migrate_json_to_sql()
+        if should_migrate_json and self.migrate_legacy_json and OLD_JSON_PATH.exists(): self._migrate_json_to_sql()
         self._migrate_to_relational_schema()
         self._migrate_subjects_add_dates()
         self._migrate_exams_add_time()
+        self._migrate_topics_add_estimate()
+        self._migrate_subscriptions_add_billing_date()
+        self._migrate_indexes()
 
     def _migrate_json_to_sql(self):
         try:
@@ -1105,14 +1336,62 @@ class SQLiteProvider(BaseProvider):
                     pass
             conn.commit()
 
-    def get_settings(self):
-        res = {}
+    def _migrate_topics_add_estimate(self):
         with self._get_conn() as conn:
-            for r in conn.execute("SELECT key, value FROM settings"):
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(topics)")]
+            if "estimated_minutes" not in columns:
                 try:
-                    res[r["key"]] = json.loads(r["value"])
-                except:
-                    res[r["key"]] = r["value"]
+                    conn.execute("ALTER TABLE topics ADD COLUMN estimated_minutes INTEGER")
+                except sqlite3.OperationalError:
+                    pass
+            conn.commit()
+
+    def _migrate_subscriptions_add_billing_date(self):
+        with self._get_conn() as conn:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(subscriptions)")]
+            if "billing_date" not in columns:
+                try:
+                    conn.execute("ALTER TABLE subscriptions ADD COLUMN billing_date TEXT")
+                except sqlite3.OperationalError:
+                    pass
+            conn.commit()
+
+    def _migrate_indexes(self):
+        with self._get_conn() as conn:
+            # "_" w LIKE to dowolny znak - bez ESCAPE pasowałyby też cudze indeksy typu "idxfoo"
+            existing = {r["name"]: r["sql"] for r in
+                        conn.execute("SELECT name, sql FROM sqlite_master WHERE type='index' "
+                                     "AND name LIKE 'idx\\_%' ESCAPE '\\'")}
+            for name, sql in existing.items():
+                wanted = LOCAL_INDEXES.get(name)
+                # Usuwamy indeksy spoza listy oraz te, których definicja się zmieniła
+                if not wanted or sql != self._index_sql(name, *wanted):
+                    conn.execute(f"DROP INDEX IF EXISTS {name}")
+            for name, (table, columns) in LOCAL_INDEXES.items():
+                conn.execute(self._index_sql(name, table, columns).replace("CREATE INDEX", "CREATE INDEX IF NOT EXISTS", 1))
+            conn.commit()
+
+    @staticmethod
+    def _index_sql(name, table, columns):
+        # Format zgodny z tym, co SQLite zapisuje w sqlite_master.sql
+        return f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"
+
+    @staticmethod
+    def _decode_kv_rows(rows):
+        res = {}
+        for r in rows:
+            try:
+                res[r["key"]] = json.loads(r["value"])
+            except:
+                res[r["key"]] = r["value"]
+        return res
+
+    def get_settings(self):
+        with self._get_conn() as conn:
+            return self._settings_from_rows(conn.execute("SELECT key, value FROM settings"))
+
+    def _settings_from_rows(self, rows):
+        res = self._decode_kv_rows(rows)
         defaults = DEFAULT_DATA["settings"].copy()
         for k, v in res.items():
             if k in defaults and isinstance(defaults[k], dict) and isinstance(v, dict):
@@ -1127,13 +1406,11 @@ class SQLiteProvider(BaseProvider):
             conn.commit()
 
     def get_global_stats(self):
-        res = {}
         with self._get_conn() as conn:
-            for r in conn.execute("SELECT key, value FROM global_stats"):
-                try:
-                    res[r["key"]] = json.loads(r["value"])
-                except:
-                    res[r["key"]] = r["value"]
+            return self._global_stats_from_rows(conn.execute("SELECT key, value FROM global_stats"))
+
+    def _global_stats_from_rows(self, rows):
+        res = self._decode_kv_rows(rows)
         defaults = DEFAULT_DATA["global_stats"].copy()
         defaults.update(res)
         return defaults
@@ -1143,6 +1420,13 @@ class SQLiteProvider(BaseProvider):
             conn.execute("INSERT OR REPLACE INTO global_stats (key, value) VALUES (?, ?)", (key, json.dumps(value)))
             conn.commit()
 
+    def update_global_stats(self, stats_dict):
+        # Kilka statystyk w jednej transakcji (np. zrzut czasu nauki z timera)
+        with self._get_conn() as conn:
+            conn.executemany("INSERT OR REPLACE INTO global_stats (key, value) VALUES (?, ?)",
+                             [(k, json.dumps(v)) for k, v in stats_dict.items()])
+            conn.commit()
+
     def get_other_stats(self):
         res = {}
         with self._get_conn() as conn:
@@ -1206,17 +1490,39 @@ class SQLiteProvider(BaseProvider):
             return None
 
     def get_exams(self):
-        sql = "SELECT e.*, s.name as subject_name, s.color as subject_color FROM exams e LEFT JOIN subjects s ON e.subject_id = s.id"
         with self._get_conn() as conn:
-            results = []
-            for r in conn.execute(sql).fetchall():
-                d = dict(r)
-                if d.get("subject_name"): d["subject"] = d["subject_name"]
-                if d.get("subject_color"): d["color"] = d["subject_color"]
-                results.append(d)
-            return results
+            return self._exams_from_rows(conn.execute(self.EXAMS_SQL).fetchall())
+
+    @staticmethod
+    def _exams_from_rows(rows):
+        results = []
+        for r in rows:
+            d = dict(r)
+            if d.get("subject_name"): d["subject"] = d["subject_name"]
+            if d.get("subject_color"): d["color"] = d["subject_color"]
+            results.append(d)
+        return results
+
+    def read_tables(self, tables):
+        # Odczyt kilku tabel w JEDNEJ transakcji (spójny stan, np. dla dashboardu)
+        readers = {
+            "exams": lambda c: self._exams_from_rows(c.execute(self.EXAMS_SQL).fetchall()),
+            "topics": lambda c: [dict(r) for r in c.execute("SELECT * FROM topics").fetchall()],
+            "daily_tasks": lambda c: [dict(r) for r in c.execute("SELECT * FROM daily_tasks").fetchall()],
+            "settings": lambda c: self._settings_from_rows(c.execute("SELECT key, value FROM settings")),
+            "global_stats": lambda c: self._global_stats_from_rows(c.execute("SELECT key, value FROM global_stats")),
+            "blocked_dates": lambda c: [r["date"] for r in c.execute("SELECT date FROM blocked_dates").fetchall()],
+        }
+        conn = self._get_conn()
+        conn.execute("BEGIN")
+        try:
+            return {t: readers[t](conn) for t in tables}
+        finally:
+            conn.commit()
 
+    #   ZWRACA automatycznie utworzony przedmiot (albo None) - StorageManager wysyła go do chmury przed egzaminem
     def add_exam(self, exam_dict):
+        created = None
         with self._get_conn() as conn:
             subj_id = exam_dict.get("subject_id")
             if not subj_id and exam_dict.get("subject"):
@@ -1226,11 +1532,14 @@ class SQLiteProvider(BaseProvider):
                 else:
                     sem = conn.execute("SELECT id FROM semesters LIMIT 1").fetchone()
                     if sem:
-                        new_sid = f"sub_{uuid.uuid4().hex[:8]}"
+                        created = {"id": f"sub_{uuid.uuid4().hex[:8]}", "semester_id": sem[0],
+                                   "name": exam_dict["subject"], "short_name": exam_dict["subject"][:3],
+                                   "color": "#3498db"}
                         conn.execute(
                             "INSERT INTO subjects (id, semester_id, name, short_name, color) VALUES (?, ?, ?, ?, ?)",
-                            (new_sid, sem[0], exam_dict["subject"], exam_dict["subject"][:3], "#3498db"))
-                        subj_id = new_sid
+                            (created["id"], created["semester_id"], created["name"], created["short_name"],
+                             created["color"]))
+                        subj_id = created["id"]
             conn.execute("""
                          INSERT INTO exams (id, subject_id, subject, title, date, time, note, ignore_barrier, color)
                          VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -1238,6 +1547,7 @@ class SQLiteProvider(BaseProvider):
                                exam_dict.get("time"), exam_dict.get("note", ""),
                                1 if exam_dict.get("ignore_barrier") else 0, exam_dict.get("color")))
             conn.commit()
+        return created
 
     def update_exam(self, exam_dict):
         with self._get_conn() as conn:
@@ -1271,29 +1581,39 @@ class SQLiteProvider(BaseProvider):
     def add_topic(self, topic_dict):
         with self._get_conn() as conn:
             conn.execute(
-                "INSERT INTO topics (id, exam_id, name, status, scheduled_date, locked, note) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                "INSERT INTO topics (id, exam_id, name, status, scheduled_date, locked, note, estimated_minutes) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
                 (topic_dict["id"], topic_dict["exam_id"], topic_dict["name"], topic_dict["status"],
-                 topic_dict.get("scheduled_date"), 1 if topic_dict.get("locked") else 0, topic_dict.get("note", "")))
+                 topic_dict.get("scheduled_date"), 1 if topic_dict.get("locked") else 0, topic_dict.get("note", ""),
+                 topic_dict.get("estimated_minutes") or None))
             conn.commit()
 
     def update_topic(self, topic_dict):
         with self._get_conn() as conn:
             conn.execute(
-                "UPDATE topics SET exam_id=?, name=?, status=?, scheduled_date=?, locked=?, note=? WHERE id = ?",
+                "UPDATE topics SET exam_id=?, name=?, status=?, scheduled_date=?, locked=?, note=?, estimated_minutes=? WHERE id = ?",
                 (topic_dict["exam_id"], topic_dict["name"], topic_dict["status"], topic_dict.get("scheduled_date"),
-                 1 if topic_dict.get("locked") else 0, topic_dict.get("note", ""), topic_dict["id"]))
+                 1 if topic_dict.get("locked") else 0, topic_dict.get("note", ""),
+                 topic_dict.get("estimated_minutes") or None, topic_dict["id"]))
             conn.commit()
 
     def update_topics_bulk(self, topics_list):
         with self._get_conn() as conn:
             for t in topics_list:
                 conn.execute(
-                    "UPDATE topics SET exam_id=?, name=?, status=?, scheduled_date=?, locked=?, note=? WHERE id = ?",
+                    "UPDATE topics SET exam_id=?, name=?, status=?, scheduled_date=?, locked=?, note=?, estimated_minutes=? WHERE id = ?",
                     (t["exam_id"], t["name"], t["status"], t.get("scheduled_date"),
-                     1 if t.get("locked") else 0, t.get("note", ""), t["id"])
+                     1 if t.get("locked") else 0, t.get("note", ""), t.get("estimated_minutes") or None, t["id"])
                 )
             conn.commit()
 
+    def update_topic_dates(self, changes):
+        # changes: lista par (topic_id, scheduled_date) - tylko zmienione tematy, jedno executemany
+        if not changes: return
+        with self._get_conn() as conn:
+            conn.executemany("UPDATE topics SET scheduled_date=? WHERE id=?",
+                             [(new_date, topic_id) for topic_id, new_date in changes])
+            conn.commit()
+
     def delete_topic(self, topic_id):
         with self._get_conn() as conn:
             conn.execute("DELETE FROM topics WHERE id=?", (topic_id,))
@@ -1449,10 +1769,9 @@ class SQLiteProvider(BaseProvider):
             conn.commit()
 
     def add_schedule_cancellation(self, entry_id, date_str):
-        new_id = f"cancel_{uuid.uuid4().hex[:8]}"
         with self._get_conn() as conn:
-            conn.execute("INSERT INTO schedule_cancellations (id, entry_id, date) VALUES (?, ?, ?)",
-                         (new_id, entry_id, date_str))
+            conn.execute("INSERT OR IGNORE INTO schedule_cancellations (id, entry_id, date) VALUES (?, ?, ?)",
+                         (cancellation_id(entry_id, date_str), entry_id, date_str))
             conn.commit()
 
     def get_schedule_cancellations(self):
@@ -1571,12 +1890,6 @@ class SQLiteProvider(BaseProvider):
 
     def add_subscription(self, sub_dict):
         with self._get_conn() as conn:
-            # Dodajemy ALTER TABLE w razie gdyby lokalna baza nie miała jeszcze tej kolumny
-            try:
-                conn.execute("ALTER TABLE subscriptions ADD COLUMN billing_date TEXT")
-            except sqlite3.OperationalError:
-                pass
-
             conn.execute("""INSERT INTO subscriptions
                             (id, subject_id, name, provider, expiry_date, cost, currency, billing_cycle, note,
                              is_active, billing_date)
@@ -1614,13 +1927,125 @@ class SQLiteProvider(BaseProvider):
             conn.execute("DELETE FROM subscriptions WHERE id=?", (sub_id,))
             conn.commit()
 
+    # --- MIGRACJA DO CHMURY ---
+    def count_rows(self, table):
+        with self._get_conn() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    #   KOLEJNA PORCJA WIERSZY PO KLUCZU (stronicowanie po kluczu - wznowienie od dowolnego miejsca bez OFFSET)
+    def read_rows_after(self, table, after_key=None, limit=500):
+        key = SYNC_TABLES[table]
+        with self._get_conn() as conn:
+            if after_key is None:
+                rows = conn.execute(f"SELECT * FROM {table} ORDER BY {key} LIMIT ?", (limit,))
+            else:
+                rows = conn.execute(f"SELECT * FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?", (after_key, limit))
+            return [dict(r) for r in rows]
+
+    def get_migration_checkpoints(self, target):
+        with self._get_conn() as conn:
+            return {r["table_name"]: dict(r) for r in
+                    conn.execute("SELECT * FROM migration_checkpoints WHERE target = ?", (target,))}
+
+    def save_migration_checkpoint(self, target, table, last_key, rows_done, finished=False):
+        with self._get_conn() as conn:
+            conn.execute("""INSERT OR REPLACE INTO migration_checkpoints
+                            (table_name, target, last_key, rows_done, finished) VALUES (?, ?, ?, ?, ?)""",
+                         (table, target, last_key, rows_done, 1 if finished else 0))
+            conn.commit()
+
+    def clear_migration_checkpoints(self):
+        with self._get_conn() as conn:
+            conn.execute("DELETE FROM migration_checkpoints")
+            conn.commit()
+
+    # --- SYNCHRONIZACJA PRZYROSTOWA ---
+    def get_sync_state(self):
+        with self._get_conn() as conn:
+            return {r["table_name"]: r["high_water"] for r in conn.execute("SELECT table_name, high_water FROM sync_state")}
+
+    @staticmethod
+    def _sync_value(table, column, value):
+        if column == SYNC_JSON_COLUMNS.get(table) or isinstance(value, (dict, list)):
+            return json.dumps(value)
+        if isinstance(value, bool):
+            return 1 if value else 0
+        return value
+
+    #   ZAPIS ZMIAN Z CHMURY (executemany upsert zamiast DELETE + INSERT każdego wiersza)
+    #   batches: lista (tabela, wiersze, usunięte klucze)
+    #   high_water: nowe punkty kontrolne, zapisywane na końcu (czytane dopiero po przejściu batches,
+    #   więc generator może je uzupełniać w trakcie)
+    #   replace: tabele pobierane w całości (bez punktu kontrolnego) - wiersze spoza pobrania są usuwane na końcu
+    def apply_sync_batch(self, batches, high_water, replace=()):
+        conn = self._get_conn()
+        changed = 0
+        seen = {table: set() for table in replace if table not in SYNC_MERGE_ONLY}
+        # PRAGMA foreign_keys działa tylko poza transakcją - przywracamy je po commit/rollback
+        conn.execute("PRAGMA foreign_keys = OFF;")
+        try:
+            # Każda strona we własnej krótkiej transakcji: pobieranie z sieci (generator batches) odbywa się
+            # bez blokady zapisu, więc inne wątki (kolejka, GUI) nie czekają na całe pobieranie
+            for table, rows, deleted in batches:
+                if table in seen:
+                    key = SYNC_TABLES[table]
+                    seen[table].update(str(r[key]) for r in rows)
+                with conn:
+                    changed += self._apply_sync_page(conn, table, rows, deleted)
+
+            # Koniec w jednej transakcji: usunięcie wierszy, których nie ma w chmurze (tylko po udanym pobraniu
+            # całej tabeli - błąd sieci w trakcie zostawia lokalne dane), i punkty kontrolne. Przerwane pobieranie
+            # zaczyna się od starego znacznika (upserty są idempotentne).
+            with conn:
+                for table, keys in seen.items():
+                    key = SYNC_TABLES[table]
+                    stale = [(k,) for (k,) in conn.execute(f"SELECT {key} FROM {table}") if str(k) not in keys]
+                    conn.executemany(f"DELETE FROM {table} WHERE {key} = ?", stale)
+                    changed += len(stale)
+                # Stary punkt kontrolny (np. z innego projektu) nie może przetrwać pełnego pobrania
+                conn.executemany("DELETE FROM sync_state WHERE table_name = ?", [(t,) for t in replace])
+                conn.executemany("INSERT OR REPLACE INTO sync_state (table_name, high_water) VALUES (?, ?)",
+                                 list(high_water.items()))
+        finally:
+            conn.execute("PRAGMA foreign_keys = ON;")
+        return changed
+
+    def _apply_sync_page(self, conn, table, rows, deleted):
+        key = SYNC_TABLES[table]
+        changed = 0
+        if deleted:
+            conn.executemany(f"DELETE FROM {table} WHERE {key} = ?", [(k,) for k in deleted])
+            changed += len(deleted)
+        if not rows:
+            return changed
+
+        local_columns = [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+        # Wiersze z tym samym zestawem kolumn idą jednym executemany
+        groups = {}
+        for row in rows:
+            columns = tuple(c for c in local_columns if c in row)
+            groups.setdefault(columns, []).append(tuple(self._sync_value(table, c, row[c]) for c in columns))
+        for columns, values in groups.items():
+            # Nazwy w cudzysłowie (grades ma kolumnę "desc")
+            updates = ", ".join(f'"{c}" = excluded."{c}"' for c in columns if c != key)
+            conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+            conn.executemany(f"""INSERT INTO {table} ({", ".join(f'"{c}"' for c in columns)})
+                                 VALUES ({", ".join("?" * len(columns))})
+                                 ON CONFLICT ({key}) {conflict}""", values)
+        return changed + len(rows)
+
 
 # --- DOSTAWCA: CHMURA SUPABASE ---
 class SupabaseProvider(BaseProvider):
-    def __init__(self, url, key):
+    def __init__(self, url, key, client=None):
+        # client: gotowy klient (np. _dev_tools/fake_supabase.py w testach i benchmarkach)
+        if client is not None:
+            self.client = client
+            return
         if not SUPABASE_AVAILABLE:
             raise ImportError("Pakiet 'supabase' nie jest zainstalowany. Wykonaj: pip install supabase")
-        self.client: Client = create_client(url, key)
+        from supabase import create_client
+        self.client = create_client(url, key)
 
     def _update_config_tokens(self, access_token, refresh_token):
         try:
@@ -1718,6 +2143,12 @@ class SupabaseProvider(BaseProvider):
         val = json.dumps(value) if isinstance(value, (dict, list)) else value
         self.client.table("global_stats").upsert({"key": key, "value": val}).execute()
 
+    def update_global_stats(self, stats_dict):
+        payload = [{"key": k, "value": json.dumps(v) if isinstance(v, (dict, list)) else v}
+                   for k, v in stats_dict.items()]
+        if payload:
+            self.client.table("global_stats").upsert(payload).execute()
+
     def get_other_stats(self):
         res = {}
         data = self.client.table("stats").select("*").execute().data
@@ -1758,19 +2189,27 @@ class SupabaseProvider(BaseProvider):
         self.client.table("custom_sounds").delete().eq("id", sound_id).execute()
 
     def _map_exam(self, e):
-        e["ignore_barrier"] = bool(e.get("ignore_barrier", 0))
-        if "subjects" in e and e["subjects"]:
-            e["subject"] = e["subjects"].get("name", e.get("subject"))
-            e["color"] = e["subjects"].get("color", e.get("color"))
+        # Kształt jak w SQLiteProvider (JOIN): subject_name / subject_color zamiast zagnieżdżonego "subjects"
+        subject = e.pop("subjects", None) or {}
+        e["subject_name"] = subject.get("name")
+        e["subject_color"] = subject.get("color")
+        if e["subject_name"]: e["subject"] = e["subject_name"]
         return e
 
     def get_exam(self, exam_id):
         data = self.client.table("exams").select("*, subjects(name, color)").eq("id", exam_id).execute().data
-        return self._map_exam(self._clean_dates(data[0])) if data else None
+        if not data: return None
+        e = self._map_exam(self._clean_dates(data[0]))
+        e["ignore_barrier"] = bool(e.get("ignore_barrier"))
+        return e
 
     def get_exams(self):
         data = self.client.table("exams").select("*, subjects(name, color)").execute().data
-        return [self._map_exam(self._clean_dates(e)) for e in data]
+        for e in data:
+            self._map_exam(self._clean_dates(e))
+            e["ignore_barrier"] = 1 if e.get("ignore_barrier") else 0
+            if e["subject_color"]: e["color"] = e["subject_color"]
+        return data
 
     def add_exam(self, exam_dict):
         payload = exam_dict.copy()
@@ -1779,10 +2218,21 @@ class SupabaseProvider(BaseProvider):
         payload.pop("subject_name", None);
         payload.pop("subject_color", None);
         payload.pop("subjects", None)
+        created = None
         if not payload.get("subject_id") and payload.get("subject"):
             subj_data = self.client.table("subjects").select("id").eq("name", payload["subject"]).execute().data
-            if subj_data: payload["subject_id"] = subj_data[0]["id"]
-        self.client.table("exams").insert(payload).execute()
+            if subj_data:
+                payload["subject_id"] = subj_data[0]["id"]
+            else:
+                # Jak w SQLiteProvider: nowy przedmiot w pierwszym semestrze
+                sem = self.client.table("semesters").select("id").limit(1).execute().data
+                if sem:
+                    created = {"id": f"sub_{uuid.uuid4().hex[:8]}", "semester_id": sem[0]["id"],
+                               "name": payload["subject"], "short_name": payload["subject"][:3], "color": "#3498db"}
+                    self.client.table("subjects").upsert(created, on_conflict="id").execute()
+                    payload["subject_id"] = created["id"]
+        self.client.table("exams").upsert(payload, on_conflict="id").execute()
+        return created
 
     def update_exam(self, exam_dict):
         payload = exam_dict.copy()
@@ -1808,13 +2258,14 @@ class SupabaseProvider(BaseProvider):
         query = self.client.table("topics").select("*")
         if exam_id: query = query.eq("exam_id", exam_id)
         data = query.execute().data
-        for d in data: d["locked"] = bool(d.get("locked", 0))
+        # Jak w SQLiteProvider: lista tematów ma locked 0/1 (bool tylko w get_topic)
+        for d in data: d["locked"] = 1 if d.get("locked") else 0
         return self._clean_dates(data)
 
     def add_topic(self, topic_dict):
         payload = topic_dict.copy()
         payload["locked"] = bool(payload.get("locked"))
-        self.client.table("topics").insert(payload).execute()
+        self.client.table("topics").upsert(payload, on_conflict="id").execute()
 
     def update_topic(self, topic_dict):
         payload = topic_dict.copy()
@@ -1831,6 +2282,20 @@ class SupabaseProvider(BaseProvider):
             payloads.append(p)
         self.client.table("topics").upsert(payloads).execute()
 
+    def update_topic_dates(self, changes):
+        # Tylko UPDATE istniejących tematów, jednym wywołaniem RPC (id + scheduled_date, bez reszty kolumn).
+        # Upsert wstawiłby temat usunięty już w chmurze jako "ducha" z exam_id/name = NULL.
+        if not changes: return
+        payload = [{"id": topic_id, "scheduled_date": new_date or None} for topic_id, new_date in changes]
+        try:
+            self.client.rpc("update_topic_dates", {"changes": payload}).execute()
+        except Exception as e:
+            # PGRST202: stary schema.sql bez funkcji update_topic_dates - pojedyncze UPDATE (brakujące id pomijane)
+            if getattr(e, "code", None) != "PGRST202":
+                raise
+            for p in payload:
+                self.client.table("topics").update({"scheduled_date": p["scheduled_date"]}).eq("id", p["id"]).execute()
+
     def delete_topic(self, topic_id):
         self.client.table("topics").delete().eq("id", topic_id).execute()
 
@@ -1841,8 +2306,9 @@ class SupabaseProvider(BaseProvider):
         self.client.table("task_lists").upsert(list_dict).execute()
 
     def delete_task_list(self, list_id):
-        self.client.table("task_lists").delete().eq("id", list_id).execute()
+        # Najpierw zadania: klucz obcy daily_tasks.list_id (ON DELETE SET NULL) odpiąłby je od usuwanej listy
         self.client.table("daily_tasks").delete().eq("list_id", list_id).execute()
+        self.client.table("task_lists").delete().eq("id", list_id).execute()
 
     def get_daily_task(self, task_id):
         data = self.client.table("daily_tasks").select("*").eq("id", task_id).execute().data
@@ -1860,7 +2326,7 @@ class SupabaseProvider(BaseProvider):
         if payload.get("list_id") == "general" or payload.get("list_id") == "":
             payload["list_id"] = None
 
-        self.client.table("daily_tasks").insert(payload).execute()
+        self.client.table("daily_tasks").upsert(payload, on_conflict="id").execute()
 
     def update_daily_task(self, task_dict):
         payload = task_dict.copy()
@@ -1896,12 +2362,13 @@ class SupabaseProvider(BaseProvider):
 
     def get_semesters(self):
         data = self.client.table("semesters").select("*").execute().data
+        for d in data: d["is_current"] = 1 if d.get("is_current") else 0
         return self._clean_dates(data)
 
     def add_semester(self, sem_dict):
         payload = sem_dict.copy()
         payload["is_current"] = bool(payload.get("is_current"))
-        self.client.table("semesters").insert(payload).execute()
+        self.client.table("semesters").upsert(payload, on_conflict="id").execute()
 
     def update_semester(self, sem_dict):
         payload = sem_dict.copy()
@@ -1925,7 +2392,7 @@ class SupabaseProvider(BaseProvider):
         return None
 
     def add_subject(self, sub_dict):
-        self.client.table("subjects").insert(sub_dict).execute()
+        self.client.table("subjects").upsert(sub_dict, on_conflict="id").execute()
 
     def update_subject(self, sub_dict):
         payload = sub_dict.copy()
@@ -1944,15 +2411,15 @@ class SupabaseProvider(BaseProvider):
         return self._clean_dates(data)
 
     def add_schedule_entry(self, entry_dict):
-        self.client.table("schedule_entries").insert(entry_dict).execute()
+        self.client.table("schedule_entries").upsert(entry_dict, on_conflict="id").execute()
 
     def delete_schedule_entry(self, entry_id):
         self.client.table("schedule_entries").delete().eq("id", entry_id).execute()
 
     def add_schedule_cancellation(self, entry_id, date_str):
-        new_id = f"cancel_{uuid.uuid4().hex[:8]}"
-        self.client.table("schedule_cancellations").insert(
-            {"id": new_id, "entry_id": entry_id, "date": date_str}).execute()
+        self.client.table("schedule_cancellations").upsert(
+            {"id": cancellation_id(entry_id, date_str), "entry_id": entry_id, "date": date_str},
+            on_conflict="id").execute()
 
     def get_schedule_cancellations(self):
         data = self.client.table("schedule_cancellations").select("entry_id, date").execute().data
@@ -1969,7 +2436,7 @@ class SupabaseProvider(BaseProvider):
     def add_grade(self, grade_dict):
         payload = grade_dict.copy()
         if "desc" in payload: payload["desc_text"] = payload.pop("desc")
-        self.client.table("grades").insert(payload).execute()
+        self.client.table("grades").upsert(payload, on_conflict="id").execute()
 
     def delete_grade(self, grade_id):
         self.client.table("grades").delete().eq("id", grade_id).execute()
@@ -1979,7 +2446,7 @@ class SupabaseProvider(BaseProvider):
         return self._clean_dates(data)
 
     def add_grade_module(self, module_dict):
-        self.client.table("grade_modules").insert(module_dict).execute()
+        self.client.table("grade_modules").upsert(module_dict, on_conflict="id").execute()
 
     def update_grade_module(self, module_dict):
         payload = module_dict.copy()
@@ -2034,11 +2501,14 @@ class SupabaseProvider(BaseProvider):
 
     def get_subscriptions(self):
         data = self.client.table("subscriptions").select("*").execute().data
+        for d in data: d["is_active"] = 1 if d.get("is_active") else 0
         return self._clean_dates(data)
 
     def get_subscription(self, sub_id):
         data = self.client.table("subscriptions").select("*").eq("id", sub_id).execute().data
-        return self._clean_dates(data[0]) if data else None
+        if not data: return None
+        data[0]["is_active"] = 1 if data[0].get("is_active") else 0
+        return self._clean_dates(data[0])
 
     def add_subscription(self, sub_dict):
         payload = sub_dict.copy()
@@ -2050,7 +2520,7 @@ class SupabaseProvider(BaseProvider):
         if payload.get("billing_date") == "":
             payload["billing_date"] = None
 
-        self.client.table("subscriptions").insert(payload).execute()
+        self.client.table("subscriptions").upsert(payload, on_conflict="id").execute()
 
     def update_subscription(self, sub_dict):
         payload = sub_dict.copy()
@@ -2068,6 +2538,66 @@ class SupabaseProvider(BaseProvider):
     def delete_subscription(self, sub_id):
         self.client.table("subscriptions").delete().eq("id", sub_id).execute()
 
+    # --- SYNCHRONIZACJA PRZYROSTOWA ---
+    #   STRONA WIERSZY TABELI zmienionych od `since` (updated_at), w formacie bazy lokalnej
+    #   count=True: zwraca (wiersze, liczba wszystkich pasujących wierszy) - potrzebne do równoległego stronicowania
+    def fetch_rows(self, table, since=None, after=None, limit=SYNC_PAGE_SIZE, count=False):
+        key = SYNC_TABLES[table]
+        query = self.client.table(table).select("*", count="exact" if count else None)
+        if since:
+            # >= zamiast >: wiersze z tym samym znacznikiem czasu pobieramy ponownie (upsert jest idempotentny)
+            query = query.gte("updated_at", since)
+        if after is not None:
+            # Stronicowanie po kluczu: usunięcie wiersza w trakcie pobierania nie przesuwa kolejnych stron
+            query = query.gt(key, after)
+        response = query.order(key).limit(limit).execute()
+        data = response.data
+
+        json_column = SYNC_JSON_COLUMNS.get(table)
+        for d in data:
+            if table == "grades" and "desc_text" in d: d["desc"] = d.pop("desc_text")
+            if json_column and isinstance(d.get(json_column), str):
+                try:
+                    d[json_column] = json.loads(d[json_column])
+                except ValueError:
+                    pass
+            # updated_at zostaje w pełnym formacie (punkt kontrolny), reszta dat jak w get_*
+            updated_at = d.pop("updated_at", None)
+            self._clean_dates(d)
+            if updated_at: d["updated_at"] = updated_at
+        return (data, response.count) if count else data
+
+    #   ZAPIS PORCJI WIERSZY Z BAZY LOKALNEJ JEDNYM UPSERTEM (odwrotność fetch_rows)
+    def upsert_rows(self, table, rows):
+        if not rows: return
+        json_column = SYNC_JSON_COLUMNS.get(table)
+        bool_columns = SYNC_BOOL_COLUMNS.get(table, ())
+        payloads = []
+        for row in rows:
+            p = dict(row)
+            if json_column and isinstance(p.get(json_column), str):
+                try:
+                    p[json_column] = json.loads(p[json_column])
+                except ValueError:
+                    pass
+            for c in bool_columns:
+                if c in p: p[c] = bool(p[c])
+            if table == "grades" and "desc" in p: p["desc_text"] = p.pop("desc")
+            # Puste napisy w kolumnach DATE są w chmurze błędem
+            for c, v in p.items():
+                if v == "" and (c == "date" or c.endswith("_date")): p[c] = None
+            payloads.append(p)
+        self.client.table(table).upsert(payloads).execute()
+
+    #   STRONY USUNIĘĆ: po offsecie (wpisy w sync_tombstones nie są usuwane, więc strony się nie przesuwają)
+    def fetch_tombstones(self, since=None, offset=0, limit=SYNC_PAGE_SIZE, count=False):
+        query = self.client.table(SYNC_TOMBSTONES).select("table_name, row_key, deleted_at",
+                                                          count="exact" if count else None)
+        if since:
+            query = query.gte("deleted_at", since)
+        response = query.order("table_name").order("row_key").range(offset, offset + limit - 1).execute()
+        return (response.data, response.count) if count else response.data
+
 
 # --- CONFIG LOADER ---
 def load_config():
@@ -2097,11 +2627,17 @@ def load_config():
 
 
 class StorageManager:
-    def __init__(self, db_path):
-        self.config = load_config()
+    def __init__(self, db_path, config=None, migrate_legacy_json=True, local_provider=None):
+        # config=None -> config.json aplikacji (load_config); skrypty / CLI podają własny słownik bez efektów ubocznych
+        self.config = load_config() if config is None else config
         self.mode = self.config.get("db_mode", "local")
-        self.local = SQLiteProvider(db_path)
+        # local_provider: gotowy dostawca lokalny (np. MemoryProvider w testach i benchmarkach), wtedy db_path=None
+        self.local = local_provider or SQLiteProvider(db_path, migrate_legacy_json=migrate_legacy_json)
         self.cloud = None
+        # Cache odczytów (domyślnie wyłączony, GUI włącza go przez enable_cache)
+        self.cache = EntityCache()
+        # Zapisy do chmury idą przez trwałą kolejkę (jeden wątek, scalanie i paczki, ponawianie)
+        self.outbox = Outbox(self.local, lambda: self.cloud)
 
         if self.mode == "cloud":
             self.init_cloud()
@@ -2115,6 +2651,28 @@ class StorageManager:
                     self.cloud = SupabaseProvider(url, key)
                 except Exception as e:
                     print(f"[Storage] Cloud init error: {e}")
+        if self.cloud:
+            # Wysyłka zaległych zapisów z poprzedniego uruchomienia
+            self.outbox.start()
+
+    def close(self):
+        self.outbox.stop()
+        self.local.close()
+
+    def enable_cache(self, enabled=True):
+        self.cache.set_enabled(enabled)
+
+    def cache_stats(self):
+        return self.cache.stats()
+
+    def table_versions(self, tables):
+        return self.cache.versions(tables)
+
+    def connection_stats(self):
+        return self.local.connection_stats()
+
+    def sync_stats(self):
+        return self.outbox.stats()
 
     def save_config(self):
         try:
@@ -2176,179 +2734,83 @@ class StorageManager:
                 print(f"[Storage] {text}")
 
         try:
+            # Najpierw wysyłamy zaległe zapisy - inaczej pobranie danych z chmury nadpisałoby je lokalnie
+            update("Uploading pending changes...")
+            if not self.outbox.flush():
+                update("Error: pending changes could not be uploaded")
+                print(f"[Storage] Sync down skipped, {self.outbox.pending_count()} changes still pending")
+                return
+
             update("Connecting to the cloud...")
-            settings = self.cloud.get_settings()
-            update("Downloading tasks...")
-            tasks = self.cloud.get_daily_tasks()
-            update("Downloading the schedule...")
-            semesters = self.cloud.get_semesters()
-            subjects = self.cloud.get_subjects()
-            update("Downloading exams...")
-            exams = self.cloud.get_exams()
-            topics = self.cloud.get_topics()
-            update("Downloading lists...")
-            lists = self.cloud.get_task_lists()
-            event_lists = self.cloud.get_event_lists() if hasattr(self.cloud, 'get_event_lists') else []
-            custom_events = self.cloud.get_custom_events() if hasattr(self.cloud, 'get_custom_events') else []
-            update("Downloading subscriptions...")
-            subscriptions = self.cloud.get_subscriptions() if hasattr(self.cloud, 'get_subscriptions') else []
-            update("Downloading statistics and achievements...")
-            global_stats = self.cloud.get_global_stats()
-            other_stats = self.cloud.get_other_stats()
-            achievements = self.cloud.get_achievements()
-            update("Downloading the calendar and sounds...")
-            blocked_dates = self.cloud.get_blocked_dates()
-            custom_sounds = self.cloud.get_custom_sounds()
-            schedule = self.cloud.get_schedule()
-            cancellations = self.cloud.get_schedule_cancellations()
-            update("Downloading grades...")
-            grades = self.cloud.get_grades()
-            # Pobieramy wszystkie moduły bezpośrednio, bo Twoja metoda wymagała subject_id
-            grade_modules = self.cloud.client.table("grade_modules").select("*").execute().data
-
-            update("Saving data locally...")
-            with self.local._get_conn() as conn:
-                conn.execute("PRAGMA foreign_keys = OFF;")
-                for k, v in settings.items(): conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
-                                                           (k, json.dumps(v)))
-                conn.execute("DELETE FROM daily_tasks")
-                for t in tasks: conn.execute(
-                    "INSERT INTO daily_tasks (id, content, status, date, color, created_at, note, list_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                    (t['id'], t['content'], t['status'], t['date'], t.get('color'), t.get('created_at'), t.get('note'),
-                     t.get('list_id')))
-                conn.execute("DELETE FROM semesters")
-                for s in semesters: conn.execute(
-                    "INSERT INTO semesters (id, name, start_date, end_date, is_current) VALUES (?, ?, ?, ?, ?)",
-                    (s['id'], s['name'], s['start_date'], s['end_date'], 1 if s.get('is_current') else 0))
-                conn.execute("DELETE FROM subjects")
-                for sub in subjects: conn.execute(
-                    "INSERT INTO subjects (id, semester_id, name, short_name, color, weight, start_datetime, end_datetime) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                    (sub['id'], sub['semester_id'], sub['name'], sub['short_name'], sub['color'],
-                     sub.get('weight', 1.0), sub.get('start_datetime'), sub.get('end_datetime')))
-                conn.execute("DELETE FROM exams")
-                for ex in exams: conn.execute(
-                    "INSERT INTO exams (id, subject_id, subject, title, date, time, note, ignore_barrier, color) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                    (ex['id'], ex.get('subject_id'), ex.get('subject'), ex['title'], ex['date'], ex.get('time'),
-                     ex.get('note'), 1 if ex.get('ignore_barrier') else 0, ex.get('color')))
-                conn.execute("DELETE FROM topics")
-                for tp in topics: conn.execute(
-                    "INSERT INTO topics (id, exam_id, name, status, scheduled_date, locked, note) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                    (tp['id'], tp['exam_id'], tp['name'], tp['status'], tp.get('scheduled_date'),
-                     1 if tp.get('locked') else 0, tp.get('note')))
-
-                # ZMIANA: Zapis list uwzględniający list_type
-                conn.execute("DELETE FROM task_lists")
-                for lst in lists: conn.execute("INSERT INTO task_lists (id, name, icon, list_type) VALUES (?, ?, ?, ?)",
-                                               (lst['id'], lst['name'], lst.get('icon'), lst.get('list_type')))
-
-                # Statystyki
-                for k, v in global_stats.items():
-                    conn.execute("INSERT OR REPLACE INTO global_stats (key, value) VALUES (?, ?)", (k, json.dumps(v)))
-                for k, v in other_stats.items():
-                    conn.execute("INSERT OR REPLACE INTO stats (key, value) VALUES (?, ?)", (k, json.dumps(v)))
-
-                # Dźwięki
-                conn.execute("DELETE FROM custom_sounds")
-                for s in custom_sounds:
-                    steps_json = json.dumps(s.get('steps', []))
-                    conn.execute("INSERT INTO custom_sounds (id, name, steps_json) VALUES (?, ?, ?)",
-                                 (s['id'], s['name'], steps_json))
-
-                # Zablokowane daty
-                conn.execute("DELETE FROM blocked_dates")
-                for bd in blocked_dates:
-                    conn.execute("INSERT INTO blocked_dates (date) VALUES (?)", (bd,))
-
-                # Osiągnięcia
-                conn.execute("DELETE FROM achievements")
-                today_str = datetime.date.today().isoformat()
-                for ach_id in achievements:
-                    conn.execute("INSERT INTO achievements (achievement_id, date_earned) VALUES (?, ?)",
-                                 (ach_id, today_str))
-
-                # Harmonogram
-                conn.execute("DELETE FROM schedule_entries")
-                for se in schedule:
-                    conn.execute(
-                        "INSERT INTO schedule_entries (id, subject_id, day_of_week, start_time, end_time, room, type, period_start, period_end) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                        (se['id'], se.get('subject_id'), se['day_of_week'], se['start_time'], se['end_time'],
-                         se.get('room'), se.get('type'), se.get('period_start'), se.get('period_end')))
-
-                # Anulowane zajęcia
-                conn.execute("DELETE FROM schedule_cancellations")
-                for sc in cancellations:
-                    sc_id = f"cancel_{uuid.uuid4().hex[:8]}"  # Generujemy lokalne ID
-                    conn.execute("INSERT INTO schedule_cancellations (id, entry_id, date) VALUES (?, ?, ?)",
-                                 (sc_id, sc['entry_id'], sc['date']))
-
-                # Oceny i moduły
-                conn.execute("DELETE FROM grade_modules")
-                for gm in grade_modules:
-                    conn.execute("INSERT INTO grade_modules (id, subject_id, name, weight) VALUES (?, ?, ?, ?)",
-                                 (gm['id'], gm['subject_id'], gm['name'], gm.get('weight', 0.0)))
-
-                conn.execute("DELETE FROM grades")
-                for g in grades:
-                    conn.execute(
-                        "INSERT INTO grades (id, subject_id, module_id, value, weight, desc, date) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                        (g['id'], g['subject_id'], g.get('module_id'), g['value'], g.get('weight', 1.0), g.get('desc'),
-                         g.get('date')))
-
-                conn.execute("DELETE FROM event_lists")
-                for el in event_lists:
-                    conn.execute("INSERT INTO event_lists (id, name, color) VALUES (?, ?, ?)",
-                                 (el['id'], el['name'], el.get('color')))
-
-                conn.execute("DELETE FROM custom_events")
-                for ce in custom_events:
-                    conn.execute("""INSERT INTO custom_events
-                                    (id, list_id, title, is_recurring, date, day_of_week, start_time, end_time,
-                                     start_date, end_date, color)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                                 (ce['id'], ce.get('list_id'), ce['title'], 1 if ce.get('is_recurring') else 0,
-                                  ce.get('date'),
-                                  ce.get('day_of_week'), ce['start_time'], ce['end_time'], ce.get('start_date'),
-                                  ce.get('end_date'), ce.get('color')))
-
-                conn.execute("DELETE FROM subscriptions")
-                for sub in subscriptions:
-                    try:
-                        conn.execute("ALTER TABLE subscriptions ADD COLUMN billing_date TEXT")
-                    except sqlite3.OperationalError:
-                        pass
-
-                    conn.execute("""INSERT INTO subscriptions
-                                    (id, subject_id, name, provider, expiry_date, cost, currency, billing_cycle, note,
-                                     is_active, billing_date)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                                 (sub['id'], sub.get('subject_id'), sub['name'], sub.get('provider'),
-                                  sub.get('expiry_date'), sub.get('cost', 0.0), sub.get('currency', 'PLN'),
-                                  sub.get('billing_cycle', 'yearly'), sub.get('note', ''),
-                                  1 if sub.get('is_active', True) else 0, sub.get('billing_date')))
-
-                conn.execute("PRAGMA foreign_keys = ON;")
-                conn.commit()
+            source = self.config.get("supabase_url", "")
+            state = self.local.get_sync_state()
+            if state.get(SYNC_SOURCE) != source:
+                state = {}
+            fetcher = TableFetcher(page_size=SYNC_PAGE_SIZE)
+            try:
+                since_deleted = state.get(SYNC_TOMBSTONES)
+                pages = fetcher.fetch({SYNC_TOMBSTONES: lambda offset, limit, count:
+                                       self.cloud.fetch_tombstones(since_deleted, offset, limit, count)})
+                tombstones = [t for _, rows in pages for t in rows]
+            except Exception as e:
+                # Chmura bez tabeli sync_tombstones (stary schema.sql) - bez usunięć tylko pełne pobranie jest poprawne
+                print(f"[Storage] Delta sync unavailable, downloading everything: {e}")
+                tombstones, state = [], {}
+
+            deleted = {}
+            for t in tombstones:
+                deleted.setdefault(t["table_name"], []).append(t["row_key"])
+
+            high_water = {SYNC_SOURCE: source}
+            if tombstones:
+                high_water[SYNC_TOMBSTONES] = max(t["deleted_at"] for t in tombstones)
+            # Znaczniki przed cofnięciem o SYNC_SAFETY_WINDOW (cofamy dopiero po pobraniu wszystkich stron)
+            seen = {}
+
+            def table_source(table, since):
+                return lambda after, limit, count: self.cloud.fetch_rows(table, since, after, limit, count)
+
+            # Tabele bez punktu kontrolnego (pierwsza synchronizacja / inny projekt / chmura bez updated_at)
+            # pobieramy w całości; lokalne wiersze spoza chmury znikają dopiero po udanym pobraniu
+            replace = [table for table in SYNC_TABLES if not state.get(table)]
+
+            def batches():
+                # 1. Usunięcia z tabel pobieranych przyrostowo - zanim przyjdzie jakakolwiek strona
+                for table in SYNC_TABLES:
+                    if state.get(table) and deleted.get(table):
+                        yield table, [], deleted[table]
+
+                # 2. Tabele pobierane równolegle (strony jednej tabeli kolejno, po kluczu) i zapisywane od razu,
+                #    w kolejności przychodzenia
+                sources = {table: table_source(table, state.get(table)) for table in SYNC_TABLES}
+                for table, rows in fetcher.fetch(sources, keys=SYNC_TABLES):
+                    marks = [r.pop("updated_at") for r in rows if r.get("updated_at")]
+                    if marks:
+                        seen[table] = max(marks + [seen.get(table, "")])
+                    update(f"Downloading data... ({fetcher.rows} rows)")
+                    yield table, rows, []
+
+                # 3. Punkty kontrolne z marginesem; nigdy wcześniejsze niż poprzedni (nie pobieramy więcej niż trzeba)
+                for table, mark in seen.items():
+                    high_water[table] = max(rewind_sync_mark(mark), state.get(table) or "")
+                if SYNC_TOMBSTONES in high_water:
+                    high_water[SYNC_TOMBSTONES] = max(rewind_sync_mark(high_water[SYNC_TOMBSTONES]),
+                                                      state.get(SYNC_TOMBSTONES) or "")
+
+            update("Downloading data...")
+            changed = self.local.apply_sync_batch(batches(), high_water, replace)
+            print(f"[Storage] Sync down: {changed} changed rows")
             update("Ready!")
         except Exception as e:
             update(f"Error: {e}")
             print(f"[Storage] Critical Err..: {e}")
+        finally:
+            # Lokalna baza została podmieniona danymi z chmury
+            self.cache.invalidate_all()
 
-    def _bg_cloud_sync(self, method_name, *args, **kwargs):
+    def _bg_cloud_sync(self, method_name, *args):
         if self.cloud and hasattr(self.cloud, method_name):
-            def run():
-                import time
-                for _ in range(3):
-                    try:
-                        getattr(self.cloud, method_name)(*args, **kwargs)
-                        break
-                    except Exception as e:
-                        if "35" in str(e):
-                            time.sleep(0.3)
-                        else:
-                            print(f"[Supabase Sync Error in {method_name}]: {e}")
-                            break
-
-            threading.Thread(target=run, daemon=True).start()
+            self.outbox.enqueue(method_name, *args)
 
     def _sanitize_nulls(self, data):
         if isinstance(data, list):
@@ -2360,17 +2822,27 @@ class StorageManager:
                     data[k] = ""
         return data
 
+    def snapshot(self):
+        # Jeden spójny odczyt tabel dashboardu (brakujące w cache czytane w jednej transakcji)
+        def load(tables):
+            data = self.local.read_tables(tables)
+            for t in ("exams", "topics", "daily_tasks"):
+                if t in data: self._sanitize_nulls(data[t])
+            return data
+
+        return AppSnapshot.from_tables(self.cache.get_frozen_many(SNAPSHOT_TABLES, load))
+
     def get_settings(self):
-        return self.local.get_settings()
+        return self.cache.get("settings", self.local.get_settings)
 
     def get_global_stats(self):
-        return self.local.get_global_stats()
+        return self.cache.get("global_stats", self.local.get_global_stats)
 
     def get_other_stats(self):
-        return self.local.get_other_stats()
+        return self.cache.get("other_stats", self.local.get_other_stats)
 
     def get_custom_sounds(self):
-        return self.local.get_custom_sounds()
+        return self.cache.get("custom_sounds", self.local.get_custom_sounds)
 
     def get_custom_sound(self, sound_id):
         return self.local.get_custom_sound(sound_id)
@@ -2379,49 +2851,61 @@ class StorageManager:
         return self._sanitize_nulls(self.local.get_exam(exam_id))
 
     def get_exams(self):
-        return self._sanitize_nulls(self.local.get_exams())
+        return self.cache.get("exams", lambda: self._sanitize_nulls(self.local.get_exams()))
 
     def get_topic(self, topic_id):
         return self._sanitize_nulls(self.local.get_topic(topic_id))
 
     def get_topics(self, exam_id=None):
-        return self._sanitize_nulls(self.local.get_topics(exam_id))
+        if exam_id and not self.cache.enabled:
+            return self._sanitize_nulls(self.local.get_topics(exam_id))
+        return self.cache.get("topics", lambda: self._sanitize_nulls(self.local.get_topics()),
+                              where=(lambda t: t["exam_id"] == exam_id) if exam_id else None)
 
     def get_task_lists(self):
-        return self._sanitize_nulls(self.local.get_task_lists())
+        return self.cache.get("task_lists", lambda: self._sanitize_nulls(self.local.get_task_lists()))
 
     def get_daily_task(self, task_id):
         return self._sanitize_nulls(self.local.get_daily_task(task_id))
 
     def get_daily_tasks(self):
-        return self._sanitize_nulls(self.local.get_daily_tasks())
+        return self.cache.get("daily_tasks", lambda: self._sanitize_nulls(self.local.get_daily_tasks()))
 
     def get_blocked_dates(self):
-        return self.local.get_blocked_dates()
+        return self.cache.get("blocked_dates", self.local.get_blocked_dates)
 
     def get_achievements(self):
-        return self.local.get_achievements()
+        return self.cache.get("achievements", self.local.get_achievements)
 
     def get_semesters(self):
-        return self._sanitize_nulls(self.local.get_semesters())
+        return self.cache.get("semesters", lambda: self._sanitize_nulls(self.local.get_semesters()))
 
     def get_subjects(self, semester_id=None):
-        return self._sanitize_nulls(self.local.get_subjects(semester_id))
+        if semester_id and not self.cache.enabled:
+            return self._sanitize_nulls(self.local.get_subjects(semester_id))
+        return self.cache.get("subjects", lambda: self._sanitize_nulls(self.local.get_subjects()),
+                              where=(lambda s: s["semester_id"] == semester_id) if semester_id else None)
 
     def get_subject(self, subject_id):
         return self._sanitize_nulls(self.local.get_subject(subject_id))
 
     def get_schedule(self):
-        return self._sanitize_nulls(self.local.get_schedule())
+        return self.cache.get("schedule_entries", lambda: self._sanitize_nulls(self.local.get_schedule()))
 
     def get_schedule_entries_by_subject(self, subject_id):
-        return self._sanitize_nulls(self.local.get_schedule_entries_by_subject(subject_id))
+        if not self.cache.enabled:
+            return self._sanitize_nulls(self.local.get_schedule_entries_by_subject(subject_id))
+        return self.cache.get("schedule_entries", lambda: self._sanitize_nulls(self.local.get_schedule()),
+                              where=lambda e: e["subject_id"] == subject_id)
 
     def get_schedule_cancellations(self):
-        return self.local.get_schedule_cancellations()
+        return self.cache.get("schedule_cancellations", self.local.get_schedule_cancellations)
 
     def get_grades(self, subject_id=None):
-        return self._sanitize_nulls(self.local.get_grades(subject_id))
+        if subject_id and not self.cache.enabled:
+            return self._sanitize_nulls(self.local.get_grades(subject_id))
+        return self.cache.get("grades", lambda: self._sanitize_nulls(self.local.get_grades()),
+                              where=(lambda g: g["subject_id"] == subject_id) if subject_id else None)
 
     def get_grade_modules(self, subject_id):
         return self._sanitize_nulls(self.local.get_grade_modules(subject_id))
@@ -2431,127 +2915,173 @@ class StorageManager:
 
     def update_setting(self, key, value):
         self.local.update_setting(key, value);
+        self.cache.invalidate("settings")
         self._bg_cloud_sync("update_setting", key, value)
 
     def update_global_stat(self, key, value):
         self.local.update_global_stat(key, value);
+        self.cache.invalidate("global_stats")
         self._bg_cloud_sync("update_global_stat", key, value)
 
+    def update_global_stats(self, stats_dict):
+        self.local.update_global_stats(stats_dict);
+        self.cache.invalidate("global_stats")
+        self._bg_cloud_sync("update_global_stats", stats_dict)
+
     def update_other_stat(self, key, value):
         self.local.update_other_stat(key, value);
+        self.cache.invalidate("other_stats")
         self._bg_cloud_sync("update_other_stat", key, value)
 
     def add_custom_sound(self, sound_dict):
         self.local.add_custom_sound(sound_dict);
+        self.cache.invalidate("custom_sounds")
         self._bg_cloud_sync("add_custom_sound", sound_dict)
 
     def delete_custom_sound(self, sound_id):
         self.local.delete_custom_sound(sound_id);
+        self.cache.invalidate("custom_sounds")
         self._bg_cloud_sync("delete_custom_sound", sound_id)
 
     def add_exam(self, exam_dict):
-        self.local.add_exam(exam_dict);
+        created = self.local.add_exam(exam_dict);
+        self.cache.invalidate("exams", "subjects")
+        if created:
+            # Przedmiot założony lokalnie trafia do chmury z tym samym id (inaczej chmura założyłaby własny)
+            self._bg_cloud_sync("add_subject", created)
+            exam_dict = {**exam_dict, "subject_id": created["id"]}
         self._bg_cloud_sync("add_exam", exam_dict)
 
     def update_exam(self, exam_dict):
         self.local.update_exam(exam_dict);
+        self.cache.invalidate("exams")
         self._bg_cloud_sync("update_exam", exam_dict)
 
     def delete_exam(self, exam_id):
         self.local.delete_exam(exam_id);
+        self.cache.invalidate("exams", "topics")
         self._bg_cloud_sync("delete_exam", exam_id)
 
     def add_topic(self, topic_dict):
         self.local.add_topic(topic_dict);
+        self.cache.invalidate("topics")
         self._bg_cloud_sync("add_topic", topic_dict)
 
     def update_topic(self, topic_dict):
         self.local.update_topic(topic_dict);
+        self.cache.invalidate("topics")
         self._bg_cloud_sync("update_topic", topic_dict)
 
     def update_topics_bulk(self, topics_list):
         self.local.update_topics_bulk(topics_list);
+        self.cache.invalidate("topics")
         self._bg_cloud_sync("update_topics_bulk", topics_list)
 
+    def update_topic_dates(self, changes):
+        if not changes: return
+        self.local.update_topic_dates(changes);
+        self.cache.invalidate("topics")
+        self._bg_cloud_sync("update_topic_dates", changes)
+
     def delete_topic(self, topic_id):
         self.local.delete_topic(topic_id);
+        self.cache.invalidate("topics")
         self._bg_cloud_sync("delete_topic", topic_id)
 
     def add_task_list(self, list_dict):
         self.local.add_task_list(list_dict);
+        self.cache.invalidate("task_lists")
         self._bg_cloud_sync("add_task_list", list_dict)
 
     def delete_task_list(self, list_id):
         self.local.delete_task_list(list_id);
+        self.cache.invalidate("task_lists", "daily_tasks")
         self._bg_cloud_sync("delete_task_list", list_id)
 
     def add_daily_task(self, task_dict):
         self.local.add_daily_task(task_dict);
+        self.cache.invalidate("daily_tasks")
         self._bg_cloud_sync("add_daily_task", task_dict)
 
     def update_daily_task(self, task_dict):
         self.local.update_daily_task(task_dict);
+        self.cache.invalidate("daily_tasks")
         self._bg_cloud_sync("update_daily_task", task_dict)
 
     def delete_daily_task(self, task_id):
         self.local.delete_daily_task(task_id);
+        self.cache.invalidate("daily_tasks")
         self._bg_cloud_sync("delete_daily_task", task_id)
 
     def add_blocked_date(self, date_str):
         self.local.add_blocked_date(date_str);
+        self.cache.invalidate("blocked_dates")
         self._bg_cloud_sync("add_blocked_date", date_str)
 
     def remove_blocked_date(self, date_str):
         self.local.remove_blocked_date(date_str);
+        self.cache.invalidate("blocked_dates")
         self._bg_cloud_sync("remove_blocked_date", date_str)
 
     def add_achievement(self, achievement_id):
         self.local.add_achievement(achievement_id);
+        self.cache.invalidate("achievements")
         self._bg_cloud_sync("add_achievement", achievement_id)
 
     def add_semester(self, sem_dict):
         self.local.add_semester(sem_dict);
+        self.cache.invalidate("semesters")
         self._bg_cloud_sync("add_semester", sem_dict)
 
     def update_semester(self, sem_dict):
         self.local.update_semester(sem_dict);
+        self.cache.invalidate("semesters")
         self._bg_cloud_sync("update_semester", sem_dict)
 
     def delete_semester(self, sem_id):
         self.local.delete_semester(sem_id);
+        self.cache.invalidate("semesters", "subjects", "exams", "schedule_entries", "schedule_cancellations", "grades", "subscriptions")
         self._bg_cloud_sync("delete_semester", sem_id)
 
     def add_subject(self, sub_dict):
         self.local.add_subject(sub_dict);
+        self.cache.invalidate("subjects")
         self._bg_cloud_sync("add_subject", sub_dict)
 
     def update_subject(self, sub_dict):
         self.local.update_subject(sub_dict);
+        self.cache.invalidate("subjects", "exams")
         self._bg_cloud_sync("update_subject", sub_dict)
 
     def delete_subject(self, sub_id):
         self.local.delete_subject(sub_id);
+        self.cache.invalidate("subjects", "exams", "schedule_entries", "schedule_cancellations", "grades", "subscriptions")
         self._bg_cloud_sync("delete_subject", sub_id)
 
     def add_schedule_entry(self, entry_dict):
         self.local.add_schedule_entry(entry_dict);
+        self.cache.invalidate("schedule_entries")
         self._bg_cloud_sync("add_schedule_entry", entry_dict)
 
     def delete_schedule_entry(self, entry_id):
         self.local.delete_schedule_entry(entry_id);
+        self.cache.invalidate("schedule_entries", "schedule_cancellations")
         self._bg_cloud_sync("delete_schedule_entry", entry_id)
 
     def add_schedule_cancellation(self, entry_id, date_str):
         self.local.add_schedule_cancellation(entry_id, date_str);
+        self.cache.invalidate("schedule_cancellations")
         self._bg_cloud_sync("add_schedule_cancellation",
                             entry_id, date_str)
 
     def add_grade(self, grade_dict):
         self.local.add_grade(grade_dict);
+        self.cache.invalidate("grades")
         self._bg_cloud_sync("add_grade", grade_dict)
 
     def delete_grade(self, grade_id):
         self.local.delete_grade(grade_id);
+        self.cache.invalidate("grades")
         self._bg_cloud_sync("delete_grade", grade_id)
 
     def add_grade_module(self, module_dict):
@@ -2564,60 +3094,77 @@ class StorageManager:
 
     def delete_grade_module(self, module_id):
         self.local.delete_grade_module(module_id);
+        self.cache.invalidate("grades")
         self._bg_cloud_sync("delete_grade_module", module_id)
 
     def clear_task_history(self, today_str):
         self.local.clear_task_history(today_str);
+        self.cache.invalidate("daily_tasks")
         self._bg_cloud_sync("clear_task_history", today_str)
 
     def restore_overdue_tasks(self, today_str):
         res = self.local.restore_overdue_tasks(today_str)
         if res > 0:
+            self.cache.invalidate("daily_tasks")
             for t in self.local.get_daily_tasks(): self._bg_cloud_sync("update_daily_task", t)
         return res
 
     def get_event_lists(self):
-        return self._sanitize_nulls(self.local.get_event_lists())
+        return self.cache.get("event_lists", lambda: self._sanitize_nulls(self.local.get_event_lists()))
 
     def get_custom_events(self):
-        return self._sanitize_nulls(self.local.get_custom_events())
+        return self.cache.get("custom_events", lambda: self._sanitize_nulls(self.local.get_custom_events()))
 
     def add_event_list(self, lst_dict):
         self.local.add_event_list(lst_dict);
+        self.cache.invalidate("event_lists")
         self._bg_cloud_sync("add_event_list", lst_dict)
 
     def delete_event_list(self, lst_id):
         self.local.delete_event_list(lst_id);
+        self.cache.invalidate("event_lists", "custom_events")
         self._bg_cloud_sync("delete_event_list", lst_id)
 
     def add_custom_event(self, ev_dict):
         self.local.add_custom_event(ev_dict);
+        self.cache.invalidate("custom_events")
         self._bg_cloud_sync("add_custom_event", ev_dict)
 
     def delete_custom_event(self, ev_id):
         self.local.delete_custom_event(ev_id);
+        self.cache.invalidate("custom_events")
         self._bg_cloud_sync("delete_custom_event", ev_id)
 
     def get_subscriptions(self):
-        return self._sanitize_nulls(self.local.get_subscriptions())
+        return self.cache.get("subscriptions", lambda: self._sanitize_nulls(self.local.get_subscriptions()))
 
     def get_subscription(self, sub_id):
         return self._sanitize_nulls(self.local.get_subscription(sub_id))
 
     def add_subscription(self, sub_dict):
         self.local.add_subscription(sub_dict);
+        self.cache.invalidate("subscriptions")
         self._bg_cloud_sync("add_subscription", sub_dict)
 
     def update_subscription(self, sub_dict):
         self.local.update_subscription(sub_dict);
+        self.cache.invalidate("subscriptions")
         self._bg_cloud_sync("update_subscription", sub_dict)
 
     def delete_subscription(self, sub_id):
         self.local.delete_subscription(sub_id);
+        self.cache.invalidate("subscriptions")
         self._bg_cloud_sync("delete_subscription", sub_id)
 
 
-manager = StorageManager(DB_PATH)
+# Globalny menedżer tworzony leniwie przy pierwszym użyciu ("from core.storage import manager"),
+# dzięki czemu narzędzia bez GUI mogą importować moduł bez otwierania bazy użytkownika i config.json
+def __getattr__(name):
+    if name == "manager":
+        instance = StorageManager(DB_PATH)
+        globals()["manager"] = instance
+        return instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def load_language(lang_code="en"):
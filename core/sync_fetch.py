@@ -0,0 +1,80 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Liczba równoległych zapytań do chmury (tabele są niezależne, ogranicza nas tylko sieć)
+SYNC_WORKERS = 6
+
+
+# --- RÓWNOLEGŁE, STRONICOWANE POBIERANIE TABEL ---
+# Źródło: nazwa -> fetch(pozycja, limit, count), zwraca wiersze albo (wiersze, liczba wszystkich) gdy count=True.
+# Pierwsza strona każdej tabeli pyta o liczbę wierszy. Serwer może zwrócić mniej wierszy niż limit (max rows
+# w Supabase) - krokiem jest faktyczna długość strony, więc limit serwera nie ucina danych po cichu.
+#   * po kluczu (keys: nazwa -> kolumna klucza): pozycja = ostatni pobrany klucz (None na początku), strony
+#     jednej tabeli idą kolejno, tabele równolegle. Usunięcie wiersza w trakcie pobierania nie przesuwa
+#     kolejnych stron, więc żaden wiersz nie zostaje pominięty.
+#   * po offsecie (pozostałe źródła): pozycja = offset, po liczbie wierszy wszystkie strony naraz - tylko dla
+#     tabel, z których nic nie jest usuwane (sync_tombstones), inaczej usunięcie przesunęłoby wiersz poza strony.
+class TableFetcher:
+    def __init__(self, workers=None, page_size=1000):
+        self.workers = workers or SYNC_WORKERS
+        self.page_size = page_size
+        self.pages = 0
+        self.rows = 0
+
+    def _page(self, name, fetch, position, first):
+        if first:
+            result = fetch(position, self.page_size, True)
+            rows, total = result if isinstance(result, tuple) else (result, None)
+        else:
+            rows, total = fetch(position, self.page_size, False), None
+        return name, position, first, rows, total
+
+    #   GENERATOR (tabela, wiersze) w kolejności przychodzenia stron - zapis lokalny może iść równolegle z pobieraniem
+    def fetch(self, sources, keys=None):
+        keys = keys or {}
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sync-fetch")
+        pending = set()
+        # Długość pierwszej strony tabel bez liczby wierszy (krótsza strona = koniec tabeli)
+        step = {}
+        # Tryb po kluczu: liczba wierszy z pierwszej strony i dotąd pobrane
+        totals, fetched = {}, {}
+
+        def submit(name, position, first=False):
+            pending.add(pool.submit(self._page, name, sources[name], position, first))
+
+        def more(name, rows):
+            # Bez liczby wierszy koniec tabeli to strona krótsza niż pierwsza
+            if totals.get(name) is not None:
+                return fetched[name] < totals[name]
+            return len(rows) >= step.setdefault(name, len(rows))
+
+        try:
+            for name in sources:
+                submit(name, None if name in keys else 0, first=True)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    name, position, first, rows, total = future.result()
+                    self.pages += 1
+                    self.rows += len(rows)
+
+                    if name in keys:
+                        # Po kluczu: następna strona od ostatniego klucza tej strony
+                        if first:
+                            totals[name] = total
+                        fetched[name] = fetched.get(name, 0) + len(rows)
+                        if rows and more(name, rows):
+                            submit(name, rows[-1][keys[name]])
+                    elif first and total is not None:
+                        # Po offsecie, znamy liczbę wierszy - wszystkie kolejne strony naraz
+                        if rows:
+                            for next_offset in range(len(rows), total, len(rows)):
+                                submit(name, next_offset)
+                    elif rows and (first or name in step):
+                        # Po offsecie, bez liczby wierszy - kolejna strona dopiero po tej
+                        if more(name, rows):
+                            submit(name, position + len(rows))
+                    yield name, rows
+        finally:
+            # Błąd albo przerwane pobieranie: nie czekamy na strony, których nikt już nie odbierze
+            pool.shutdown(wait=False, cancel_futures=True)
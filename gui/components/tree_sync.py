@@ -0,0 +1,129 @@
+# Prefiks iid nadawanych wierszom bez własnego id (odstępy, nagłówki)
+ROW_ID_PREFIX = "_row:"
+
+
+#   STAŁE IID DLA WIERSZY BEZ ID: "_row:<ostatnie prawdziwe iid powyżej>:<numer>"
+#   (ten sam wiersz dostaje to samo iid przy kolejnym odświeżeniu, więc nie jest usuwany i wstawiany ponownie)
+def with_row_ids(rows):
+    keyed = []
+    anchor = ""
+    count = 0
+    for row in rows:
+        if row[0] is None:
+            keyed.append((f"{ROW_ID_PREFIX}{anchor}:{count}",) + tuple(row[1:]))
+            count += 1
+        else:
+            keyed.append(row)
+            anchor = row[0]
+            count = 0
+    return keyed
+
+
+# --- SYNCHRONIZACJA TREEVIEW Z LISTĄ WIERSZY ---
+# Wiersz: (iid, values, tags) albo (iid, values, tags, text) - text to kolumna #0 (drzewo).
+# Zamiast czyścić i budować tabelę od nowa, sync() usuwa, wstawia, przesuwa i aktualizuje tylko
+# zmienione wiersze, więc zaznaczenie i pozycja przewijania zostają, a zmiana jednego tematu to jedno item().
+class TreeviewSync:
+    def __init__(self, tree):
+        self.tree = tree
+        # Ostatnio wysłany stan wiersza: iid -> (values, tags, text)
+        self.state = {}
+
+    @staticmethod
+    def _row_state(row):
+        return tuple(row[1]), tuple(row[2]), row[3] if len(row) > 3 else ""
+
+    def _forget(self, iid):
+        for child in self.tree.get_children(iid):
+            self._forget(child)
+        self.state.pop(iid, None)
+
+    def _insert(self, parent, index, iid, state, opened):
+        values, tags, text = state
+        self.tree.insert(parent, index, iid=iid, values=values, tags=tags, text=text, open=iid in opened)
+        self.state[iid] = state
+
+    #   PEŁNA SYNCHRONIZACJA DZIECI `parent` Z LISTĄ WIERSZY (opened: iid rozwiniętych przy wstawieniu)
+    def sync(self, rows, parent="", opened=()):
+        rows = with_row_ids(rows)
+        wanted = {row[0] for row in rows}
+
+        # 1. Usuwanie wierszy, których nie ma w nowej liście
+        current = []
+        removed = []
+        for iid in self.tree.get_children(parent):
+            if iid in wanted:
+                current.append(iid)
+            else:
+                removed.append(iid)
+        for iid in removed:
+            self._forget(iid)
+        if removed:
+            self.tree.delete(*removed)
+
+        # 2. Przejście po nowej kolejności: wiersze 0..i-1 są już na miejscu, więc indeks i jest aktualny.
+        # Zgodny wiersz tylko przesuwa wskaźnik; inny jest przenoszony (move) albo wstawiany (insert).
+        j = 0
+        placed = set()
+        for i, row in enumerate(rows):
+            iid = row[0]
+            while j < len(current) and current[j] in placed:
+                j += 1
+            state = self._row_state(row)
+
+            if iid not in self.state:
+                self._insert(parent, i, iid, state, opened)
+            else:
+                if j < len(current) and current[j] == iid:
+                    j += 1
+                else:
+                    # Wiersz z innego miejsca (albo spod innego rodzica)
+                    self.tree.move(iid, parent, i)
+                if self.state[iid] != state:
+                    values, tags, text = state
+                    self.tree.item(iid, values=values, tags=tags, text=text)
+                    self.state[iid] = state
+            placed.add(iid)
+
+    #   DOPISANIE WIERSZY NA KOŃCU (np. kolejna porcja wirtualizowanej tabeli)
+    def append(self, rows, parent=""):
+        for row in with_row_ids(rows):
+            if row[0] in self.state:
+                continue
+            self._insert(parent, "end", row[0], self._row_state(row), ())
+
+    #   WSTAWIENIE WIERSZY NA POCZĄTKU (okno wirtualizowanej tabeli przesuwane w górę)
+    def prepend(self, rows, parent=""):
+        for i, row in enumerate(with_row_ids(rows)):
+            if row[0] not in self.state:
+                self._insert(parent, i, row[0], self._row_state(row), ())
+
+    #   USUNIĘCIE WIERSZY (np. daleko poza widokiem wirtualizowanej tabeli)
+    def remove(self, iids):
+        iids = [iid for iid in iids if iid in self.state]
+        for iid in iids:
+            self._forget(iid)
+        if iids:
+            self.tree.delete(*iids)
+
+    def get_values(self, iid):
+        state = self.state.get(iid)
+        return state[0] if state else None
+
+    #   ZMIANA JEDNEGO WIERSZA POZA sync() (stan zapamiętany, żeby kolejny sync() go wyrównał)
+    def update(self, iid, values=None, tags=None):
+        if iid not in self.state:
+            return
+        old_values, old_tags, text = self.state[iid]
+        state = (tuple(values) if values is not None else old_values,
+                 tuple(tags) if tags is not None else old_tags, text)
+        if state != self.state[iid]:
+            self.tree.item(iid, values=state[0], tags=state[1])
+            self.state[iid] = state
+
+    def clear(self, parent=""):
+        children = self.tree.get_children(parent)
+        for iid in children:
+            self._forget(iid)
+        if children:
+            self.tree.delete(*children)
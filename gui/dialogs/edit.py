@@ -354,11 +354,19 @@ class EditTopicPanel(ctk.CTkFrame):
         self.original_date = topic_data.get("scheduled_date", "")
         if self.original_date: self.ent_date.set_date(self.original_date)
 
+        # Szacowany czas nauki (puste = domyślny, wyliczany ze statystyk timera)
+        ctk.CTkLabel(self.center_box, text=self.txt.get("form_estimate", "Estimated time (min)")).grid(row=4, column=0,
+                                                                                                    padx=10, pady=10,
+                                                                                                    sticky="e")
+        self.ent_estimate = ctk.CTkEntry(self.center_box, width=80)
+        if topic_data.get("estimated_minutes"): self.ent_estimate.insert(0, str(topic_data["estimated_minutes"]))
+        self.ent_estimate.grid(row=4, column=1, padx=10, pady=10, sticky="w")
+
         self.is_locked = tk.BooleanVar(value=topic_data.get("locked", False))
         check_locked = ctk.CTkCheckBox(self.center_box, text=self.txt["form_lock"], variable=self.is_locked,
                                        onvalue=True,
                                        offvalue=False)
-        check_locked.grid(row=4, column=0, columnspan=2, pady=20)
+        check_locked.grid(row=5, column=0, columnspan=2, pady=20)
 
         btn_frame = ctk.CTkFrame(self.center_box, fg_color="transparent")
         btn_frame.grid(row=6, column=0, columnspan=2, pady=10)
@@ -392,8 +400,15 @@ class EditTopicPanel(ctk.CTkFrame):
             messagebox.showwarning(self.txt["msg_error"], self.txt["msg_topic_name_req"])
             return
 
+        estimate = self.ent_estimate.get().strip()
+        if estimate and (not estimate.isdigit() or int(estimate) <= 0):
+            messagebox.showwarning(self.txt["msg_error"],
+                                   self.txt.get("msg_estimate_invalid", "Estimated time must be a positive number of minutes."))
+            return
+
         updated_topic = dict(self.topic_data)
         updated_topic["name"] = new_name
+        updated_topic["estimated_minutes"] = int(estimate) if estimate else None
         if not new_date.strip():
             updated_topic["scheduled_date"] = None
         else:
@@ -4,6 +4,7 @@ import customtkinter as ctk
 from datetime import date
 from core.planner import date_format
 from gui.dialogs.notebook import NotebookWindow
+from gui.components.tree_sync import TreeviewSync
 
 
 class ArchivePanel(ctk.CTkFrame):
@@ -96,6 +97,7 @@ class ArchivePanel(ctk.CTkFrame):
         self.tree.tag_configure("subject_row", font=("Arial", 12, "bold"), background=bg_subject)
         self.tree.tag_configure("active", foreground=active_color, font=("Arial", 12, "bold"))
         self.tree.tag_configure("past", foreground="gray", font=("Arial", 12, "bold"))
+        self.tree_sync = TreeviewSync(self.tree)
 
         scrollbar = ctk.CTkScrollbar(frame, orientation="vertical", command=self.tree.yview, fg_color="transparent",
                                      bg_color="transparent")
@@ -162,7 +164,6 @@ class ArchivePanel(ctk.CTkFrame):
 
     def refresh_list(self):
         if not self.storage: return
-        for item in self.tree.get_children(): self.tree.delete(item)
         today = date.today()
         selected_sem_name = self.combo_semester.get()
         selected_sem_id = self.semester_map.get(selected_sem_name)
@@ -174,6 +175,11 @@ class ArchivePanel(ctk.CTkFrame):
         subjects_to_show.sort(key=lambda x: x["name"])
         all_exams = [dict(e) for e in self.storage.get_exams()]
 
+        # Wiersze przedmiotów i egzaminów synchronizowane z drzewem (rozwinięcie istniejących węzłów zostaje)
+        subject_rows = []
+        exam_rows = {}
+        expanded = set()
+
         for subject in subjects_to_show:
             sub_exams = [e for e in all_exams if e["subject_id"] == subject["id"]]
             sub_exams.sort(key=lambda x: str(x["date"] or "9999-99-99"))
@@ -185,7 +191,9 @@ class ArchivePanel(ctk.CTkFrame):
             done_topics = 0
 
             # Węzeł Rodzica: Nazwa Przedmiotu
-            parent_id = self.tree.insert("", "end", text=subject["name"], open=is_expanded, tags=("subject_row",))
+            parent_id = f"subject:{subject['id']}"
+            if is_expanded: expanded.add(parent_id)
+            exam_rows[parent_id] = []
 
             for exam in sub_exams:
                 exam_date = date_format(exam["date"])
@@ -208,14 +216,19 @@ class ArchivePanel(ctk.CTkFrame):
 
                 # Węzeł Dziecka: Tutaj wstawiamy TYTUŁ (Formę) jako główny tekst (kolumna #0)
                 # Dzięki temu nie potrzebujemy osobnej kolumny
-                self.tree.insert(parent_id, "end", iid=exam["id"],
-                                 text=exam["title"],  # <--- TUTAJ ZMIANA
-                                 values=(exam["date"], status_txt, progress_str), tags=(tag,))
+                exam_rows[parent_id].append((exam["id"], (exam["date"], status_txt, progress_str), (tag,),
+                                             exam["title"]))  # <--- TUTAJ ZMIANA
 
+            summary_values = ()
             if total_topics > 0:
                 pct = int((done_topics / total_topics) * 100)
                 summary = f"{done_topics}/{total_topics} ({pct}%)"
-                self.tree.set(parent_id, "postep", summary)
+                summary_values = ("", "", summary)
+            subject_rows.append((parent_id, summary_values, ("subject_row",), subject["name"]))
+
+        self.tree_sync.sync(subject_rows, opened=expanded)
+        for parent_id, rows in exam_rows.items():
+            self.tree_sync.sync(rows, parent=parent_id)
 
     def delete_selected(self):
         selection = self.tree.selection()
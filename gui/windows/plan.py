@@ -1,13 +1,24 @@
+import queue
+import threading
 import tkinter as tk
 from tkinter import messagebox, ttk
 import customtkinter as ctk
 from datetime import date, timedelta
-from core.planner import plan, date_format
+from core.planner import (compute_plan, compute_replan, commit_plan, date_format, PlanCancelled,
+                          PlanStale, CHANGE_BLOCK_DATE, CHANGE_UNBLOCK_DATE)
+from core.plan_rows import build_plan_rows
 # ZMIANA: Importujemy nowe Panele zamiast Window
 from gui.dialogs.add_exam import AddExamPanel
 from gui.windows.archive import ArchivePanel
 from gui.dialogs.edit import select_edit_item, EditExamPanel, EditTopicPanel
 from gui.components.drawers import NoteDrawer
+from gui.components.tree_sync import TreeviewSync, with_row_ids
+
+# Wirtualizacja tabeli: w drzewie jest tylko okno wierszy modelu (najwyżej ROW_WINDOW), przesuwane porcjami
+# ROW_CHUNK, gdy widok zbliża się do krawędzi okna (ROW_PREFETCH od góry albo od dołu)
+ROW_CHUNK = 150
+ROW_WINDOW = 3 * ROW_CHUNK
+ROW_PREFETCH = 0.85
 
 
 # --- GŁÓWNA KLASA OKNA PLANU ---
@@ -28,6 +39,30 @@ class PlanWindow:
         self.dragged_item = None
         self.drag_tooltip = None
 
+        # Model wierszy tabeli i ile z nich jest już wstawionych do Treeview
+        self.rows = []
+        self.row_index = {}
+        # Okno wierszy modelu wstawionych do drzewa: self.rows[win_start:win_end]
+        self.win_start = 0
+        self.win_end = 0
+        self.load_pending = False
+
+        # --- PLANOWANIE W TLE (wątek roboczy + kolejka odczytywana przez after()) ---
+        self.is_planning = False
+        self.plan_cancel = threading.Event()
+        self.plan_args = (False, None)
+        self.plan_queue = queue.Queue()
+
+        self.progress_frame = ctk.CTkFrame(self.win, fg_color="transparent")
+        self.lbl_progress = ctk.CTkLabel(self.progress_frame, text=self.txt.get("msg_planning", "Planning..."),
+                                         font=("Arial", 12, "bold"))
+        self.lbl_progress.pack(side="left", padx=(5, 10))
+        self.progress_bar = ctk.CTkProgressBar(self.progress_frame)
+        self.progress_bar.pack(side="left", fill="x", expand=True)
+        self.btn_cancel_plan = ctk.CTkButton(self.progress_frame, text=self.txt.get("btn_cancel", "Cancel"), width=80,
+                                             command=self.cancel_planning, **self.btn_style)
+        self.btn_cancel_plan.pack(side="left", padx=(10, 0))
+
         self.table_frame = ctk.CTkFrame(self.win, fg_color="transparent")
         self.table_frame.pack(fill="both", expand=True, padx=0, pady=8)
 
@@ -53,11 +88,12 @@ class PlanWindow:
         self.tree.tag_configure("yellow", foreground="yellow", font=("Arial", 12, "bold"))
         self.tree.tag_configure("overdue", foreground="gray", font=("Arial", 12, "italic", "bold"))
         self.tree.tag_configure("blocked", foreground="gray", font=("Arial", 12))
+        self.tree_sync = TreeviewSync(self.tree)
 
-        scrollbar = ctk.CTkScrollbar(self.table_frame, orientation="vertical", command=self.tree.yview,
-                                     fg_color="transparent", bg_color="transparent")
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side="right", fill="y", padx=(2, 0))
+        self.scrollbar = ctk.CTkScrollbar(self.table_frame, orientation="vertical", command=self.tree.yview,
+                                          fg_color="transparent", bg_color="transparent")
+        self.tree.configure(yscrollcommand=self.on_tree_yscroll)
+        self.scrollbar.pack(side="right", fill="y", padx=(2, 0))
         self.tree.pack(side="left", fill="both", expand=True)
 
         self.lbl_empty = ctk.CTkLabel(self.table_frame,
@@ -138,6 +174,7 @@ class PlanWindow:
 
     # --- METODY DLA NOWYCH PRZYCISKÓW ---
     def delete_selected_item(self):
+        if self.is_busy(): return
         selected = self.tree.selection()
         if not selected: return
         item_id = selected[0]
@@ -167,6 +204,7 @@ class PlanWindow:
         self.toggle_status()
 
     def move_selected_to_today(self):
+        if self.is_busy(): return
         selected = self.tree.selection()
         if not selected: return
         item_id = selected[0]
@@ -231,150 +269,107 @@ class PlanWindow:
         if preserve_selection:
             sel = self.tree.selection()
             if sel: selected_id = sel[0]
-
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # 1. ZALEGŁE
-        self.tree.insert("", "end", values=("", "", ""))
-        active_exams_ids = {e["id"] for e in exams if date_format(e["date"]) >= date.today()}
-        overdue_topics = [
-            t for t in topics
-            if t.get("scheduled_date") and date_format(t["scheduled_date"]) < date.today()
-               and t["status"] == "todo" and t["exam_id"] in active_exams_ids
-        ]
-
-        if overdue_topics:
-            self.tree.insert("", "end", values=("", self.txt["tag_overdue"], ""), tags=("overdue",))
-            for topic in overdue_topics:
-                subj_name = self.txt["val_other"]
-                for exam in exams:
-                    if exam["id"] == topic["exam_id"]:
-                        subj_name = exam["subject"]
-                        break
-                has_note = topic.get("note", "").strip()
-                is_locked = topic.get("locked", False)
-                marks = ""
-                if has_note: marks += " ✎"
-                if is_locked: marks += " ☒"
-                self.tree.insert("", "end", iid=topic["id"],
-                                 values=(marks, f"{topic['scheduled_date']}\t{subj_name}", topic["name"]),
-                                 tags=("overdue",))
-            self.tree.insert("", "end", values=("", "", ""))
-
-        # 2. DATY (Główna pętla)
-        all_dates = set()
-        for exam in exams:
-            if date_format(exam["date"]) >= date.today():
-                all_dates.add(str(exam["date"]))
-        for topic in topics:
-            if topic.get("scheduled_date") and date_format(topic["scheduled_date"]) >= date.today():
-                all_dates.add(str(topic["scheduled_date"]))
-
-        if all_dates:
-            for bd in blocked_dates:
-                if bd >= str(date.today()) and bd <= max(all_dates):
-                    all_dates.add(bd)
-
-        sorted_dates = sorted(list(all_dates))
-
-        # Rysowanie wierszy...
-        for day_str in sorted_dates:
-            todays_exams = [e for e in exams if e["date"] == day_str]
-            todays_topics = [t for t in topics if str(t.get("scheduled_date")) == day_str]
-            is_blocked = day_str in blocked_dates
-            has_exams = len(todays_exams) > 0
-
-            days_left = (date_format(day_str) - date.today()).days
-            display_text = ""
-            tag = "normal"
-            icon = "●"
-
-            if is_blocked and not has_exams:
-                display_text = self.txt.get("tag_day_off", "(Day Off)")
-                tag = "blocked"
-                icon = "○"
-            else:
-                if days_left == 0:
-                    display_text = self.txt["tag_today"]
-                    tag = "today"
-                elif days_left == 1:
-                    display_text = self.txt["tag_1_day"]
-                    tag = "red"
-                else:
-                    display_text = self.txt["tag_x_days"].format(days=days_left)
-                    if days_left <= 3:
-                        tag = "orange"
-                    elif days_left <= 6:
-                        tag = "yellow"
-                if is_blocked:
-                    display_text += f" {self.txt.get('tag_day_off', '(Day Off)')}"
-                    icon = "○"
-
-            weekday_idx = date_format(day_str).weekday()
-            day_name = self.txt["days_short"][weekday_idx]
-
-            self.tree.insert("", "end", iid=f"date_{day_str}",
-                             values=(icon, f"{display_text} ({day_name}, {day_str})", ""),
-                             tags=(tag,))
-
-            if not is_blocked or has_exams:
-                self.tree.insert("", "end", values=("│", "", ""), tags=("todo",))
-                for exam in todays_exams:
-                    marks = ""
-                    if exam.get("note", "").strip(): marks += " ✎"
-                    if exam.get("ignore_barrier", False): marks += " ø"
-                    self.tree.insert("", "end", iid=exam["id"], values=(f"{marks} │", exam["subject"], exam["title"]),
-                                     tags=("exam",))
-
-                if not is_blocked:
-                    if todays_exams and todays_topics: self.tree.insert("", "end", values=("│", "", ""), tags=("todo",))
-
-                    for topic in todays_topics:
-                        subj_name = self.txt["val_other"]
-                        parent_exam = None
-                        for exam in exams:
-                            if exam["id"] == topic["exam_id"]:
-                                subj_name = exam["subject"]
-                                parent_exam = exam
-                                break
-
-                        has_note = topic.get("note", "").strip()
-                        marks = " ✎" if has_note else ""
-                        if topic.get("locked", False): marks += " ☒"
-
-                        final_tags = []
-                        if topic["status"] == "done":
-                            final_tags.append("done")
-                        else:
-                            if parent_exam and parent_exam.get("color"):
-                                col = parent_exam["color"]
-                                tag_col_name = f"theme_{parent_exam['id']}"
-                                self.tree.tag_configure(tag_col_name, foreground=col, font=("Arial", 13, "bold"))
-                                final_tags.append(tag_col_name)
-                            else:
-                                final_tags.append("todo")
-
-                        self.tree.insert("", "end", iid=topic["id"],
-                                         values=(f"{marks} │", subj_name, topic["name"]),
-                                         tags=tuple(final_tags))
-                self.tree.insert("", "end", values=("│", "", ""), tags=("todo",))
-            self.tree.insert("", "end", values=("", "", ""))
+        elif self.tree.selection():
+            # Bez zachowania zaznaczenia odświeżenie je czyści (jak przy dawnej przebudowie tabeli)
+            self.tree.selection_remove(self.tree.selection())
+
+        # Model wierszy liczony w całości, ale do drzewa trafia tylko to, co widać (+ zapas)
+        model = build_plan_rows(exams, topics, blocked_dates, self.txt)
+
+        for tag_name, col in model.theme_tags.items():
+            self.tree.tag_configure(tag_name, foreground=col, font=("Arial", 13, "bold"))
+
+        self.rows = with_row_ids(model.rows)
+        self.row_index = {row[0]: i for i, row in enumerate(self.rows)}
+        self.load_pending = False
+
+        # To samo okno co przed odświeżeniem (pozycja przewijania zostaje), ale nie większe niż ROW_WINDOW;
+        # zaznaczony wiersz poza oknem -> okno przesuwane do niego
+        size = min(ROW_WINDOW, max(ROW_CHUNK, self.win_end - self.win_start))
+        start = min(self.win_start, max(0, len(self.rows) - size))
+        target = self.row_index.get(selected_id, -1) if selected_id else -1
+        if target >= 0 and not start <= target < start + size:
+            start = max(0, target - ROW_CHUNK)
+        self.win_start, self.win_end = start, min(len(self.rows), start + size)
+        self.tree_sync.sync(self.rows[self.win_start:self.win_end])
 
         if selected_id and self.tree.exists(selected_id):
             self.tree.selection_set(selected_id)
             self.tree.see(selected_id)
 
         # --- LOGIKA PUSTEGO STANU ---
-        has_future_items = len(sorted_dates) > 0
-        has_overdue_items = len(overdue_topics) > 0
-
-        if not has_future_items and not has_overdue_items:
+        if not model.has_items:
             self.lbl_empty.place(relx=0.5, rely=0.5, anchor="center")
             self.lbl_empty.lift()
         else:
             self.lbl_empty.place_forget()
 
+    # --- WIRTUALIZACJA TABELI ---
+    #   PRZEWIJANIE: pasek przewijania + przesunięcie okna, gdy widok zbliża się do jego krawędzi
+    def on_tree_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.load_pending:
+            return
+        # Wstawianie poza callbackiem przewijania (insert sam wywołuje yscrollcommand)
+        if float(last) >= ROW_PREFETCH and self.win_end < len(self.rows):
+            self.load_pending = True
+            self.tree.after_idle(self.load_next_chunk)
+        elif float(first) <= 1 - ROW_PREFETCH and self.win_start > 0:
+            self.load_pending = True
+            self.tree.after_idle(self.load_prev_chunk)
+
+    def _top_row(self):
+        # Indeks (w modelu) pierwszego widocznego wiersza
+        return self.win_start + round(self.tree.yview()[0] * (self.win_end - self.win_start))
+
+    def _keep_top_row(self, top):
+        # Po zmianie okna ten sam wiersz zostaje na górze widoku
+        size = self.win_end - self.win_start
+        if size:
+            self.tree.yview_moveto((top - self.win_start) / size)
+
+    def _selected_row(self):
+        sel = self.tree.selection()
+        return self.row_index.get(sel[0], -1) if sel else -1
+
+    def load_next_chunk(self):
+        self.load_pending = False
+        end = min(len(self.rows), self.win_end + ROW_CHUNK)
+        if end <= self.win_end:
+            return
+        top = self._top_row()
+        self.tree_sync.append(self.rows[self.win_end:end])
+        self.win_end = end
+
+        # Wiersze daleko nad widokiem wypadają z drzewa (bez zaznaczonego - jego usunięcie zamknęłoby szufladę)
+        drop = max(0, self.win_end - self.win_start - ROW_WINDOW)
+        selected = self._selected_row()
+        if self.win_start <= selected < self.win_start + drop:
+            drop = selected - self.win_start
+        if drop:
+            self.tree_sync.remove([row[0] for row in self.rows[self.win_start:self.win_start + drop]])
+            self.win_start += drop
+        self._keep_top_row(top)
+
+    def load_prev_chunk(self):
+        self.load_pending = False
+        start = max(0, self.win_start - ROW_CHUNK)
+        if start >= self.win_start:
+            return
+        top = self._top_row()
+        self.tree_sync.prepend(self.rows[start:self.win_start])
+        self.win_start = start
+
+        # Wiersze daleko pod widokiem wypadają z drzewa (bez zaznaczonego)
+        drop = max(0, self.win_end - self.win_start - ROW_WINDOW)
+        selected = self._selected_row()
+        if self.win_end - drop <= selected < self.win_end:
+            drop = self.win_end - selected - 1
+        if drop:
+            self.tree_sync.remove([row[0] for row in self.rows[self.win_end - drop:self.win_end]])
+            self.win_end -= drop
+        self._keep_top_row(top)
+
     # --- ZMIANA ZAZNACZENIA ---
     def on_selection_change(self, event):
         selected = self.tree.selection()
@@ -477,6 +472,7 @@ class PlanWindow:
             self.selection_callback("idle", "idle", "idle")
 
     def toggle_status(self, generate=True):
+        if self.is_busy(): return
         selected = self.tree.selection()
         if not selected: return
         item_id = selected[0]
@@ -507,35 +503,133 @@ class PlanWindow:
 
             if date_str in blocked_dates:
                 self.storage.remove_blocked_date(date_str)
+                change = (CHANGE_UNBLOCK_DATE, date_str)
             else:
                 stats = self.storage.get_global_stats()
                 days_off = stats.get("days_off", 0) + 1
                 self.storage.update_global_stat("days_off", days_off)
                 self.storage.add_blocked_date(date_str)
+                change = (CHANGE_BLOCK_DATE, date_str)
 
             if generate:
-                self.run_and_refresh()
+                # Przeplanowujemy tylko egzaminy, których okno obejmuje ten dzień
+                self.run_and_refresh(change=change)
             else:
                 self.refresh_table(preserve_selection=True)
                 if self.dashboard_callback: self.dashboard_callback()
 
-    def run_and_refresh(self, only_unscheduled=False):
+    # --- PLANOWANIE W WĄTKU ROBOCZYM ---
+    def is_busy(self):
+        # Podczas planowania drzewo jest tylko do odczytu
+        if self.is_planning:
+            self.win.bell()
+            return True
+        return False
+
+    def run_and_refresh(self, only_unscheduled=False, change=None):
+        if self.is_planning:
+            return
+        if not self.storage:
+            messagebox.showerror(self.txt["msg_error"], "Brak połączenia z bazą danych.")
+            return
+
+        self.is_planning = True
+        # Argumenty zapamiętane do ponownego przeliczenia, gdy plan okaże się nieaktualny
+        self.plan_args = (only_unscheduled, change)
+        self.plan_cancel.clear()
+        self.plan_queue = queue.Queue()
+        self.progress_bar.set(0)
+        self.progress_frame.pack(fill="x", padx=0, pady=(8, 0), before=self.table_frame)
+
+        threading.Thread(target=self._plan_worker, args=(self.plan_queue, only_unscheduled, change),
+                         daemon=True).start()
+        self.win.after(50, self._poll_planning)
+
+    def cancel_planning(self):
+        self.plan_cancel.set()
+
+    def _plan_worker(self, out, only_unscheduled, change):
+        # Tylko odczyt i obliczenia - SQLiteProvider daje temu wątkowi osobne połączenie.
+        # Tk nie jest bezpieczny wątkowo, więc wyniki idą przez kolejkę, a nie bezpośrednio do widgetów.
+        def progress(done, total):
+            out.put(("progress", done, total))
+
+        try:
+            if change:
+                result = compute_replan(self.storage, *change, progress=progress, cancel_event=self.plan_cancel)
+            else:
+                result = compute_plan(self.storage, only_unscheduled=only_unscheduled, progress=progress,
+                                      cancel_event=self.plan_cancel)
+            out.put(("done", result, change is None))
+        except PlanCancelled:
+            out.put(("cancelled",))
+        except Exception as e:
+            out.put(("error", e))
+
+    def _poll_planning(self):
+        last_progress = None
         try:
-            if not self.storage:
-                messagebox.showerror(self.txt["msg_error"], "Brak połączenia z bazą danych.")
+            while True:
+                msg = self.plan_queue.get_nowait()
+                if msg[0] == "progress":
+                    last_progress = msg
+                else:
+                    self._finish_planning(msg)
+                    return
+        except queue.Empty:
+            pass
+
+        if last_progress and last_progress[2]:
+            self.progress_bar.set(last_progress[1] / last_progress[2])
+        self.win.after(50, self._poll_planning)
+
+    def _finish_planning(self, msg):
+        self.progress_frame.pack_forget()
+        try:
+            if msg[0] == "cancelled":
+                return
+            if msg[0] == "error":
+                raise msg[1]
+
+            result, preview = msg[1], msg[2]
+            # Podgląd: ile tematów zmieni datę, zanim cokolwiek zapiszemy
+            if preview and result.changes and not messagebox.askyesno(
+                    self.txt.get("msg_confirm", "Confirmation"),
+                    self.txt.get("msg_plan_preview", "{count} topics will move.\n\nApply the new plan?").format(
+                        count=result.moved_count)):
                 return
 
-            # Uruchamiamy planer BEZPOŚREDNIO na bazie danych (Pure SQL)
-            plan(self.storage, only_unscheduled=only_unscheduled)
+            # Zapis w jednej transakcji (update_topic_dates), dopiero po zakończeniu obliczeń
+            commit_plan(self.storage, result)
+            infeasible = result.infeasible
 
             self.refresh_table()
             if self.dashboard_callback: self.dashboard_callback()
-            messagebox.showinfo(self.txt["msg_success"], self.txt["msg_plan_done"])
+            if infeasible:
+                # Tryb z limitami: egzaminy, które nie zmieściły się w max_per_day / max_same_subject_per_day
+                titles = {e["id"]: f"{e['subject']} - {e['title']}" for e in self.storage.get_exams()}
+                lines = "\n".join(f"• {titles.get(e_id, e_id)}: {count}" for e_id, count in infeasible.items())
+                messagebox.showwarning(self.txt["msg_warning"],
+                                       self.txt.get("msg_plan_infeasible",
+                                                    "Some exams do not fit within the daily limits "
+                                                    "(topics placed over the limit):\n\n{exams}").format(exams=lines))
+            else:
+                messagebox.showinfo(self.txt["msg_success"], self.txt["msg_plan_done"])
+        except PlanStale:
+            # Dane zmieniły się w trakcie liczenia / podglądu - liczymy od nowa na aktualnych danych
+            messagebox.showinfo(self.txt.get("msg_info", "Info"),
+                                self.txt.get("msg_plan_stale",
+                                             "Data changed while the plan was being prepared. "
+                                             "The plan will be recalculated."))
+            self.win.after(0, lambda: self.run_and_refresh(*self.plan_args))
         except Exception as e:
             messagebox.showerror(self.txt["msg_error"], f"Error: {e}")
             print(f"DEBUG ERROR: {e}")
+        finally:
+            self.is_planning = False
 
     def open_add_window(self):
+        if self.is_busy(): return
         def on_add():
             self.refresh_table()
             if self.dashboard_callback: self.dashboard_callback()
@@ -553,6 +647,7 @@ class PlanWindow:
             pass
 
     def open_edit(self):
+        if self.is_busy(): return
         def on_edit():
             self.refresh_table()
             if self.dashboard_callback: self.dashboard_callback()
@@ -594,6 +689,7 @@ class PlanWindow:
                      storage=self.storage).pack(fill="both", expand=True)
 
     def toggle_lock(self):
+        if self.is_busy(): return
         selected = self.tree.selection()
         if not selected: return
         item_id = selected[0]
@@ -606,6 +702,7 @@ class PlanWindow:
             self.refresh_table(preserve_selection=True)
 
     def toggle_exam_barrier(self):
+        if self.is_busy(): return
         selected = self.tree.selection()
         if not selected: return
         item_id = selected[0]
@@ -619,6 +716,7 @@ class PlanWindow:
             messagebox.showinfo(self.txt["msg_info"], self.txt.get("msg_barrier_changed", "Zmieniono ustawienia."))
 
     def move_to_tomorrow(self):
+        if self.is_busy(): return
         selected = self.tree.selection()
         if not selected: return
         item_id = selected[0]
@@ -636,6 +734,7 @@ class PlanWindow:
             if self.dashboard_callback: self.dashboard_callback()
 
     def open_edit_exam_context(self):
+        if self.is_busy(): return
         selected = self.tree.selection()
         if not selected: return
         item_id = selected[0]
@@ -672,7 +771,7 @@ class PlanWindow:
 
     def on_drag_start(self, event):
         item_id = self.tree.identify_row(event.y)
-        if not item_id:
+        if not item_id or self.is_planning:
             self.dragged_item = None
             return
 
@@ -712,11 +811,11 @@ class PlanWindow:
         if str(current_check).startswith("date_"):
             target_date_str = str(current_check).replace("date_", "")
         else:
-            while current_check:
-                if str(current_check).startswith("date_"):
-                    target_date_str = str(current_check).replace("date_", "")
+            # Nagłówek dnia szukany w modelu wierszy (może leżeć nad oknem wstawionym do drzewa)
+            for i in range(self.row_index.get(target_id, -1), -1, -1):
+                if str(self.rows[i][0]).startswith("date_"):
+                    target_date_str = str(self.rows[i][0]).replace("date_", "")
                     break
-                current_check = self.tree.prev(current_check)
         if not target_date_str:
             self.dragged_item = None
             return
@@ -31,6 +31,11 @@ class SettingsWindow:
         self.var_badges = tk.StringVar(value=self.current_settings.get("badge_mode", "default"))
         self.var_switch_hour = tk.DoubleVar(value=float(self.current_settings.get("next_exam_switch_hour", 24)))
 
+        # ZMIENNE TRYBU PLANERA (limity dzienne, 0 = bez limitu)
+        self.var_planner_mode = tk.StringVar(value=self.current_settings.get("planner_mode", "default"))
+        self.var_max_per_day = tk.DoubleVar(value=float(self.current_settings.get("max_per_day", 2)))
+        self.var_max_same_subject = tk.DoubleVar(value=float(self.current_settings.get("max_same_subject_per_day", 1)))
+
         # NOWE ZMIENNE HARMONOGRAMU (PLANU)
         self.var_sch_full_name = tk.BooleanVar(value=self.current_settings.get("schedule_use_full_name", False))
         self.var_sch_times = tk.BooleanVar(value=self.current_settings.get("schedule_show_times", False))
@@ -284,6 +289,41 @@ class SettingsWindow:
         ctk.CTkLabel(f, text=self.txt.get("msg_switch_time_note", "Hour to switch 'Nearest Exam' view."),
                      text_color="gray", font=("Arial", 11)).pack(anchor="w")
 
+        # Separator
+        ctk.CTkFrame(f, height=2, fg_color=("gray70", "gray30")).pack(fill="x", pady=20)
+
+        # --- SEKCJA TRYB PLANERA ---
+        ctk.CTkLabel(f, text=self.txt.get("set_planner_mode", "Planning Mode"),
+                     font=("Arial", 16, "bold")).pack(anchor="w", pady=(0, 10))
+        ctk.CTkRadioButton(f, text=self.txt.get("set_planner_default", "Each exam separately"),
+                           variable=self.var_planner_mode, value="default").pack(anchor="w", pady=2)
+        ctk.CTkRadioButton(f, text=self.txt.get("set_planner_capacity", "All exams together (daily limits)"),
+                           variable=self.var_planner_mode, value="capacity").pack(anchor="w", pady=2)
+        ctk.CTkRadioButton(f, text=self.txt.get("set_planner_effort", "Balance study time (topic estimates)"),
+                           variable=self.var_planner_mode, value="effort").pack(anchor="w", pady=2)
+
+        def limit_text(v):
+            return str(int(v)) if int(v) > 0 else self.txt.get("set_no_limit", "No limit")
+
+        # Limity dzienne (suwaki, 0 = bez limitu)
+        ctk.CTkLabel(f, text=self.txt.get("set_max_per_day", "Max topics per day"),
+                     font=("Arial", 12, "bold")).pack(anchor="w", pady=(15, 2))
+        self.lbl_max_per_day = ctk.CTkLabel(f, text=limit_text(self.var_max_per_day.get()))
+        self.lbl_max_per_day.pack(anchor="w")
+        ctk.CTkSlider(f, from_=0, to=10, number_of_steps=10, variable=self.var_max_per_day,
+                      command=lambda v: self.lbl_max_per_day.configure(text=limit_text(v))).pack(anchor="w", fill="x",
+                                                                                                 pady=5)
+
+        ctk.CTkLabel(f, text=self.txt.get("set_max_same_subject", "Max topics of one subject per day"),
+                     font=("Arial", 12, "bold")).pack(anchor="w", pady=(10, 2))
+        self.lbl_max_same_subject = ctk.CTkLabel(f, text=limit_text(self.var_max_same_subject.get()))
+        self.lbl_max_same_subject.pack(anchor="w")
+        ctk.CTkSlider(f, from_=0, to=5, number_of_steps=5, variable=self.var_max_same_subject,
+                      command=lambda v: self.lbl_max_same_subject.configure(text=limit_text(v))).pack(anchor="w",
+                                                                                                      fill="x", pady=5)
+        ctk.CTkLabel(f, text=self.txt.get("msg_planner_limits_note", "Limits apply only in the 'All exams together' mode."),
+                     text_color="gray", font=("Arial", 11)).pack(anchor="w")
+
     def _init_data_frame(self):
         f = ctk.CTkFrame(self.frame_content, fg_color="transparent")
         self.frames["data"] = f
@@ -297,6 +337,13 @@ class SettingsWindow:
             email = getattr(user, 'email', str(user))
             ctk.CTkLabel(f, text=f"{self.txt.get('lbl_logged_in_as', 'Logged in as:')} {email}",
                          text_color="gray").pack(anchor="w", pady=(0, 5))
+            # Stan kolejki zapisów do chmury (oczekujące / odłożone, opóźnienie ostatniej wysyłki)
+            stats = self.storage.sync_stats()
+            latency = f"{stats['last_latency']:.1f}s" if stats["last_latency"] is not None else "-"
+            queue_text = self.txt.get("lbl_sync_queue",
+                                      "Sync queue: {pending} pending, {failed} failed, last upload {latency}")
+            ctk.CTkLabel(f, text=queue_text.format(pending=stats["pending"], failed=stats["failed"], latency=latency),
+                         text_color="gray").pack(anchor="w", pady=(0, 5))
             ctk.CTkButton(f, text=self.txt.get("btn_logout", "Log Out"), fg_color="#e67e22", hover_color="#d35400",
                           command=self._perform_logout).pack(anchor="w", pady=(0, 20))
         else:
@@ -582,6 +629,11 @@ class SettingsWindow:
         self.storage.update_setting("badge_mode", self.var_badges.get())
         self.storage.update_setting("next_exam_switch_hour", int(self.var_switch_hour.get()))
 
+        # Zapis trybu planera
+        self.storage.update_setting("planner_mode", self.var_planner_mode.get())
+        self.storage.update_setting("max_per_day", int(self.var_max_per_day.get()))
+        self.storage.update_setting("max_same_subject_per_day", int(self.var_max_same_subject.get()))
+
         # Zapis opcji Harmonogramu
         self.storage.update_setting("schedule_use_full_name", self.var_sch_full_name.get())
         self.storage.update_setting("schedule_show_times", self.var_sch_times.get())
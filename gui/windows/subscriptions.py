@@ -3,6 +3,7 @@ from tkinter import ttk, messagebox
 import customtkinter as ctk
 from datetime import date, datetime
 import calendar
+from gui.components.tree_sync import TreeviewSync
 
 
 class SubscriptionsPanel(ctk.CTkFrame):
@@ -96,6 +97,7 @@ class SubscriptionsPanel(ctk.CTkFrame):
         self.tree.tag_configure("active_warning", font=("Arial", 12, "bold"), foreground="orange")
         self.tree.tag_configure("active_danger", font=("Arial", 12, "bold"), foreground="#e74c3c")
         self.tree.tag_configure("inactive", font=("Arial", 12, "italic"), foreground="gray")
+        self.tree_sync = TreeviewSync(self.tree)
 
         scrollbar = ctk.CTkScrollbar(self.border_frame, orientation="vertical", command=self.tree.yview,
                                      fg_color="transparent", bg_color="transparent")
@@ -167,9 +169,6 @@ class SubscriptionsPanel(ctk.CTkFrame):
             pass
 
     def refresh_table(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
         subs = self.storage.get_subscriptions()
         search_term = self.search_var.get().lower().strip()
         show_inactive = self.show_inactive_var.get()
@@ -202,7 +201,8 @@ class SubscriptionsPanel(ctk.CTkFrame):
         else:  # Domyślnie sortuj po dacie płatności
             filtered_subs.sort(key=lambda x: x.get("billing_date") or "9999-99-99")
 
-        # Rysowanie tabeli
+        # Rysowanie tabeli (lista wierszy synchronizowana z tabelą - zmieniają się tylko różnice)
+        rows = []
         count = 0
         for sub in filtered_subs:
             is_active = sub.get("is_active", True)
@@ -266,11 +266,14 @@ class SubscriptionsPanel(ctk.CTkFrame):
                 "e_days": e_days_str
             }
 
-            self.tree.insert("", "end", iid=sub["id"],
-                             values=(icon, sub["name"], sub.get("provider", ""), cost_str, b_days_str, e_days_str),
-                             tags=(tag,))
+            rows.append((sub["id"], (icon, sub["name"], sub.get("provider", ""), cost_str, b_days_str, e_days_str),
+                         (tag,)))
             count += 1
 
+        self.tree_sync.sync(rows)
+        # Zaznaczenie zostaje po odświeżeniu -> przywracamy widok dat dla zaznaczonego wiersza
+        self.on_select(None)
+
         if count == 0:
             self.lbl_empty.place(relx=0.5, rely=0.5, anchor="center")
             self.lbl_empty.lift()
@@ -281,12 +284,12 @@ class SubscriptionsPanel(ctk.CTkFrame):
         """Podmienia tekst (ilość dni <-> konkretna data) po kliknięciu elementu."""
         selected = self.tree.selection()
 
-        for item_id in self.tree.get_children():
-            data = self.row_display_data.get(item_id)
-            if not data: continue
+        for item_id, data in self.row_display_data.items():
+            values = self.tree_sync.get_values(item_id)
+            if values is None: continue
 
-            # Pobieramy obecne wartości, żeby nie zepsuć kolumn ze stałym tekstem (Nazwa, Koszt itd.)
-            vals = list(self.tree.item(item_id, "values"))
+            # Bierzemy obecne wartości, żeby nie zepsuć kolumn ze stałym tekstem (Nazwa, Koszt itd.)
+            vals = list(values)
 
             if item_id in selected:
                 vals[4] = data["b_date"]  # Pokazuj dokładną datę
@@ -295,7 +298,8 @@ class SubscriptionsPanel(ctk.CTkFrame):
                 vals[4] = data["b_days"]  # Pokaż ilość dni
                 vals[5] = data["e_days"]
 
-            self.tree.item(item_id, values=vals)
+            # Tylko wiersze, w których tekst faktycznie się zmienia (poprzednio i obecnie zaznaczony)
+            self.tree_sync.update(item_id, values=vals)
 
     def show_context_menu(self, event):
         item = self.tree.identify_row(event.y)
@@ -1,9 +1,13 @@
+import time
 import customtkinter as ctk
 from tkinter import messagebox
 from core.sound import play_event_sound
 
 
 class TimerWindow:
+    # Co ile sekund nauki zapisujemy zgromadzony czas do bazy
+    STUDY_FLUSH_INTERVAL = 30
+
     def __init__(self, parent, txt, btn_style, storage=None, callback=None):
         self.parent = parent
         self.txt = txt
@@ -25,6 +29,11 @@ class TimerWindow:
 
         self.stopwatch_seconds = 0
 
+        # Czas nauki zbierany w pamięci (zegar monotoniczny) i zapisywany co STUDY_FLUSH_INTERVAL
+        self.pending_study_seconds = 0.0
+        self.study_anchor = None
+        self.last_flush = time.monotonic()
+
         self.win = ctk.CTkToplevel(parent)
         self.win.title(self.txt.get("win_timer_title", "Timer"))
         self.win.geometry("300x340")
@@ -218,14 +227,40 @@ class TimerWindow:
         except ValueError:
             daily_sec = 0
 
+        # Doliczamy czas, który jeszcze nie trafił do bazy
+        daily_sec += int(self.pending_study_seconds)
+
         mins, secs = divmod(daily_sec, 60)
         hours, mins = divmod(mins, 60)
         self.lbl_daily_sum.configure(text=f"Total Today: {hours:02d}:{mins:02d}")
 
     # --- LOGIKA CZASU I STORAGE ---
 
+    def is_study_time(self):
+        # Przerwa w Pomodoro nie liczy się do czasu nauki
+        return self.mode == "stopwatch" or self.total_time_for_progress != self.BREAK_TIME
+
     def increment_daily_stats(self):
-        if not self.storage: return
+        # Tylko akumulacja w pamięci; zapis do bazy odbywa się w flush_study_time()
+        now = time.monotonic()
+        if self.study_anchor is not None:
+            self.pending_study_seconds += now - self.study_anchor
+        self.study_anchor = now
+
+        if now - self.last_flush >= self.STUDY_FLUSH_INTERVAL:
+            self.flush_study_time()
+
+    def flush_study_time(self, notify=True):
+        # Domykamy bieżący odcinek czasu, jeśli timer wciąż liczy
+        if self.is_running and self.study_anchor is not None and self.is_study_time():
+            now = time.monotonic()
+            self.pending_study_seconds += now - self.study_anchor
+            self.study_anchor = now
+        self.last_flush = time.monotonic()
+
+        seconds = int(self.pending_study_seconds)
+        if not self.storage or seconds <= 0: return
+        self.pending_study_seconds -= seconds
 
         # 1. Pobieramy aktualne statystyki z bazy
         stats = self.storage.get_global_stats()
@@ -240,16 +275,14 @@ class TimerWindow:
             current_daily = 0
             current_total = 0
 
-        # 2. Inkrementacja
-        new_daily = current_daily + 1
-        new_total = current_total + 1
-
-        # 3. Zapis bezpośredni do bazy (bez buforowania w self.data)
-        self.storage.update_global_stat("daily_study_time", new_daily)
-        self.storage.update_global_stat("total_study_time", new_total)
+        # 2. Jeden zbiorczy zapis (i jedna synchronizacja z chmurą) na cały zgromadzony czas
+        self.storage.update_global_stats({
+            "daily_study_time": current_daily + seconds,
+            "total_study_time": current_total + seconds
+        })
 
-        # 4. Callback dla odświeżenia głównego okna
-        if self.callback: self.callback()
+        # 3. Callback dla odświeżenia głównego okna
+        if notify and self.callback: self.callback()
 
     def toggle_timer(self):
         if self.is_running:
@@ -263,14 +296,19 @@ class TimerWindow:
             self.is_running = True
             self.btn_start.configure(text=self.txt.get("timer_pause", "PAUSE"), fg_color="#e74c3c",
                                      hover_color="#c0392b")
+            self.study_anchor = time.monotonic() if self.is_study_time() else None
             if self.mode == "pomo":
-                self.count_down()
+                # Pierwsza sekunda odliczana po sekundzie (N-sekundowa sesja = N ticków = N s nauki)
+                self.timer_id = self.win.after(1000, self.count_down)
             else:
                 self.count_up()
 
     def stop_timer(self):
         if self.is_running:
+            # Zapis zgromadzonego czasu przy pauzie / stopie / zamknięciu
+            self.flush_study_time(notify=False)
             self.is_running = False
+            self.study_anchor = None
             self.btn_start.configure(text=self.txt.get("timer_start", "START"), fg_color="#1f6aa5",
                                      hover_color="#144870")
             if self.timer_id: self.win.after_cancel(self.timer_id)
@@ -292,6 +330,11 @@ class TimerWindow:
             self.update_pomo_display()
             is_break = (self.total_time_for_progress == self.BREAK_TIME)
             if not is_break: self.increment_daily_stats()
+            if self.time_left == 0:
+                # Ostatnia sekunda już doliczona - stop_timer nie może domknąć odcinka drugi raz
+                self.study_anchor = None
+                self.finish_pomo()
+                return
             self.timer_id = self.win.after(1000, self.count_down)
         elif self.time_left == 0:
             self.finish_pomo()
@@ -7,6 +7,7 @@ import uuid
 from tkcalendar import Calendar
 from gui.windows.todo_history import TodoHistoryPanel
 from gui.components.drawers import NoteDrawer
+from gui.components.tree_sync import TreeviewSync
 
 
 class TodoWindow:
@@ -135,6 +136,7 @@ class TodoWindow:
         self.tree.tag_configure("overdue_header", foreground="#e74c3c", font=("Arial", 13, "bold"))
         self.tree.tag_configure("overdue_item", font=("Arial", 13, "bold"))
         self.tree.tag_configure("today_color", font=("Arial", 13, "bold"), foreground="violet")
+        self.tree_sync = TreeviewSync(self.tree)
 
         scrollbar = ctk.CTkScrollbar(self.table_frame, orientation="vertical", command=self.tree.yview,
                                      fg_color="transparent", bg_color="transparent")
@@ -621,12 +623,11 @@ class TodoWindow:
 
         sel_id = self.selected_task_id
 
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        self.tree.insert("", "end", values=("", ""), tags=("default",))
+        # Wiersze budowane w liście i synchronizowane z tabelą (zmieniają się tylko różnice)
+        rows = [(None, ("", ""), ("default",))]
 
         if not filtered_tasks:
+            self.tree_sync.sync(rows)
             self.lbl_empty.place(relx=0.5, rely=0.5, anchor="center")
             self.lbl_empty.lift()
             return
@@ -637,15 +638,15 @@ class TodoWindow:
             bought = [t for t in filtered_tasks if t["status"] == "done"]
 
             if to_buy:
-                self.tree.insert("", "end", values=("●", "To Buy / To Do"), tags=("header",))
+                rows.append((None, ("●", "To Buy / To Do"), ("header",)))
                 for t in to_buy:
-                    self._insert_task_row(t)
-                self.tree.insert("", "end", values=("", ""), tags=("default",))
+                    rows.append(self._task_row(t))
+                rows.append((None, ("", ""), ("default",)))
 
             if bought:
-                self.tree.insert("", "end", values=("●", "Bought / Done"), tags=("header",))
+                rows.append((None, ("●", "Bought / Done"), ("header",)))
                 for t in bought:
-                    self._insert_task_row(t)
+                    rows.append(self._task_row(t))
 
         else:
             # KLASYCZNY TRYB Z DATAMI
@@ -669,10 +670,10 @@ class TodoWindow:
 
             if overdue_tasks:
                 overdue_label = self.txt.get("tag_overdue", "OVERDUE")
-                self.tree.insert("", "end", values=("⚠", f"{overdue_label}"), tags=("overdue_header",))
+                rows.append((None, ("⚠", f"{overdue_label}"), ("overdue_header",)))
                 for t in overdue_tasks:
-                    self._insert_task_row(t)
-                self.tree.insert("", "end", values=("", ""), tags=("default",))
+                    rows.append(self._task_row(t))
+                rows.append((None, ("", ""), ("default",)))
 
             if upcoming_tasks:
                 groups = {}
@@ -723,15 +724,17 @@ class TodoWindow:
 
                     if self.current_list_id != "unscheduled":
                         if "tag_today" in g["display"] or today_str in g["display"]:
-                            self.tree.insert("", "end", values=("●", g["display"]), tags=("today_color",))
+                            rows.append((None, ("●", g["display"]), ("today_color",)))
                         else:
-                            self.tree.insert("", "end", values=("●", g["display"]), tags=("header",))
+                            rows.append((None, ("●", g["display"]), ("header",)))
 
                     for t in day_tasks:
-                        self._insert_task_row(t)
+                        rows.append(self._task_row(t))
 
                     if self.current_list_id != "unscheduled":
-                        self.tree.insert("", "end", values=("", ""), tags=("default",))
+                        rows.append((None, ("", ""), ("default",)))
+
+        self.tree_sync.sync(rows)
 
         if sel_id and self.tree.exists(sel_id):
             self.tree.selection_set(sel_id)
@@ -742,7 +745,7 @@ class TodoWindow:
         else:
             self.lbl_empty.place_forget()
 
-    def _insert_task_row(self, t):
+    def _task_row(self, t):
         status_icon = " ☑" if t["status"] == "done" else " ☐"
         has_note = (t.get("note") or "").strip()
         marks = "✎" if has_note else ""
@@ -759,9 +762,7 @@ class TodoWindow:
             else:
                 tags.append("default")
 
-        self.tree.insert("", "end", iid=t["id"],
-                         values=(f"  {marks}{status_icon}", t["content"]),
-                         tags=tuple(tags))
+        return t["id"], (f"  {marks}{status_icon}", t["content"]), tuple(tags)
 
     def move_to_tomorrow(self):
         selected = self.tree.selection()
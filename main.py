@@ -186,6 +186,8 @@ class GUI:
         # --- INICJALIZACJA STORAGE MANAGER ---
         # Źródło prawdy: Baza Danych SQLite
         self.storage = manager
+        # Cache odczytów: kilka widoków czyta te same tabele w ramach jednej akcji
+        self.storage.enable_cache()
 
         # --- INICJALIZACJA USTAWIEŃ I JĘZYKA ---
         # Pobieramy ustawienia bezpośrednio z bazy
@@ -1010,13 +1012,12 @@ class GUI:
         if event.widget == self.root:
             self.update_badges_logic()
 
-    def update_badges_logic(self):
-        settings = self.storage.get_settings()
-        exams = [dict(x) for x in self.storage.get_exams()]
-        topics = [dict(x) for x in self.storage.get_topics()]
-        daily_tasks = [dict(x) for x in self.storage.get_daily_tasks()]
+    def update_badges_logic(self, snap=None):
+        # Przy odświeżeniu dashboardu dostajemy jego migawkę; przy zmianie rozmiaru okna czytamy własną
+        if snap is None:
+            snap = self.storage.snapshot()
 
-        mode = settings.get("badge_mode", "default")
+        mode = snap.settings.get("badge_mode", "default")
 
         if mode == "off":
             self.badge_plan.place_forget()
@@ -1063,23 +1064,23 @@ class GUI:
         today = date.today()
         today_str = str(today)
 
-        active_exams_ids = {e["id"] for e in exams if date_format(e["date"]) >= today}
+        active_exams_ids = {e["id"] for e in snap.exams if date_format(e["date"]) >= today}
         p_overdue = 0
         p_today_todo = 0
         p_today_done = 0
 
-        for t in topics:
-            if t["exam_id"] not in active_exams_ids: continue
-            t_date = t.get("scheduled_date")
-            if not t_date: continue
-            t_date_obj = date_format(t_date)
-            if t_date_obj < today and t["status"] == "todo":
-                p_overdue += 1
-            elif t_date_obj == today:
-                if t["status"] == "todo":
-                    p_today_todo += 1
-                elif t["status"] == "done":
-                    p_today_done += 1
+        for exam_id in active_exams_ids:
+            for t in snap.topics_by_exam.get(exam_id, ()):
+                t_date = t.get("scheduled_date")
+                if not t_date: continue
+                t_date_obj = date_format(t_date)
+                if t_date_obj < today and t["status"] == "todo":
+                    p_overdue += 1
+                elif t_date_obj == today:
+                    if t["status"] == "todo":
+                        p_today_todo += 1
+                    elif t["status"] == "done":
+                        p_today_done += 1
 
         total_p = p_overdue + p_today_todo
 
@@ -1093,12 +1094,11 @@ class GUI:
         else:
             self.badge_plan.place_forget()
 
-        t_overdue = sum(1 for t in daily_tasks
-                        if t.get("date") and t.get("date") < today_str and t["status"] == "todo")
-        t_today_todo = sum(1 for t in daily_tasks
-                           if t.get("date", "") == today_str and t["status"] == "todo")
-        t_today_done = sum(1 for t in daily_tasks
-                           if t.get("date", "") == today_str and t["status"] == "done")
+        t_overdue = sum(1 for t_date, tasks in snap.tasks_by_date.items() if t_date and t_date < today_str
+                        for t in tasks if t["status"] == "todo")
+        today_tasks = snap.tasks_by_date.get(today_str, ())
+        t_today_todo = sum(1 for t in today_tasks if t["status"] == "todo")
+        t_today_done = sum(1 for t in today_tasks if t["status"] == "done")
 
         total_t = t_overdue + t_today_todo
 
@@ -1113,12 +1113,12 @@ class GUI:
             self.badge_todo.place_forget()
 
     def refresh_dashboard(self):
-        # --- PURE SQL: POBIERANIE DANYCH ON-DEMAND ---
-        exams = [dict(r) for r in self.storage.get_exams()]
-        topics = [dict(r) for r in self.storage.get_topics()]
-        daily_tasks = [dict(r) for r in self.storage.get_daily_tasks()]
-        global_stats = self.storage.get_global_stats()
-        settings = self.storage.get_settings()
+        # --- JEDNA MIGAWKA NA CAŁE ODŚWIEŻENIE (dashboard + plakietki) ---
+        snap = self.storage.snapshot()
+        exams = snap.exams
+        daily_tasks = snap.daily_tasks
+        global_stats = snap.global_stats
+        settings = snap.settings
 
         today = date.today()
         today_str = str(today)
@@ -1127,12 +1127,12 @@ class GUI:
 
         # 1. PLAN NAUKI
         active_exams_ids = {e["id"] for e in exams if date_format(e["date"]) >= today}
-        active_topics = [t for t in topics if t["exam_id"] in active_exams_ids]
+        active_topics = [t for exam_id in active_exams_ids for t in snap.topics_by_exam.get(exam_id, ())]
 
         plan_total = len(active_topics)
         plan_done = len([t for t in active_topics if t["status"] == "done"])
 
-        today_plan_all = [t for t in topics if str(t.get("scheduled_date")) == today_str]
+        today_plan_all = snap.topics_by_date.get(today_str, ())
         today_plan_total = len(today_plan_all)
         today_plan_done = len([t for t in today_plan_all if t["status"] == "done"])
 
@@ -1278,7 +1278,7 @@ class GUI:
             if not is_silent:
                 self.ach_manager.flush_deferred()
 
-        self.update_badges_logic()
+        self.update_badges_logic(snap)
 
         if hasattr(self, 'ach_manager'):
             self.ach_manager.check_all(silent=False)
@@ -1297,6 +1297,10 @@ class GUI:
                 msg = self.txt.get("msg_timer_warning", "Pomodoro is running! Are you sure you want to exit?")
                 if not messagebox.askyesno(self.txt["msg_warning"], msg):
                     return
+            # Zapisujemy czas nauki, który timer trzyma jeszcze w pamięci
+            self.timer_window.flush_study_time(notify=False)
+        # Zamykamy pulę połączeń SQLite (WAL zostaje poprawnie zamknięty)
+        self.storage.close()
         self.root.quit()
 
     def show_update_button(self, latest_tag, asset_url, asset_name, body):